@@ -1,22 +1,46 @@
+import os
+
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from config import config
+from app.utils.db_routing import RoutingSession
 
-# Инициализация расширений
-db = SQLAlchemy()
+# Инициализация расширений; сессия умеет читать с реплики (app/utils/db_routing.py)
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 
-def create_app(config_name='default'):
-    """Фабрика приложений Flask"""
+def create_app(config_name=None):
+    """Фабрика приложений Flask (профиль по умолчанию - из FLASK_CONFIG)"""
+    # `flask ...` вызывает фабрику без аргументов - профиль берём из окружения
+    config_name = config_name or os.getenv('FLASK_CONFIG') or 'default'
     app = Flask(__name__)
     app.config.from_object(config[config_name])
     
     # Инициализация расширений с приложением
     db.init_app(app)
     
+    from app.utils import sqlite_tuning, sql_profiler
+    sqlite_tuning.init_app(app)
+    sql_profiler.init_app(app)
+    
+    from app.utils import occupancy, dashboard, room_prices, room_catalog, rollups, room_claims  # noqa: F401 (обработчики событий)
+    from app.utils import guest_search  # noqa: F401 (синхронизация индекса гостей)
+    from app.utils import visit_totals  # noqa: F401 (итоги визитов по заказам услуг)
+    from app.utils import service_catalog
+    occupancy.init_app(app)
+    dashboard.init_app(app)
+    room_prices.init_app(app)
+    room_catalog.init_app(app)
+    service_catalog.init_app(app)
+    
+    # Команды `flask ...` (app/cli.py)
+    from app import cli
+    cli.init_app(app)
+    
     # Регистрация blueprint'ов
     with app.app_context():
-        from app.modules import rooms, bookings, guests, service, stays, staff, billing
+        from app.modules import main, rooms, bookings, guests, service, stays, staff, billing
         
+        app.add_url_rule('/', 'index', main.index)
         app.register_blueprint(rooms.bp)
         app.register_blueprint(bookings.bp)
         app.register_blueprint(guests.bp)
@@ -25,7 +49,11 @@ def create_app(config_name='default'):
         app.register_blueprint(staff.bp)
         app.register_blueprint(billing.bp)
 
-        # Создание таблиц базы данных
-        db.create_all()
+        # Создание таблиц и применение миграций, как `flask create-schema`
+        # (в продакшене это шаг развёртывания)
+        if app.config.get('AUTO_CREATE_SCHEMA', True):
+            from app.utils import migrations
+            db.create_all()
+            migrations.upgrade()
     
     return app
@@ -0,0 +1,404 @@
+"""
+Команды `flask ...` приложения
+
+Регистрируются в create_app (init_app), поэтому доступны при любом способе
+запуска: `flask --app app.py`, `FLASK_APP=app` и без FLASK_APP - Flask
+импортирует пакет app и вызывает его фабрику, а не модуль app.py.
+"""
+from datetime import date, timedelta
+
+import click
+from flask.cli import with_appcontext
+
+from app import db
+from app.models import (Room, RoomType, Booking,
+                        Staff, Manager, Receptionist)
+
+
+@click.command()
+@with_appcontext
+def create_schema():
+    """Создание недостающих таблиц и применение миграций (шаг развёртывания)"""
+    from app.utils import migrations
+    
+    db.create_all()
+    applied = migrations.upgrade()
+    print(f'Схема базы данных создана, применено миграций: {len(applied)}')
+
+
+@click.command()
+@with_appcontext
+@click.option('--to', 'target', type=int, help='Применить миграции до этой версии')
+def db_upgrade(target):
+    """Применение миграций схемы"""
+    from app.utils import migrations
+    
+    applied = migrations.upgrade(target)
+    for m in applied:
+        print(f'применена v{m.version:04d} {m.name}')
+    print(f'Применено миграций: {len(applied)}')
+
+
+@click.command()
+@with_appcontext
+@click.argument('target', type=int)
+def db_downgrade(target):
+    """Откат миграций с версией больше TARGET"""
+    from app.utils import migrations
+    
+    for m in migrations.downgrade(target):
+        print(f'откачена v{m.version:04d} {m.name}')
+
+
+@click.command()
+@with_appcontext
+def db_status():
+    """Список миграций и их состояние"""
+    from app.utils import migrations
+    
+    for m, applied in migrations.status():
+        print(f'v{m.version:04d} {m.name:<30} {"применена" if applied else "ожидает"}')
+
+
+@click.command()
+@with_appcontext
+def explain_queries():
+    """Проверка, что горячие запросы используют составные индексы"""
+    from app.utils import query_plans
+    
+    checks = query_plans.check_hot_queries()
+    for check in checks:
+        print(f'{"OK " if check.uses_index else "НЕТ"} {check.name} ({check.index})')
+        for line in check.plan:
+            print(f'      {line}')
+    if not all(check.uses_index for check in checks):
+        raise SystemExit(1)
+
+
+@click.command()
+@with_appcontext
+def init_db():
+    """Инициализация базы данных с тестовыми данными"""
+    print('Создание таблиц базы данных...')
+    db.create_all()
+    
+    # Проверяем, есть ли уже данные
+    if Room.query.first():
+        print('База данных уже содержит данные!')
+        return
+    
+    print('Добавление тестовых номеров...')
+    
+    # Создаем номера
+    rooms_data = [
+        # Стандарт
+        ('101', RoomType.STANDARD.code, 1, 2, 'Стандартный номер с двуспальной кроватью'),
+        ('102', RoomType.STANDARD.code, 1, 2, 'Стандартный номер с двумя односпальными кроватями'),
+        ('103', RoomType.STANDARD.code, 1, 2, 'Стандартный номер с видом на парк'),
+        
+        # Делюкс
+        ('201', RoomType.DELUXE.code, 2, 2, 'Делюкс с балконом и видом на город'),
+        ('202', RoomType.DELUXE.code, 2, 2, 'Делюкс с джакузи'),
+        ('203', RoomType.DELUXE.code, 2, 3, 'Делюкс с дополнительным диваном'),
+        
+        # Люкс
+        ('301', RoomType.SUITE.code, 3, 3, 'Люкс с гостиной и спальней'),
+        ('302', RoomType.SUITE.code, 3, 4, 'Президентский люкс с панорамным видом'),
+        
+        # Семейный
+        ('401', RoomType.FAMILY.code, 4, 4, 'Семейный номер с двумя спальнями'),
+        ('402', RoomType.FAMILY.code, 4, 5, 'Семейный номер с детской комнатой'),
+    ]
+    
+    for room_data in rooms_data:
+        room = Room(
+            number=room_data[0],
+            room_type=room_data[1],
+            floor=room_data[2],
+            capacity=room_data[3],
+            description=room_data[4]
+        )
+        db.session.add(room)
+    
+    db.session.commit()
+    print(f'Добавлено {len(rooms_data)} номеров')
+    
+    # Создание тестовонр бронирования
+    print('Добавление тестового бронирования...')
+    room = Room.query.filter_by(number='101').first()
+    if room:
+        booking = Booking(
+            room_id=room.id,
+            guest_name='Иван Иванов',
+            guest_phone='+7 999 123-45-67',
+            guest_email='ivan@example.com',
+            check_in=date.today() + timedelta(days=2),
+            check_out=date.today() + timedelta(days=5),
+            special_requests='Ранний заезд, если возможно'
+        )
+        booking.confirm()
+        db.session.add(booking)
+        db.session.commit()
+        print('Тестовое бронирование создано')
+    
+    # Создаем тестовый персонал
+    print('Добавление тестового персонала...')
+    
+    # Менеджер
+    manager = Manager(
+        first_name='Анна',
+        last_name='Менеджерова',
+        email='manager@hotel-eleon.ru',
+        phone='+7 999 111-22-33',
+        hire_date=date(2023, 1, 15),
+        notes='Главный менеджер отеля'
+    )
+    db.session.add(manager)
+    
+    # Администраторы
+    receptionist1 = Receptionist(
+        first_name='Мария',
+        last_name='Администраторова',
+        email='reception1@hotel-eleon.ru',
+        phone='+7 999 222-33-44',
+        hire_date=date(2023, 3, 1),
+        notes='Администратор утренней смены'
+    )
+    db.session.add(receptionist1)
+    
+    receptionist2 = Receptionist(
+        first_name='Пётр',
+        last_name='Петров',
+        email='reception2@hotel-eleon.ru',
+        phone='+7 999 333-44-55',
+        hire_date=date(2023, 6, 10),
+        notes='Администратор вечерней смены'
+    )
+    db.session.add(receptionist2)
+    
+    # Обычный персонал
+    staff1 = Staff(
+        first_name='Иван',
+        last_name='Техников',
+        email='tech@hotel-eleon.ru',
+        phone='+7 999 444-55-66',
+        hire_date=date(2024, 1, 20),
+        role='staff',
+        notes='Технический персонал'
+    )
+    db.session.add(staff1)
+    
+    db.session.commit()
+    print(f'Добавлено {4} сотрудника')
+    
+    # Создаем тестовый счёт
+    print('Создание тестового счёта...')
+    booking = Booking.query.filter_by(guest_name='Иван Иванов').first()
+    if booking:
+        # Создаём счёт через администратора
+        bill = receptionist1.create_bill_for_booking(
+            booking,
+            additional_items=[
+                {'desc': 'Мини-бар', 'qty': 1, 'unit_price': 500},
+                {'desc': 'Завтрак', 'qty': 3, 'unit_price': 350}
+            ],
+            auto_from_booking=True
+        )
+        
+        # Добавляем частичную оплату
+        payment = receptionist1.record_payment(
+            bill,
+            amount=5000,
+            method='card',
+            reference='CARD-12345',
+            notes='Предоплата картой'
+        )
+        
+        db.session.commit()
+        print(f'Тестовый счёт создан: {bill.total} руб., оплачено: {bill.paid_amount} руб.')
+    
+    print('База данных инициализирована успешно!')
+
+
+@click.command()
+@with_appcontext
+@click.option('--repair', is_flag=True, help='Перестроить индекс при расхождениях')
+def occupancy_check(repair):
+    """Сверка индекса занятости номеров с базой данных"""
+    from app.utils import occupancy
+    
+    index = occupancy.get_index()
+    report = index.check_consistency()
+    problems = sum(len(ids) for ids in report.values())
+    
+    print(f'Бронирований в индексе: {len(index)}')
+    for key, title in (('missing', 'Нет в индексе'),
+                       ('extra', 'Лишние в индексе'),
+                       ('mismatched', 'Отличаются даты/номер')):
+        if report[key]:
+            print(f'{title}: {report[key]}')
+    
+    if not problems:
+        print('Индекс согласован с базой данных')
+    elif repair:
+        index.rebuild()
+        print(f'Индекс перестроен, бронирований: {len(index)}')
+
+
+@click.command()
+@with_appcontext
+def migrate_bill_items():
+    """Перенос позиций счетов из items_json в таблицу bill_items"""
+    from app.models.billing import migrate_items_json
+    
+    db.create_all()
+    bills, items = migrate_items_json()
+    print(f'Перенесено счетов: {bills}, позиций: {items}')
+
+
+@click.command()
+@with_appcontext
+def rebuild_rollups():
+    """Пересборка дневных агрегатов по платежам, счетам и бронированиям"""
+    from app.utils import rollups
+    
+    counts = rollups.rebuild()
+    for table, rows in counts.items():
+        print(f'{table}: {rows} строк')
+    print('Агрегаты пересобраны')
+
+
+@click.command()
+@with_appcontext
+def rebuild_claims():
+    """Пересборка занятых ночей номеров по активным бронированиям"""
+    from app.utils import room_claims
+    
+    rows, conflicts = room_claims.rebuild()
+    print(f'room_night_claims: {rows} строк')
+    if conflicts:
+        print(f'Пересекающиеся активные брони (не учтены): {conflicts}')
+        raise SystemExit(1)
+    print('Занятые ночи пересобраны')
+
+
+@click.command()
+@with_appcontext
+@click.option('--fix', is_flag=True, help='Записать пересчитанные итоги')
+def reconcile_visit_totals(fix):
+    """Сверка итогов визитов с полным пересчётом заказов услуг"""
+    from app.utils import visit_totals
+    
+    drift = visit_totals.reconcile(fix=fix)
+    for d in drift:
+        print(f'визит #{d["visit_id"]}: услуги {d["services_amount"]} -> {d["expected_services"]}, '
+              f'итог {d["total_amount"]} -> {d["expected_total"]}')
+    print(f'Расхождений: {len(drift)}' + (' (исправлены)' if fix and drift else ''))
+    if drift and not fix:
+        raise SystemExit(1)
+
+
+@click.command()
+@with_appcontext
+def sync_replica():
+    """Копирование основной базы SQLite в файл реплики (для разработки)"""
+    from app.utils import db_routing
+    
+    print(f'Реплика обновлена: {db_routing.sync_sqlite_replica()}')
+
+
+@click.command()
+@with_appcontext
+def rebuild_guest_index():
+    """Создание и пересборка полнотекстового индекса гостей"""
+    from app.utils import guest_search
+    
+    print(f'{guest_search.TABLE}: {guest_search.rebuild()} гостей')
+
+
+@click.command()
+@with_appcontext
+def normalize_guest_contacts():
+    """Заполнение нормализованных телефонов и почты гостей"""
+    from app.utils import guest_duplicates
+    
+    print(f'Обновлено гостей: {guest_duplicates.backfill()}')
+
+
+@click.command()
+@with_appcontext
+def find_duplicate_guests():
+    """Поиск возможных дублей гостей по телефону и почте"""
+    from app.models.guests import Guest
+    from app.utils import guest_duplicates
+    
+    groups = guest_duplicates.find_duplicates()
+    for ids in groups:
+        guests = Guest.query.filter(Guest.id.in_(ids)).order_by(Guest.id)
+        print('; '.join(f'#{g.id} {g.full_name()} {g.phone or ""} {g.email or ""}'.strip()
+                        for g in guests))
+    print(f'Групп дублей: {len(groups)}')
+
+
+@click.command()
+@with_appcontext
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--format', 'fmt', type=click.Choice(['csv', 'jsonl']),
+              help='Формат файла (по умолчанию - по расширению)')
+@click.option('--chunk-size', default=500, show_default=True, help='Строк в одной транзакции')
+@click.option('--dry-run', is_flag=True, help='Только проверить файл')
+def import_bookings(path, fmt, chunk_size, dry_run):
+    """Массовый импорт бронирований из CSV или JSONL"""
+    from app.utils import booking_import
+    
+    fmt = fmt or booking_import.detect_format(path)
+    with open(path, encoding='utf-8-sig') as f:
+        rows = booking_import.parse_rows(f.read(), fmt)
+    report = booking_import.import_bookings(rows, chunk_size=chunk_size, dry_run=dry_run)
+    
+    for error in sorted(report.errors, key=lambda e: e['line']):
+        print(f'строка {error["line"]}: {error["error"]}')
+    if dry_run:
+        print(f'Проверено строк: {report.total}, без ошибок: {report.valid}')
+    else:
+        print(f'Импортировано {report.imported} из {report.total} строк')
+    if report.errors:
+        raise SystemExit(1)
+
+
+@click.command()
+@with_appcontext
+def clear_db():
+    """Очистка базы данных"""
+    if input('Вы уверены? Все данные будут удалены (yes/no): ') == 'yes':
+        db.drop_all()
+        print('База данных очищена!')
+    else:
+        print('Отменено')
+
+
+COMMANDS = (
+    create_schema,
+    db_upgrade,
+    db_downgrade,
+    db_status,
+    explain_queries,
+    init_db,
+    occupancy_check,
+    migrate_bill_items,
+    rebuild_rollups,
+    rebuild_claims,
+    reconcile_visit_totals,
+    sync_replica,
+    rebuild_guest_index,
+    normalize_guest_contacts,
+    find_duplicate_guests,
+    import_bookings,
+    clear_db,
+)
+
+
+def init_app(app):
+    """Регистрация команд в приложении"""
+    for command in COMMANDS:
+        app.cli.add_command(command)
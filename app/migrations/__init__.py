@@ -0,0 +1,5 @@
+"""
+Миграции схемы (применяются командой `flask db-upgrade`, см. app/utils/migrations.py)
+
+Файл миграции: v<номер>_<описание>.py с функциями upgrade(op) и downgrade(op).
+"""
@@ -0,0 +1,36 @@
+"""
+Составные индексы горячих запросов
+
+- bookings(room_id, status, check_in, check_out) - проверка доступности
+  номера (Room.is_available_for_period, поиск и подтверждение броней);
+- bills(status, created_at, id) и bills(created_at, id) - список счетов
+  с фильтром по статусу и без него (billing.index);
+- payments(bill_id, created_at) - платежи в карточке счёта (billing.detail);
+- bookings(status, check_in, id) и bookings(check_in, id) - список броней
+  (bookings.index).
+
+Индексы списков уже объявлены в моделях, но в базы, созданные до их
+появления, create_all их не добавлял.
+"""
+
+INDEXES = (
+    ('ix_bookings_room_status_dates', 'bookings', ('room_id', 'status', 'check_in', 'check_out')),
+    ('ix_bookings_status_check_in_id', 'bookings', ('status', 'check_in', 'id')),
+    ('ix_bookings_check_in_id', 'bookings', ('check_in', 'id')),
+    ('ix_bills_status_created_at_id', 'bills', ('status', 'created_at', 'id')),
+    ('ix_bills_created_at_id', 'bills', ('created_at', 'id')),
+    ('ix_payments_bill_created_at', 'payments', ('bill_id', 'created_at')),
+)
+
+
+def upgrade(op):
+    for name, table, columns in INDEXES:
+        op.create_index(name, table, columns)
+    for table in ('bookings', 'bills', 'payments'):
+        op.analyze(table)
+
+
+def downgrade(op):
+    # индексы, объявленные в моделях раньше этой миграции, не удаляются
+    op.drop_index('ix_bookings_room_status_dates')
+    op.drop_index('ix_payments_bill_created_at')
@@ -0,0 +1,29 @@
+"""
+Нормализованные контакты гостей
+
+Колонки guests.phone_normalized / email_normalized (точный поиск по
+телефону и почте, поиск дублей) с индексами. Модель Guest читает их в
+каждом запросе, поэтому в базе, созданной до их появления, без этой
+миграции не работает ни одна страница гостей. Существующие строки
+заполняются здесь же, новые - валидаторами модели.
+"""
+from app.utils import guest_duplicates
+
+COLUMNS = (
+    ('phone_normalized', 'VARCHAR(20)'),
+    ('email_normalized', 'VARCHAR(120)'),
+)
+
+
+def upgrade(op):
+    for name, sql_type in COLUMNS:
+        op.add_column('guests', name, sql_type)
+        op.create_index(f'ix_guests_{name}', 'guests', (name,))
+    guest_duplicates.backfill(op.conn)
+    op.analyze('guests')
+
+
+def downgrade(op):
+    for name, _ in COLUMNS:
+        op.drop_index(f'ix_guests_{name}')
+        op.drop_column('guests', name)
@@ -0,0 +1,18 @@
+"""
+Позиции счетов в таблице bill_items
+
+Создаёт таблицу и переносит в неё позиции из устаревшей колонки
+bills.items_json (после переноса в ней остаётся '[]').
+"""
+from app.models.billing import BillItem, migrate_items_json
+
+
+def upgrade(op):
+    op.create_table(BillItem.__table__)
+    migrate_items_json(op.conn)
+    op.analyze('bill_items')
+
+
+def downgrade(op):
+    # позиции уже перенесены и из items_json удалены - таблица остаётся
+    pass
@@ -0,0 +1,23 @@
+"""
+Дневные агрегаты отчётов (daily_payment_totals, daily_bill_totals,
+daily_room_nights)
+
+Отчёт менеджера читает показатели биллинга только из агрегатов, поэтому
+в базе, созданной до их появления, таблицы создаются и заполняются по
+платежам, счетам и броням. Дальше агрегаты обновляются при каждом flush.
+"""
+from app.models.rollups import DailyPaymentTotal, DailyBillTotal, DailyRoomNights
+from app.utils import rollups
+
+MODELS = (DailyPaymentTotal, DailyBillTotal, DailyRoomNights)
+
+
+def upgrade(op):
+    for model in MODELS:
+        op.create_table(model.__table__)
+    rollups.rebuild(op.conn)
+
+
+def downgrade(op):
+    # агрегаты ведутся при каждом flush - удалённые пришлось бы пересобирать
+    pass
@@ -1,11 +1,13 @@
 from app.models.room import Room, RoomType
-from app.models.booking import Booking, BookingStatus
+from app.models.booking import Booking, BookingStatus, RoomNightClaim
 from app.models.staff import Staff, Manager, Receptionist, StaffRole
-from app.models.billing import Bill, Payment, BillStatus, PaymentMethod
+from app.models.billing import Bill, BillItem, Payment, BillStatus, PaymentMethod
+from app.models.rollups import DailyPaymentTotal, DailyBillTotal, DailyRoomNights
 
 __all__ = [
     'Room', 'RoomType', 
-    'Booking', 'BookingStatus',
+    'Booking', 'BookingStatus', 'RoomNightClaim',
     'Staff', 'Manager', 'Receptionist', 'StaffRole',
-    'Bill', 'Payment', 'BillStatus', 'PaymentMethod'
+    'Bill', 'BillItem', 'Payment', 'BillStatus', 'PaymentMethod',
+    'DailyPaymentTotal', 'DailyBillTotal', 'DailyRoomNights'
 ]
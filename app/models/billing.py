@@ -3,8 +3,10 @@ from enum import Enum
 from datetime import datetime
 import json
 from app import db
+from app.utils import lookup
 
 
+@lookup.register
 class BillStatus(Enum):
     OPEN = ('open', 'Открыт')
     PARTIALLY_PAID = ('partially_paid', 'Частично оплачен')
@@ -17,6 +19,7 @@ class BillStatus(Enum):
         self.display_name = name
 
 
+@lookup.register
 class PaymentMethod(Enum):
     CASH = ('cash', 'Наличные')
     CARD = ('card', 'Банковская карта')
@@ -31,6 +34,11 @@ class PaymentMethod(Enum):
 
 class Bill(db.Model):
     __tablename__ = 'bills'
+    __table_args__ = (
+        # постраничный список счетов: (created_at, id) и с фильтром по статусу
+        db.Index('ix_bills_created_at_id', 'created_at', 'id'),
+        db.Index('ix_bills_status_created_at_id', 'status', 'created_at', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -42,6 +50,8 @@ class Bill(db.Model):
     
     created_by_id = db.Column(db.Integer, db.ForeignKey('staff.id'), nullable=False)
     
+    # Устаревшее хранение позиций одной JSON-строкой; позиции теперь в bill_items,
+    # старые данные переносит миграция v0003 (`flask db-upgrade`)
     items_json = db.Column(db.Text, nullable=False, default='[]')
     
     subtotal = db.Column(db.Float, nullable=False, default=0.0)
@@ -59,6 +69,10 @@ class Bill(db.Model):
     payments = db.relationship('Payment', backref='bill', lazy='dynamic',
                               cascade='all, delete-orphan')
     
+    # Позиции счёта: коллекция не загружается целиком, строки пишутся по одной
+    line_items = db.relationship('BillItem', back_populates='bill', lazy='write_only',
+                                 cascade='all, delete-orphan', passive_deletes=True)
+    
     def __init__(self, guest_name, guest_contact, created_by_id, 
                  booking_id=None, notes=''):
         self.guest_name = guest_name
@@ -76,43 +90,114 @@ class Bill(db.Model):
     
     @property
     def items(self):
-        try:
-            return json.loads(self.items_json)
-        except (json.JSONDecodeError, TypeError):
+        """
+        Позиции счёта в прежнем формате: список словарей по порядку добавления
+        
+        Позиции читаются из БД один раз и кэшируются в экземпляре; кэш
+        обновляется при add_item/remove_item/присваивании и сбрасывается,
+        когда ORM обновляет или помечает устаревшим счёт (commit, rollback,
+        refresh, expire). Возвращаемый список - копия, словари менять нельзя.
+        """
+        cache = self.__dict__.get('_items_cache')
+        if cache is None:
+            cache = self._load_items()
+            self._items_cache = cache
+        return list(cache)
+    
+    def _load_items(self):
+        if self.id is None:
             return []
+        rows = db.session.execute(
+            db.select(BillItem.description, BillItem.quantity,
+                      BillItem.unit_price, BillItem.total)
+            .where(BillItem.bill_id == self.id)
+            .order_by(BillItem.position)
+        )
+        return [BillItem.as_dict(*row) for row in rows]
+    
+    def _reset_items_cache(self):
+        self.__dict__.pop('_items_cache', None)
     
     @items.setter
     def items(self, value):
-        self.items_json = json.dumps(value, ensure_ascii=False)
+        self._persist()
+        db.session.execute(db.delete(BillItem).where(BillItem.bill_id == self.id))
+        cache = []
+        for position, item in enumerate(value):
+            line = BillItem(
+                description=item.get('description', ''),
+                quantity=item.get('quantity', 1),
+                unit_price=item.get('unit_price', 0),
+                position=position,
+                total=item.get('total')
+            )
+            self.line_items.add(line)
+            cache.append(line.to_dict())
+        self.updated_at = datetime.utcnow()
+        self._items_cache = cache
+    
+    def _persist(self):
+        # Позиции ссылаются на счёт по id - новый счёт сохраняем в сессии
+        if self.id is None:
+            db.session.add(self)
+            db.session.flush()
     
     def add_item(self, description, quantity, unit_price):
-        items = self.items
-        item_total = quantity * unit_price
+        """Добавить позицию: одна вставка строки, существующие позиции не читаются"""
+        self._persist()
+        position = db.session.query(
+            db.func.coalesce(db.func.max(BillItem.position) + 1, 0)
+        ).filter(BillItem.bill_id == self.id).scalar()
         
-        items.append({
-            'description': description,
-            'quantity': quantity,
-            'unit_price': unit_price,
-            'total': item_total
-        })
-        
-        self.items = items
+        line = BillItem(
+            description=description,
+            quantity=quantity,
+            unit_price=unit_price,
+            position=position
+        )
+        self.line_items.add(line)
         self.updated_at = datetime.utcnow()
+        
+        cache = self.__dict__.get('_items_cache')
+        if cache is not None:
+            cache.append(line.to_dict())
     
     def remove_item(self, index):
-        items = self.items
-        if 0 <= index < len(items):
-            items.pop(index)
-            self.items = items
-            self.updated_at = datetime.utcnow()
-            return True
-        return False
+        """Удалить позицию по номеру в списке items"""
+        if self.id is None or index < 0:
+            return False
+        item = db.session.scalars(
+            db.select(BillItem)
+            .where(BillItem.bill_id == self.id)
+            .order_by(BillItem.position)
+            .offset(index)
+            .limit(1)
+        ).first()
+        if item is None:
+            return False
+        db.session.delete(item)
+        self.updated_at = datetime.utcnow()
+        
+        cache = self.__dict__.get('_items_cache')
+        if cache is not None and index < len(cache):
+            cache.pop(index)
+        return True
+    
+    def items_subtotal(self):
+        """Сумма позиций: по кэшу, если позиции уже прочитаны, иначе SUM() в БД"""
+        cache = self.__dict__.get('_items_cache')
+        if cache is not None:
+            return float(sum(item['total'] for item in cache))
+        if self.id is None:
+            return 0.0
+        return db.session.query(
+            db.func.coalesce(db.func.sum(BillItem.total), 0.0)
+        ).filter(BillItem.bill_id == self.id).scalar()
     
     def recalc_totals(self, tax_percent=None, discount_amount=None):
         from flask import current_app
         
-        items = self.items
-        self.subtotal = sum(item.get('total', 0) for item in items)
+        self.subtotal = self.items_subtotal()
         
         if tax_percent is None:
             tax_percent = current_app.config.get('TAX_PERCENT', 0)
@@ -153,10 +238,7 @@ class Bill(db.Model):
         return False
     
     def get_status_display(self):
-        for status in BillStatus:
-            if status.code == self.status:
-                return status.display_name
-        return self.status
+        return lookup.display_name(BillStatus, self.status)
     
     def to_dict(self):
         """Преобразование в словарь для JSON"""
@@ -183,6 +265,123 @@ class Bill(db.Model):
         return f'<Bill {self.id}: {self.guest_name} - {self.total} руб. ({self.get_status_display()})>'
 
 
+@db.event.listens_for(Bill, 'expire')
+def _bill_expired(bill, attrs):
+    # commit/rollback/expire: позиции могли измениться в БД
+    bill._reset_items_cache()
+
+
+@db.event.listens_for(Bill, 'refresh')
+def _bill_refreshed(bill, context, attrs):
+    bill._reset_items_cache()
+
+
+class BillItem(db.Model):
+    """
+    Позиция счёта
+    
+    Хранится отдельной строкой, поэтому добавление и удаление позиции
+    не требуют разбора и перезаписи всего счёта, а подытог считается SUM().
+    """
+    __tablename__ = 'bill_items'
+    __table_args__ = (
+        db.Index('ix_bill_items_bill_position', 'bill_id', 'position'),
+    )
+    
+    id = db.Column(db.Integer, primary_key=True)
+    bill_id = db.Column(db.Integer, db.ForeignKey('bills.id', ondelete='CASCADE'), nullable=False)
+    
+    # Порядок позиции в счёте (после удалений возможны пропуски)
+    position = db.Column(db.Integer, nullable=False, default=0)
+    
+    description = db.Column(db.String(255), nullable=False, default='')
+    quantity = db.Column(db.Float, nullable=False, default=1)
+    unit_price = db.Column(db.Float, nullable=False, default=0.0)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+    
+    bill = db.relationship('Bill', back_populates='line_items')
+    
+    def __init__(self, description, quantity, unit_price, position=0, total=None):
+        self.description = description
+        self.quantity = quantity
+        self.unit_price = unit_price
+        self.position = position
+        self.total = quantity * unit_price if total is None else total
+    
+    @staticmethod
+    def as_dict(description, quantity, unit_price, total):
+        """Словарь позиции в формате прежнего items_json"""
+        if isinstance(quantity, float) and quantity.is_integer():
+            quantity = int(quantity)
+        return {
+            'description': description,
+            'quantity': quantity,
+            'unit_price': unit_price,
+            'total': total
+        }
+    
+    def to_dict(self):
+        return self.as_dict(self.description, self.quantity, self.unit_price, self.total)
+    
+    def __repr__(self):
+        return f'<BillItem {self.id}: {self.description} x{self.quantity}>'
+
+
+def migrate_items_json(conn=None, batch_size=500):
+    """
+    Перенос позиций из устаревшего items_json в таблицу bill_items
+    
+    Обрабатывает счета пачками, после переноса items_json очищается,
+    поэтому повторный запуск безопасен. Вызывается миграцией v0003.
+    
+    Args:
+        conn: соединение миграции (транзакцией управляет она); без него -
+            сессия с commit после каждой пачки
+    
+    Returns:
+        tuple: (счетов перенесено, позиций создано)
+    """
+    executor = conn if conn is not None else db.session
+    bills, items_table = Bill.__table__, BillItem.__table__
+    bills_done = items_done = 0
+    while True:
+        rows = executor.execute(
+            db.select(bills.c.id, bills.c.items_json)
+            .where(bills.c.items_json.isnot(None), bills.c.items_json.notin_(['', '[]']))
+            .order_by(bills.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        
+        new_items = []
+        for bill_id, items_json in rows:
+            try:
+                items = json.loads(items_json)
+            except (json.JSONDecodeError, TypeError):
+                items = []
+            
+            new_items.extend({
+                'bill_id': bill_id,
+                'position': position,
+                'description': item.get('description', ''),
+                'quantity': item.get('quantity', 1),
+                'unit_price': item.get('unit_price', 0),
+                'total': item.get('total', 0)
+            } for position, item in enumerate(items))
+            items_done += len(items)
+        
+        if new_items:
+            executor.execute(items_table.insert(), new_items)
+        executor.execute(
+            bills.update().where(bills.c.id.in_([row.id for row in rows])).values(items_json='[]')
+        )
+        bills_done += len(rows)
+        if conn is None:
+            db.session.commit()
+    
+    return bills_done, items_done
+
+
 class Payment(db.Model):
     """
     Модель платежа
@@ -192,6 +391,10 @@ class Payment(db.Model):
     - Абстракция: представляет платёж как транзакцию
     """
     __tablename__ = 'payments'
+    __table_args__ = (
+        # платежи счёта по времени (карточка счёта)
+        db.Index('ix_payments_bill_created_at', 'bill_id', 'created_at'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -228,10 +431,7 @@ class Payment(db.Model):
     
     def get_method_display(self):
         """Получить отображаемое название способа оплаты"""
-        for payment_method in PaymentMethod:
-            if payment_method.code == self.method:
-                return payment_method.display_name
-        return self.method
+        return lookup.display_name(PaymentMethod, self.method)
     
     def is_refund(self):
         """Является ли платёж возвратом"""
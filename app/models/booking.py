@@ -4,9 +4,17 @@
 from enum import Enum
 from datetime import datetime, timezone
 from app import db
+from app.utils import lookup
 from sqlalchemy.orm import relationship
 
+
+def utcnow():
+    # Текущее время в UTC без tzinfo (в таком виде даты хранятся в SQLite)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 # класс статусов бронирования
+@lookup.register
 class BookingStatus(Enum):
     PENDING = ('pending', 'В ожидании')
     CONFIRMED = ('confirmed', 'Подтверждено')
@@ -19,6 +27,10 @@ class BookingStatus(Enum):
         self.display_name = name
 
 
+# Статусы, при которых бронь занимает номер
+ACTIVE_STATUSES = (BookingStatus.CONFIRMED.code, BookingStatus.CHECKED_IN.code)
+
+
 class Booking(db.Model):
     
     # Модель бронирования номера
@@ -27,11 +39,18 @@ class Booking(db.Model):
     # абстракция: представляет бронь как бизнес-объект
     
     __tablename__ = 'bookings'
+    __table_args__ = (
+        # постраничный список с фильтром по статусу: (status, check_in, id)
+        db.Index('ix_bookings_status_check_in_id', 'status', 'check_in', 'id'),
+        db.Index('ix_bookings_check_in_id', 'check_in', 'id'),
+        # проверка доступности номера: room_id = ? AND status IN (...) AND даты
+        db.Index('ix_bookings_room_status_dates', 'room_id', 'status', 'check_in', 'check_out'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
     # Связь с номером (many-to-one)
-    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'), nullable=False)
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id'), nullable=False, index=True)
     
     # Информация о госте (упрощенная, без отдельной таблицы для модуля Солянова)
     guest_name = db.Column(db.String(100), nullable=False)
@@ -83,15 +102,26 @@ class Booking(db.Model):
         if nights <= 0:
             nights = 1
         
-        # Получаем цену номера
+        # Цена номера из кэша цен (без запроса к БД на каждую бронь)
         # Локальный импорт разрывает циклическую зависимость с модулем Room
-        from app.models.room import Room
+        from app.utils import room_prices
 
-        room = db.session.get(Room, self.room_id)
-        if room:
-            self.total_price = room.price_per_night * nights
-        else:
-            self.total_price = 0
+        price = room_prices.get_price(self.room_id)
+        self.total_price = price * nights if price is not None else 0
+    
+    @classmethod
+    def overlaps_period(cls, check_in, check_out):
+        """
+        SQL-условие: активная бронь пересекается с периодом [check_in, check_out)
+        
+        Две полуинтервальные даты пересекаются, если каждая начинается
+        раньше, чем заканчивается другая.
+        """
+        return db.and_(
+            cls.status.in_(ACTIVE_STATUSES),
+            cls.check_in < check_out,
+            cls.check_out > check_in
+        )
     
     def get_nights_count(self):
         """Получить количество ночей"""
@@ -99,10 +129,7 @@ class Booking(db.Model):
     
     def get_status_display(self):
         """Получить отображаемое название статуса"""
-        for status in BookingStatus:
-            if status.code == self.status:
-                return status.display_name
-        return self.status
+        return lookup.display_name(BookingStatus, self.status)
     
     def confirm(self):
         """Подтвердить бронирование"""
@@ -170,3 +197,23 @@ class Booking(db.Model):
     def __repr__(self):
         return f'<Booking {self.id}: {self.guest_name} ({self.check_in} - {self.check_out})>'
 
+
+class RoomNightClaim(db.Model):
+    """
+    Занятая ночь номера
+    
+    Строка на каждую ночь активной (подтверждённой или заселённой) брони.
+    Первичный ключ (room_id, night) гарантирует на уровне БД, что две
+    активные брони одного номера не пересекаются, даже если проверки
+    доступности выполнялись параллельно. Строки ведутся автоматически
+    при каждом flush (см. app/utils/room_claims.py).
+    """
+    __tablename__ = 'room_night_claims'
+    
+    room_id = db.Column(db.Integer, db.ForeignKey('rooms.id', ondelete='CASCADE'), primary_key=True)
+    night = db.Column(db.Date, primary_key=True)
+    booking_id = db.Column(db.Integer, db.ForeignKey('bookings.id', ondelete='CASCADE'),
+                           nullable=False, index=True)
+    
+    def __repr__(self):
+        return f'<RoomNightClaim room={self.room_id} night={self.night} booking={self.booking_id}>'
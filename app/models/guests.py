@@ -1,9 +1,10 @@
 from datetime import datetime
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import func
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from app import db  
+from app.utils.contacts import normalize_phone, normalize_email
 
 # класс модель гостя
 # хранение персональных данных и связи с бронированиями и посещениями
@@ -17,12 +18,27 @@ class Guest(db.Model):
     phone = db.Column(db.String(32), nullable=True, index=True)  # Телефон
     email = db.Column(db.String(120), nullable=True, index=True, unique=False)  # Почта (не делаем уникальной — бывают дубли)
     doc_number = db.Column(db.String(64), nullable=True, index=True)  # Паспорт/удостоверение
+    # Нормализованные копии для точного поиска и поиска дублей (заполняются автоматически)
+    phone_normalized = db.Column(db.String(20), nullable=True, index=True)  # Цифры E.164: 79991234567
+    email_normalized = db.Column(db.String(120), nullable=True, index=True)  # Почта в нижнем регистре
     created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     # История проживаний (визиты) и бронирования (ожидаем наличие модели Booking)
+    # Загружаются лениво: что нужно представлению, оно указывает в options() запроса
     visits = relationship("GuestVisit", back_populates="guest", cascade="all, delete-orphan")
-    bookings = relationship("Booking", back_populates="guest", lazy="selectin", foreign_keys="Booking.guest_id")
+    bookings = relationship("Booking", back_populates="guest", foreign_keys="Booking.guest_id")
+
+    @validates("phone")
+    def _normalize_phone(self, key, value):
+        # при каждой записи телефона обновляем нормализованную копию
+        self.phone_normalized = normalize_phone(value)
+        return value
+
+    @validates("email")
+    def _normalize_email(self, key, value):
+        self.email_normalized = normalize_email(value)
+        return value
 
     def full_name(self) -> str:
         # Полное имя для отображения
@@ -64,12 +80,12 @@ class GuestVisit(db.Model):
     room = relationship("Room")
     service_orders = relationship("ServiceOrder", back_populates="visit", cascade="all, delete-orphan")
 
-    # пересчет итогов по услугам
+    # полный пересчет итогов по услугам; обычно итоги ведутся по дельтам
+    # при каждом изменении заказов (app/utils/visit_totals.py)
     def recalc_totals(self):
         self.services_amount = (db.session.query(func.coalesce(func.sum(
-            db.text("quantity * unit_price")  # умножение на уровне БД
+            ServiceOrder.quantity * ServiceOrder.unit_price  # умножение на уровне БД
         ), 0))
-         .select_from(ServiceOrder)
          .filter(ServiceOrder.visit_id == self.id, ServiceOrder.status == "completed")
          .scalar() or 0)
 
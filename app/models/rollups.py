@@ -0,0 +1,36 @@
+# Дневные агрегаты (rollup-таблицы) для отчётов и календаря
+# Заполняются инкрементально в той же транзакции, что и исходные данные
+# (см. app/utils/rollups.py), в существующей базе заполняются миграцией
+# v0005, полностью пересобираются командой `flask rebuild-rollups`.
+
+from app import db
+
+
+class DailyPaymentTotal(db.Model):
+    """Платежи за день по способу оплаты"""
+    __tablename__ = 'daily_payment_totals'
+
+    day = db.Column(db.Date, primary_key=True)
+    method = db.Column(db.String(20), primary_key=True)
+    payments_count = db.Column(db.Integer, nullable=False, default=0)
+    amount = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class DailyBillTotal(db.Model):
+    """Счета, созданные за день, по текущему статусу"""
+    __tablename__ = 'daily_bill_totals'
+
+    day = db.Column(db.Date, primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    bills_count = db.Column(db.Integer, nullable=False, default=0)
+    total = db.Column(db.Float, nullable=False, default=0.0)
+
+
+class DailyRoomNights(db.Model):
+    """Занятые номеро-ночи за день по типу номера и статусу брони"""
+    __tablename__ = 'daily_room_nights'
+
+    day = db.Column(db.Date, primary_key=True)
+    room_type = db.Column(db.String(20), primary_key=True)
+    status = db.Column(db.String(20), primary_key=True)
+    room_nights = db.Column(db.Integer, nullable=False, default=0)
@@ -5,8 +5,10 @@
 from enum import Enum
 
 from app import db
+from app.utils import lookup
 
 
+@lookup.register
 class RoomType(Enum):
     # Типы номеров
     STANDARD = ('standard', 'Стандарт', 3000)
@@ -58,19 +60,13 @@ class Room(db.Model):
     
     def _set_price_by_type(self):
         """Приватный метод для установки цены (инкапсуляция)"""
-        for room_type in RoomType:
-            if room_type.code == self.room_type:
-                self.price_per_night = room_type.base_price
-                break
-        else:
-            self.price_per_night = 3000  # Цена по умолчанию
+        room_type = lookup.by_code(RoomType, self.room_type)
+        # Цена по умолчанию - 3000
+        self.price_per_night = room_type.base_price if room_type else 3000
     
     def get_type_display(self):
         """Получить отображаемое название типа номера"""
-        for room_type in RoomType:
-            if room_type.code == self.room_type:
-                return room_type.display_name
-        return self.room_type
+        return lookup.display_name(RoomType, self.room_type)
     
     def is_available_for_period(self, check_in, check_out):
         """
@@ -83,20 +79,51 @@ class Room(db.Model):
         Returns:
             bool: True если номер свободен
         """
-        from app.models.booking import BookingStatus
-        #првоерка пересечения дат
-        overlapping_bookings = self.bookings.filter(
-            db.and_(
-                Booking.status.in_([BookingStatus.CONFIRMED.code, BookingStatus.CHECKED_IN.code]),
-                db.or_(
-                    db.and_(Booking.check_in <= check_in, Booking.check_out > check_in),
-                    db.and_(Booking.check_in < check_out, Booking.check_out >= check_out),
-                    db.and_(Booking.check_in >= check_in, Booking.check_out <= check_out)
-                )
-            )
+        from app.models.booking import Booking
+        from app.utils import occupancy
+        
+        # быстрый путь: индекс занятости в памяти, без запроса к БД
+        if occupancy.is_enabled():
+            return occupancy.get_index().is_free(self.id, check_in, check_out)
+        
+        # проверка пересечения дат
+        overlapping_booking = self.bookings.filter(
+            Booking.overlaps_period(check_in, check_out)
         ).first()
         
-        return overlapping_bookings is None
+        return overlapping_booking is None
+    
+    @classmethod
+    def query_available_for_period(cls, check_in, check_out, room_type='', min_capacity=0):
+        """
+        Запрос свободных на период номеров одним SQL-запросом
+        
+        Занятые номера отсекаются коррелированным NOT EXISTS по бронированиям,
+        поэтому количество обращений к БД не зависит от числа номеров.
+        
+        Args:
+            check_in (date): Дата заезда
+            check_out (date): Дата выезда
+            room_type (str): Код типа номера (пусто - любой)
+            min_capacity (int): Минимальная вместимость (0 - любая)
+        
+        Returns:
+            Query: запрос номеров, отсортированных по id
+        """
+        from app.models.booking import Booking
+        
+        occupied = db.session.query(Booking.id).filter(
+            Booking.room_id == cls.id,
+            Booking.overlaps_period(check_in, check_out)
+        ).exists()
+        
+        query = cls.query.filter(cls.is_available == True, ~occupied)  # noqa: E712
+        if room_type:
+            query = query.filter(cls.room_type == room_type)
+        if min_capacity:
+            query = query.filter(cls.capacity >= int(min_capacity))
+        
+        return query.order_by(cls.id)
     
     def calculate_total_price(self, nights):
         """Рассчитать общую стоимость за период"""
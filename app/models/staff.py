@@ -1,9 +1,11 @@
 # Модели персонала
 from enum import Enum
-from datetime import datetime
+from datetime import datetime, timedelta
 from app import db
+from app.utils import lookup
 
 
+@lookup.register
 class StaffRole(Enum):
     """Роли персонала"""
     STAFF = ('staff', 'Персонал')
@@ -17,6 +19,10 @@ class StaffRole(Enum):
 
 class Staff(db.Model):
     __tablename__ = 'staff'
+    __table_args__ = (
+        # постраничный список сотрудников по алфавиту
+        db.Index('ix_staff_name_id', 'last_name', 'first_name', 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     
@@ -74,10 +80,7 @@ class Staff(db.Model):
         return False
     
     def get_role_display(self):
-        for staff_role in StaffRole:
-            if staff_role.code == self.role:
-                return staff_role.display_name
-        return self.role
+        return lookup.display_name(StaffRole, self.role)
     
     def deactivate(self, termination_date=None):
         self.is_active = False
@@ -125,60 +128,37 @@ class Manager(Staff):
         return True
     
     def generate_report(self, start_date, end_date):
-        from app.models.billing import Bill, Payment, BillStatus
-        from app.models.booking import Booking, BookingStatus
-        
-        # Счета за период
-        bills = Bill.query.filter(
-            Bill.created_at >= start_date,
-            Bill.created_at <= end_date
-        ).all()
-        
-        total_bills = len(bills)
-        total_revenue = sum(b.total for b in bills if b.status == BillStatus.PAID.code)
-        paid_bills = sum(1 for b in bills if b.status == BillStatus.PAID.code)
-        pending_bills = sum(1 for b in bills if b.status == BillStatus.OPEN.code)
+        """
+        Отчёт за период
         
-        # Статистика по платежам
-        payments = Payment.query.filter(
-            Payment.created_at >= start_date,
-            Payment.created_at <= end_date
-        ).all()
-        
-        total_payments = len(payments)
-        total_payment_amount = sum(p.amount for p in payments)
+        Дни периода включаются целиком. Показатели биллинга берутся из
+        дневных агрегатов, бронирования считаются GROUP BY на стороне БД.
+        """
+        from app.models.booking import Booking, BookingStatus
+        from app.utils import rollups
         
-        payment_methods = {}
-        for p in payments:
-            payment_methods[p.method] = payment_methods.get(p.method, 0) + p.amount
+        # Счета и платежи за период - из дневных агрегатов
+        billing = rollups.billing_summary(start_date, end_date)
         
-        bookings = Booking.query.filter(
+        # Бронирования за период: количество по статусам
+        bookings_by_status = dict(db.session.query(
+            Booking.status, db.func.count(Booking.id)
+        ).filter(
             Booking.created_at >= start_date,
-            Booking.created_at <= end_date
-        ).all()
+            Booking.created_at < end_date + timedelta(days=1)
+        ).group_by(Booking.status).all())
         
-        total_bookings = len(bookings)
-        confirmed_bookings = sum(1 for b in bookings 
-                                if b.status == BookingStatus.CONFIRMED.value)
-        checked_in = sum(1 for b in bookings 
-                        if b.status == BookingStatus.CHECKED_IN.value)
-        checked_out = sum(1 for b in bookings 
-                         if b.status == BookingStatus.CHECKED_OUT.value)
+        total_bookings = sum(bookings_by_status.values())
+        confirmed_bookings = bookings_by_status.get(BookingStatus.CONFIRMED.code, 0)
+        checked_in = bookings_by_status.get(BookingStatus.CHECKED_IN.code, 0)
+        checked_out = bookings_by_status.get(BookingStatus.CHECKED_OUT.code, 0)
         
         return {
             'period': {
                 'start': start_date.strftime('%Y-%m-%d'),
                 'end': end_date.strftime('%Y-%m-%d')
             },
-            'billing': {
-                'total_bills': total_bills,
-                'paid_bills': paid_bills,
-                'pending_bills': pending_bills,
-                'total_revenue': total_revenue,
-                'total_payments': total_payments,
-                'total_payment_amount': total_payment_amount,
-                'payment_methods': payment_methods
-            },
+            'billing': billing,
             'bookings': {
                 'total': total_bookings,
                 'confirmed': confirmed_bookings,
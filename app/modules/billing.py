@@ -4,32 +4,44 @@ from app import db
 from app.models.billing import Bill, Payment, BillStatus, PaymentMethod
 from app.models.booking import Booking
 from app.models.staff import Staff, Receptionist, Manager
+from app.utils.query_counter import query_budget
+from app.utils.db_routing import read_replica
+from app.utils.pagination import keyset_paginate
 from datetime import datetime
+from sqlalchemy.orm import joinedload
 import json
 
 bp = Blueprint('billing', __name__, url_prefix='/billing')
 
 
 @bp.route('/')
+@query_budget(2)
+@read_replica
 def index():
     """
     Главная страница биллинга
-    Отображает список всех счетов
+    Отображает список счетов постранично по ключу (created_at, id)
     """
     status_filter = request.args.get('status', '')
     
-    # Базовый запрос
-    query = Bill.query
+    # Базовый запрос; шаблон выводит бронь и автора счёта в каждой строке
+    query = Bill.query.options(joinedload(Bill.booking), joinedload(Bill.creator))
     
     # Фильтр по статусу
     if status_filter:
         query = query.filter_by(status=status_filter)
     
-    # Получаем счета
-    bills = query.order_by(Bill.created_at.desc()).all()
+    # Страница счетов, новые сверху
+    page = keyset_paginate(query, (Bill.created_at, Bill.id),
+                           cursor=request.args.get('cursor'),
+                           per_page=request.args.get('per_page', type=int),
+                           descending=True)
     
     return render_template('billing/index.html',
-                         bills=bills,
+                         bills=page.items,
+                         next_cursor=page.next_cursor,
+                         is_first_page=not request.args.get('cursor'),
+                         per_page=request.args.get('per_page', type=int),
                          bill_statuses=BillStatus,
                          current_status=status_filter)
 
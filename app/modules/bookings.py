@@ -12,32 +12,47 @@ from flask import Blueprint, render_template, request, redirect, url_for, flash,
 from app import db
 from app.models.room import Room, RoomType
 from app.models.booking import Booking, BookingStatus
+from app.utils import occupancy, room_claims, booking_import
+from app.utils.occupancy_grid import OccupancyGrid
+from app.utils.query_counter import query_budget
+from app.utils.db_routing import read_replica
+from app.utils.pagination import keyset_paginate
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload
 from datetime import datetime, date, timedelta
-from sqlalchemy import and_, or_
 
 bp = Blueprint('bookings', __name__, url_prefix='/bookings')
 
 
 @bp.route('/')
+@query_budget(2)
+@read_replica
 def index():
     """
     Главная страница бронирований
-    Отображает список всех бронирований с фильтрацией по статусу
+    Отображает список бронирований с фильтрацией по статусу,
+    постранично по ключу (check_in, id)
     """
     status_filter = request.args.get('status', '')
     
-    # Базовый запрос
-    query = Booking.query
+    # Базовый запрос; номер брони выводится в каждой строке - грузим JOIN'ом
+    query = Booking.query.options(joinedload(Booking.room))
     
     # Фильтр по статусу
     if status_filter:
         query = query.filter_by(status=status_filter)
     
-    # Получаем бронирования, отсортированные по дате заезда
-    bookings = query.order_by(Booking.check_in.desc()).all()
+    # Страница бронирований, отсортированных по дате заезда
+    page = keyset_paginate(query, (Booking.check_in, Booking.id),
+                           cursor=request.args.get('cursor'),
+                           per_page=request.args.get('per_page', type=int),
+                           descending=True)
     
     return render_template('bookings/index.html',
-                         bookings=bookings,
+                         bookings=page.items,
+                         next_cursor=page.next_cursor,
+                         is_first_page=not request.args.get('cursor'),
+                         per_page=request.args.get('per_page', type=int),
                          booking_statuses=BookingStatus,
                          current_status=status_filter)
 
@@ -97,28 +112,24 @@ def find_available_rooms(check_in, check_out, room_type='', min_capacity=0):
     Вспомогательная функция для поиска доступных номеров
     
     Алгоритм:
-    1. Получаем все номера по фильтрам (тип, вместимость)
-    2. Для каждого номера проверяем наличие пересекающихся бронирований
-    3. Возвращаем только свободные номера
+    1. Фильтруем номера по типу и вместимости
+    2. Исключаем номера с пересекающимися активными бронированиями
+       (NOT EXISTS в том же запросе или индекс занятости в памяти)
+    3. Возвращаем свободные номера - один запрос к БД на любой размер фонда
     """
-    # Базовый запрос
-    query = Room.query.filter_by(is_available=True)
+    if occupancy.is_enabled():
+        index = occupancy.get_index()
+        query = Room.query.filter_by(is_available=True)
+        if room_type:
+            query = query.filter_by(room_type=room_type)
+        if min_capacity:
+            query = query.filter(Room.capacity >= int(min_capacity))
+        return [room for room in query.order_by(Room.id).all()
+                if index.is_free(room.id, check_in, check_out)]
     
-    # Применяем фильтры
-    if room_type:
-        query = query.filter_by(room_type=room_type)
-    if min_capacity:
-        query = query.filter(Room.capacity >= int(min_capacity))
-    
-    all_rooms = query.all()
-    
-    # Фильтруем номера, проверяя доступность на период
-    available_rooms = []
-    for room in all_rooms:
-        if room.is_available_for_period(check_in, check_out):
-            available_rooms.append(room)
-    
-    return available_rooms
+    return Room.query_available_for_period(
+        check_in, check_out, room_type, min_capacity
+    ).all()
 
 
 @bp.route('/create', methods=['GET', 'POST'])
@@ -194,6 +205,39 @@ def create():
                          check_out=check_out)
 
 
+@bp.route('/import', methods=['POST'])
+def import_bookings():
+    """
+    Массовый импорт бронирований (групповые заезды, выгрузки OTA)
+    
+    Файл CSV или JSONL передаётся полем формы file или телом запроса.
+    Формат - параметр format или расширение файла.
+    Параметры: chunk_size - строк в транзакции, dry_run=1 - только проверка.
+    Ответ - JSON с id созданных броней и ошибками по строкам.
+    """
+    upload = request.files.get('file')
+    if upload:
+        text = upload.read().decode('utf-8-sig')
+        fmt = request.values.get('format') or booking_import.detect_format(upload.filename)
+    else:
+        text = request.get_data(as_text=True)
+        fmt = request.values.get('format') or \
+            ('jsonl' if 'json' in (request.mimetype or '') else 'csv')
+    
+    try:
+        rows = booking_import.parse_rows(text, fmt)
+        chunk_size = int(request.values.get('chunk_size', booking_import.DEFAULT_CHUNK_SIZE))
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    if not rows:
+        return jsonify({'success': False, 'message': 'Файл не содержит строк'}), 400
+    
+    report = booking_import.import_bookings(
+        rows, chunk_size=chunk_size, dry_run=request.values.get('dry_run') == '1'
+    )
+    return jsonify({'success': not report.errors, **report.to_dict()})
+
+
 @bp.route('/<int:booking_id>')
 def detail(booking_id):
     """
@@ -221,6 +265,13 @@ def confirm(booking_id):
             return jsonify({'success': True, 'status': booking.status})
         else:
             return jsonify({'success': False, 'message': 'Невозможно подтвердить'}), 400
+    except IntegrityError as e:
+        db.session.rollback()
+        if not room_claims.is_conflict(e):
+            return jsonify({'success': False, 'message': str(e)}), 500
+        # Номер на эти даты успел занять другой администратор
+        return jsonify({'success': False,
+                        'message': 'Номер уже занят на выбранные даты'}), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -290,82 +341,68 @@ def cancel(booking_id):
 
 
 @bp.route('/calendar')
+@read_replica
 def calendar():
     """
     Календарь загруженности отеля
-    Визуализирует занятость номеров на ближайший месяц
+    Визуализирует занятость номеров за месяц или несколько месяцев (до года)
     """
     # Получаем параметры или используем текущую дату
     year = request.args.get('year', date.today().year, type=int)
     month = request.args.get('month', date.today().month, type=int)
+    months = min(max(request.args.get('months', 1, type=int), 1), 12)
     
-    # Первый и последний день месяца
+    # Первый и последний день периода
     first_day = date(year, month, 1)
-    if month == 12:
-        last_day = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        last_day = date(year, month + 1, 1) - timedelta(days=1)
+    end_year, end_month = _shift_month(year, month, months)
+    last_day = date(end_year, end_month, 1) - timedelta(days=1)
     
     # Получаем все номера
     rooms = Room.query.order_by(Room.floor, Room.number).all()
     
     # Получаем все активные бронирования за период
-    bookings = Booking.query.filter(
-        and_(
+    if occupancy.is_enabled():
+        index = occupancy.get_index()
+        period_end = last_day + timedelta(days=1)
+        bookings = [interval for room in rooms
+                    for interval in index.intervals(room.id, first_day, period_end)]
+    else:
+        bookings = Booking.query.filter(
             Booking.status.in_([
                 BookingStatus.CONFIRMED.code,
                 BookingStatus.CHECKED_IN.code
             ]),
-            or_(
-                and_(Booking.check_in <= last_day, Booking.check_out > first_day)
-            )
-        )
-    ).all()
-    
-    # Создаем матрицу занятости
-    # {room_id: {date: booking}}
-    occupancy_matrix = {}
-    for room in rooms:
-        occupancy_matrix[room.id] = {}
-        
-        # Находим бронирования для этого номера
-        room_bookings = [b for b in bookings if b.room_id == room.id]
-        
-        # Заполняем даты
-        current_date = first_day
-        while current_date <= last_day:
-            for booking in room_bookings:
-                if booking.check_in <= current_date < booking.check_out:
-                    occupancy_matrix[room.id][current_date] = booking
-                    break
-            current_date += timedelta(days=1)
+            Booking.check_in <= last_day,
+            Booking.check_out > first_day
+        ).all()
     
-    # Создаем список дней месяца
-    days = []
-    current_date = first_day
-    while current_date <= last_day:
-        days.append(current_date)
-        current_date += timedelta(days=1)
+    # Матрица занятости {room_id: строка с row.get(date) -> booking},
+    # заполняется одним проходом по бронированиям
+    grid = OccupancyGrid([room.id for room in rooms], first_day, last_day).fill(bookings)
     
-    # Навигация по месяцам
-    prev_month = month - 1 if month > 1 else 12
-    prev_year = year if month > 1 else year - 1
-    next_month = month + 1 if month < 12 else 1
-    next_year = year if month < 12 else year + 1
+    # Создаем список дней периода
+    days = [first_day + timedelta(days=offset) for offset in range(grid.days_count)]
     
-    # Подсчет статистики
-    total_days = len(rooms) * len(days)
-    occupied_days = sum(len(room_days) for room_days in occupancy_matrix.values())
-    occupancy_rate = (occupied_days / total_days * 100) if total_days > 0 else 0
+    # Навигация по периодам
+    prev_year, prev_month = _shift_month(year, month, -months)
+    next_year, next_month = _shift_month(year, month, months)
     
     return render_template('bookings/calendar.html',
                          rooms=rooms,
                          days=days,
-                         occupancy_matrix=occupancy_matrix,
+                         occupancy_matrix=grid.rows,
                          current_month=month,
                          current_year=year,
+                         months=months,
+                         last_day=last_day,
                          prev_month=prev_month,
                          prev_year=prev_year,
                          next_month=next_month,
                          next_year=next_year,
-                         occupancy_rate=occupancy_rate)
+                         occupancy_rate=grid.occupancy_rate())
+
+
+def _shift_month(year, month, delta):
+    """Сдвиг (год, месяц) на delta месяцев"""
+    index = year * 12 + (month - 1) + delta
+    return index // 12, index % 12 + 1
@@ -1,17 +1,34 @@
 # app/modules/guests.py
 # -*- coding: utf-8 -*-
 from flask import Blueprint, request, jsonify, abort
+from sqlalchemy import case, func
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import raiseload
 from app import db  # type: ignore
-from app.models.guests import Guest
+from app.models.guests import Guest, GuestVisit
+from app.models.service import ServiceOrder
+from app.utils import guest_search
+from app.utils.contacts import normalize_phone, normalize_email
+from app.utils.pagination import keyset_paginate
+from app.utils.query_counter import query_budget
 
 bp = Blueprint("guests", __name__, url_prefix="/guests")
 
+# Список и поиск отдают только поля гостя (to_dict) - связи не загружаются,
+# случайное обращение к ним падает, а не выполняет запрос на каждого гостя
+LIST_OPTIONS = (raiseload("*"),)
+
 @bp.get("/")
+@query_budget(3)
 def list_guests():
     # Список гостей с фильтрами (поиск по имени/телефону/почте)
     q = request.args.get("q", "", type=str).strip()
-    query = Guest.query
+    if q and guest_search.is_enabled():
+        # полнотекстовый индекс: префиксы слов, цифры телефона, сортировка по релевантности
+        items = guest_search.search(q, limit=200, options=LIST_OPTIONS)
+        return jsonify([g.to_dict() for g in items])
+
+    query = Guest.query.options(*LIST_OPTIONS)
     if q:
         like = f"%{q}%"
         query = query.filter(
@@ -26,22 +43,93 @@ def list_guests():
     items = query.order_by(Guest.created_at.desc()).limit(200).all()
     return jsonify([g.to_dict() for g in items])
 
+@bp.get("/lookup")
+def lookup_guests():
+    # Точный поиск по телефону/почте в любом формате (+7 999 123-45-67, 89991234567, Ivan@Mail.ru)
+    # идёт по индексированным нормализованным колонкам, без ILIKE
+    phone = normalize_phone(request.args.get("phone", "", type=str))
+    email = normalize_email(request.args.get("email", "", type=str))
+    if not phone and not email:
+        abort(400, "Укажите phone или email")
+
+    conditions = []
+    if phone:
+        conditions.append(Guest.phone_normalized == phone)
+    if email:
+        conditions.append(Guest.email_normalized == email)
+    items = Guest.query.options(*LIST_OPTIONS).filter(db.or_(*conditions)).order_by(Guest.id).all()
+    return jsonify([g.to_dict() for g in items])
+
+def _visits_query(guest_id: int):
+    # Визиты гостя с итогами заказов услуг: агрегаты считаются одним GROUP BY
+    # по заказам этого гостя и присоединяются к визитам в том же запросе
+    amount = ServiceOrder.quantity * ServiceOrder.unit_price
+    orders = (
+        db.select(
+            ServiceOrder.visit_id,
+            func.count(ServiceOrder.id).label("orders_count"),
+            func.sum(case((ServiceOrder.status == "completed", amount), else_=0)).label("completed_amount"),
+            func.sum(case((ServiceOrder.status == "pending", amount), else_=0)).label("pending_amount"),
+        )
+        .join(GuestVisit, GuestVisit.id == ServiceOrder.visit_id)
+        .where(GuestVisit.guest_id == guest_id, ServiceOrder.status != "canceled")
+        .group_by(ServiceOrder.visit_id)
+        .subquery()
+    )
+    return (
+        db.session.query(
+            GuestVisit.id,
+            GuestVisit.booking_id,
+            GuestVisit.room_id,
+            GuestVisit.checkin_at,
+            GuestVisit.checkout_at,
+            GuestVisit.base_amount,
+            GuestVisit.services_amount,
+            GuestVisit.total_amount,
+            func.coalesce(orders.c.orders_count, 0).label("orders_count"),
+            func.coalesce(orders.c.completed_amount, 0).label("completed_amount"),
+            func.coalesce(orders.c.pending_amount, 0).label("pending_amount"),
+        )
+        .outerjoin(orders, orders.c.visit_id == GuestVisit.id)
+        .filter(GuestVisit.guest_id == guest_id)
+    )
+
+def _visit_to_dict(row) -> dict:
+    return {
+        "visit_id": row.id,
+        "booking_id": row.booking_id,
+        "room_id": row.room_id,
+        "checkin_at": row.checkin_at.isoformat() if row.checkin_at else None,
+        "checkout_at": row.checkout_at.isoformat() if row.checkout_at else None,
+        "base_amount": float(row.base_amount or 0),
+        "services_amount": float(row.services_amount or 0),
+        "total_amount": float(row.total_amount or 0),
+        # текущие заказы услуг (services_amount фиксируется только при выселении)
+        "service_orders": {
+            "count": row.orders_count,
+            "completed_amount": float(row.completed_amount or 0),
+            "pending_amount": float(row.pending_amount or 0),
+        },
+    }
+
 @bp.get("/<int:guest_id>")
+@query_budget(2)
 def get_guest(guest_id: int):
-    # Карточка гостя с историей визитов
-    guest = Guest.query.get_or_404(guest_id)
-    visits = [{
-        "visit_id": v.id,
-        "booking_id": v.booking_id,
-        "room_id": v.room_id,
-        "checkin_at": v.checkin_at.isoformat() if v.checkin_at else None,
-        "checkout_at": v.checkout_at.isoformat() if v.checkout_at else None,
-        "base_amount": float(v.base_amount or 0),
-        "services_amount": float(v.services_amount or 0),
-        "total_amount": float(v.total_amount or 0),
-    } for v in sorted(guest.visits, key=lambda x: x.checkin_at or x.created_at)]
+    # Карточка гостя с историей визитов в порядке заселения.
+    # ?visits_per_page=N (и visits_cursor из ответа) - история постранично
+    guest = Guest.query.options(raiseload("*")).get_or_404(guest_id)
     data = guest.to_dict()
-    data["visits"] = visits
+
+    query = _visits_query(guest_id)
+    key = (GuestVisit.checkin_at, GuestVisit.id)
+    per_page = request.args.get("visits_per_page", type=int)
+    cursor = request.args.get("visits_cursor")
+    if per_page or cursor:
+        page = keyset_paginate(query, key, cursor=cursor, per_page=per_page)
+        data["visits"] = [_visit_to_dict(row) for row in page.items]
+        data["visits_next_cursor"] = page.next_cursor
+    else:
+        data["visits"] = [_visit_to_dict(row) for row in query.order_by(*key)]
     return jsonify(data)
 
 @bp.post("/")
@@ -0,0 +1,17 @@
+# Главная страница (endpoint 'index' без blueprint - на него ссылается base.html)
+from flask import render_template
+
+from app.utils import dashboard
+
+
+def index():
+    """Главная страница системы"""
+    # Статистика для главной страницы (один агрегирующий запрос, кэш с TTL)
+    stats = dashboard.get_stats()
+    
+    return render_template('index.html',
+                         total_rooms=stats.total_rooms,
+                         available_rooms=stats.available_rooms,
+                         total_bookings=stats.total_bookings,
+                         active_bookings=stats.active_bookings,
+                         upcoming_checkins=stats.upcoming_checkins)
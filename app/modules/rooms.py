@@ -10,6 +10,7 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from app import db
 from app.models.room import Room, RoomType
+from app.utils import room_catalog
 from datetime import datetime
 
 bp = Blueprint('rooms', __name__, url_prefix='/rooms')
@@ -20,29 +21,17 @@ def index():
     """
     Главная страница модуля номеров
     Отображает список всех номеров с возможностью фильтрации
+    Список и этажи берутся из кэша каталога (app/utils/room_catalog.py)
     """
     # Получаем параметры фильтрации
     room_type = request.args.get('type', '')
     floor = request.args.get('floor', '')
     available_only = request.args.get('available', '')
     
-    # Базовый запрос
-    query = Room.query
-    
-    # Применяем фильтры
-    if room_type:
-        query = query.filter_by(room_type=room_type)
-    if floor:
-        query = query.filter_by(floor=int(floor))
-    if available_only:
-        query = query.filter_by(is_available=True)
-    
-    # Получаем отсортированный список
-    rooms = query.order_by(Room.floor, Room.number).all()
-    
-    # Получаем уникальные этажи для фильтра
-    floors = db.session.query(Room.floor).distinct().order_by(Room.floor).all()
-    floors = [f[0] for f in floors]
+    # Отсортированный список по фильтру и уникальные этажи для фильтра
+    rooms = room_catalog.list_rooms(room_type, int(floor) if floor else None,
+                                    bool(available_only))
+    floors = room_catalog.floors()
     
     return render_template('rooms/index.html',
                          rooms=rooms,
@@ -1,15 +1,23 @@
-from flask import Blueprint, request, jsonify, abort
+from flask import Blueprint, Response, request, jsonify, abort
+from sqlalchemy import insert
 from app import db  # type: ignore
 from app.models.service import Service, ServiceOrder
 from app.models.guests import GuestVisit
+from app.utils import service_catalog, visit_totals
+from app.utils.query_counter import query_budget
 
 bp = Blueprint("services", __name__, url_prefix="/services")
 
 @bp.get("/")
 def list_services():
-    # Прайс услуг (активные)
-    items = Service.query.filter_by(is_active=True).order_by(Service.title.asc()).all()
-    return jsonify([s.to_dict() for s in items])
+    # Прайс услуг (активные): готовый JSON из кэша, при совпадении
+    # If-None-Match - 304 без тела
+    snapshot = service_catalog.snapshot()
+    response = Response(snapshot.body, mimetype="application/json")
+    response.set_etag(snapshot.etag)
+    # клиент может хранить ответ, но перед использованием сверяет ETag
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @bp.post("/")
 def create_service():
@@ -63,18 +71,111 @@ def create_service_order():
         "subtotal": order.subtotal(),
     }), 201
 
+# Максимум заказов в одном пакетном запросе
+MAX_BATCH_ORDERS = 500
+
+@bp.post("/orders/batch")
+@query_budget(4)
+def create_service_orders_batch():
+    """
+    Пакетное создание заказов (минибар, room service по итогам смены)
+
+    Тело: {"orders": [{"visit_id", "service_id", "quantity", "note"}, ...],
+    "complete": true} - complete сразу отмечает заказы выполненными.
+    Визиты и услуги читаются одним IN-запросом каждые, заказы
+    вставляются одним INSERT, итоги визитов обновляются одной командой
+    UPDATE (по строке параметров на визит). Ошибка в любой позиции - 400 со списком
+    ошибок, ничего не создаётся.
+    """
+    data = request.get_json(force=True, silent=True) or {}
+    entries = data.get("orders")
+    if not isinstance(entries, list) or not entries:
+        abort(400, "orders - непустой список заказов")
+    if len(entries) > MAX_BATCH_ORDERS:
+        abort(400, f"Не больше {MAX_BATCH_ORDERS} заказов за запрос")
+
+    parsed, errors = [], []
+    for index, entry in enumerate(entries):
+        try:
+            visit_id = int(entry["visit_id"])
+            service_id = int(entry["service_id"])
+            quantity = int(entry.get("quantity") or 1)
+        except (KeyError, TypeError, ValueError, AttributeError):
+            errors.append({"index": index, "error": "Нужны числовые visit_id и service_id"})
+            continue
+        try:
+            note = (entry.get("note") or "").strip() or None
+        except AttributeError:
+            errors.append({"index": index, "error": "note должен быть строкой"})
+            continue
+        parsed.append((index, visit_id, service_id, max(1, quantity), note))
+
+    visit_ids = {p[1] for p in parsed}
+    service_ids = {p[2] for p in parsed}
+    known_visits = set(db.session.scalars(
+        db.select(GuestVisit.id).where(GuestVisit.id.in_(visit_ids))
+    )) if visit_ids else set()
+    prices = dict(db.session.execute(
+        db.select(Service.id, Service.base_price).where(Service.id.in_(service_ids))
+    ).all()) if service_ids else {}
+
+    for index, visit_id, service_id, _, _ in parsed:
+        if visit_id not in known_visits:
+            errors.append({"index": index, "error": f"Визит {visit_id} не найден"})
+        elif service_id not in prices:
+            errors.append({"index": index, "error": f"Услуга {service_id} не найдена"})
+    if errors:
+        return jsonify({"ok": False, "errors": sorted(errors, key=lambda e: e["index"])}), 400
+
+    status = "completed" if data.get("complete") else "pending"
+    rows = [{
+        "visit_id": visit_id,
+        "service_id": service_id,
+        "quantity": quantity,
+        "unit_price": prices[service_id],  # фиксируем цену на момент заказа
+        "status": status,
+        "note": note,
+    } for _, visit_id, service_id, quantity, note in parsed]
+    # один INSERT ... RETURNING на все заказы (sort_by_parameter_order в
+    # SQLite разбил бы его на команду на строку, поэтому ответ - по id).
+    # INSERT идёт в обход flush, и итоги визитов обновляются явно -
+    # одной строкой UPDATE на визит
+    created = db.session.execute(
+        insert(ServiceOrder).returning(
+            ServiceOrder.id, ServiceOrder.visit_id, ServiceOrder.service_id,
+            ServiceOrder.quantity, ServiceOrder.unit_price, ServiceOrder.status
+        ),
+        rows
+    ).all()
+    visit_totals.record_orders(db.session.connection(), [
+        (row["visit_id"], row["status"], row["quantity"], row["unit_price"]) for row in rows
+    ])
+    db.session.commit()
+
+    result = [{
+        "id": order.id,
+        "visit_id": order.visit_id,
+        "service_id": order.service_id,
+        "quantity": order.quantity,
+        "unit_price": float(order.unit_price or 0),
+        "status": order.status,
+        "subtotal": round(order.quantity * float(order.unit_price or 0), 2),
+    } for order in sorted(created, key=lambda order: order.id)]
+
+    return jsonify({"ok": True, "created": len(result), "orders": result}), 201
+
 @bp.post("/orders/<int:order_id>/complete")
 def complete_service_order(order_id: int):
     # Закрыть заказ (выполнено)
     order = ServiceOrder.query.get_or_404(order_id)
+    if order.status == "canceled":
+        abort(400, "Нельзя выполнить отменённый заказ")
+    # Итоги визита увеличиваются на подытог заказа в той же транзакции
     order.status = "completed"
+    subtotal = order.subtotal()
     db.session.commit()
 
-    # Пересчитать итоги визита после выполнения услуги
-    order.visit.recalc_totals()
-    db.session.commit()
-
-    return jsonify({"ok": True, "subtotal": order.subtotal()})
+    return jsonify({"ok": True, "subtotal": subtotal})
 
 @bp.post("/orders/<int:order_id>/cancel")
 def cancel_service_order(order_id: int):
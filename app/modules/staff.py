@@ -2,16 +2,21 @@
 from flask import Blueprint, render_template, request, redirect, url_for, flash, jsonify
 from app import db
 from app.models.staff import Staff, Manager, Receptionist, StaffRole
+from app.utils.query_counter import query_budget
+from app.utils.db_routing import read_replica
+from app.utils.pagination import keyset_paginate
 from datetime import datetime, date
 
 bp = Blueprint('staff', __name__, url_prefix='/staff')
 
 
 @bp.route('/')
+@query_budget(2)
 def index():
     """
     Главная страница персонала
-    Отображает список всех сотрудников с фильтрацией
+    Отображает список сотрудников с фильтрацией,
+    постранично по ключу (last_name, first_name, id)
     """
     role_filter = request.args.get('role', '')
     active_only = request.args.get('active', '')
@@ -25,11 +30,16 @@ def index():
     if active_only:
         query = query.filter_by(is_active=True)
     
-    # Получаем сотрудников
-    staff_list = query.order_by(Staff.last_name, Staff.first_name).all()
+    # Страница сотрудников по алфавиту
+    page = keyset_paginate(query, (Staff.last_name, Staff.first_name, Staff.id),
+                           cursor=request.args.get('cursor'),
+                           per_page=request.args.get('per_page', type=int))
     
     return render_template('staff/index.html',
-                         staff_list=staff_list,
+                         staff_list=page.items,
+                         next_cursor=page.next_cursor,
+                         is_first_page=not request.args.get('cursor'),
+                         per_page=request.args.get('per_page', type=int),
                          staff_roles=StaffRole,
                          current_role=role_filter,
                          active_only=active_only)
@@ -201,6 +211,7 @@ def activate(staff_id):
 
 
 @bp.route('/report', methods=['GET', 'POST'])
+@read_replica
 def report():
     """
     Генерация отчётов (доступно только менеджерам)
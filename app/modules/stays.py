@@ -8,7 +8,7 @@ from app.models.booking import Booking
 bp = Blueprint("stays", __name__, url_prefix="/stays")
 
 # эндпоинт заселения
-@stays_bp.post("/checkin/<int:booking_id>")
+@bp.post("/checkin/<int:booking_id>")
 def checkin(booking_id: int):
     """
     Заселение гостя по брони:
@@ -39,6 +39,7 @@ def checkin(booking_id: int):
         room_id=booking.room_id,
         checkin_at=datetime.now(timezone.utc),
         base_amount=base_amount,
+        total_amount=base_amount,  # итог = base_amount + services_amount
     )
     db.session.add(visit)
 
@@ -58,7 +59,7 @@ def checkout(booking_id: int):
     """
     Выселение гостя:
     - проверяем статус
-    - завершаем визит, пересчитываем суммы
+    - завершаем визит (суммы уже актуальны)
     - переводим бронь в checked_out
     """
     booking = Booking.query.get_or_404(booking_id)
@@ -72,8 +73,7 @@ def checkout(booking_id: int):
     if visit.checkout_at:
         abort(400, "Визит уже закрыт")
 
-    # Пересчёт итогов (услуги уже должны быть в статусе completed)
-    visit.recalc_totals()
+    # Итоги по услугам уже актуальны: они меняются вместе с заказами
     visit.checkout_at = datetime.now(timezone.utc)
 
     booking.status = "checked_out"
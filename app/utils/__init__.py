@@ -0,0 +1,3 @@
+"""
+Вспомогательные компоненты приложения (индексы, кэши)
+"""
@@ -0,0 +1,301 @@
+"""
+Массовый импорт бронирований (групповые заезды, выгрузки OTA)
+
+Booking(...) на каждую строку читает номер из БД для расчёта цены, а
+каждая бронь коммитится отдельно - 2 000 строк загружались минутами.
+Импорт работает с пакетом целиком:
+
+- номера загружаются одним запросом в словарь (id и номер комнаты);
+- активные брони затронутых номеров за период пакета загружаются одним
+  запросом в снимок занятости (RoomIntervals), с которым сверяется каждая
+  строка, а принятые строки сразу добавляются в снимок - строки файла
+  тоже не могут пересекаться между собой;
+- строки пишутся многострочными INSERT пачками по chunk_size, каждая
+  пачка - отдельная транзакция.
+
+Вставка идёт в обход событий сессии, поэтому занятые ночи, дневные
+агрегаты, индекс занятости и кэш главной страницы обновляются явно.
+Ошибки возвращаются построчно, ошибочные строки не мешают остальным.
+
+Формат строки (CSV с заголовком или JSON Lines):
+    room_number | room_id, guest_name, guest_phone, guest_email,
+    check_in, check_out (YYYY-MM-DD), status (pending | confirmed),
+    special_requests, notes
+"""
+import csv
+import io
+import json
+from datetime import date
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+
+from app import db
+from app.models.booking import Booking, BookingStatus, RoomNightClaim, ACTIVE_STATUSES, utcnow
+from app.models.room import Room
+from app.utils import occupancy, dashboard, rollups, room_claims
+from app.utils.occupancy import Interval, RoomIntervals
+
+DEFAULT_CHUNK_SIZE = 500
+FORMATS = ('csv', 'jsonl')
+IMPORT_STATUSES = (BookingStatus.PENDING.code, BookingStatus.CONFIRMED.code)
+
+
+class ImportReport:
+    """Итог импорта: созданные брони и ошибки по строкам"""
+
+    def __init__(self):
+        self.total = 0
+        self.valid = 0
+        self.booking_ids = []
+        self.errors = []
+
+    @property
+    def imported(self):
+        return len(self.booking_ids)
+
+    def error(self, line, message):
+        self.errors.append({'line': line, 'error': message})
+
+    def to_dict(self):
+        return {
+            'total': self.total,
+            'valid': self.valid,
+            'imported': self.imported,
+            'failed': len(self.errors),
+            'booking_ids': self.booking_ids,
+            'errors': sorted(self.errors, key=lambda e: e['line'])
+        }
+
+
+def detect_format(filename, default='csv'):
+    """Формат по расширению файла"""
+    if filename and filename.lower().endswith(('.jsonl', '.ndjson')):
+        return 'jsonl'
+    if filename and filename.lower().endswith('.csv'):
+        return 'csv'
+    return default
+
+
+def parse_rows(text, fmt):
+    """
+    Разбор файла импорта
+
+    Returns:
+        list: пары (номер строки файла, dict или текст ошибки разбора)
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f'Неизвестный формат: {fmt}')
+
+    rows = []
+    if fmt == 'csv':
+        reader = csv.DictReader(io.StringIO(text))
+        for record in reader:
+            rows.append((reader.line_num, record))
+        return rows
+
+    for line_no, line in enumerate(text.splitlines(), start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            rows.append((line_no, 'Некорректный JSON'))
+            continue
+        rows.append((line_no, record if isinstance(record, dict) else 'Ожидался JSON-объект'))
+    return rows
+
+
+def _field(record, name):
+    value = record.get(name)
+    if value is None:
+        return ''
+    return str(value).strip()
+
+
+def _load_rooms():
+    """Все номера: id -> строка и номер комнаты -> строка"""
+    rows = db.session.execute(
+        select(Room.id, Room.number, Room.room_type, Room.price_per_night, Room.is_available)
+    ).all()
+    return {row.id: row for row in rows}, {row.number: row for row in rows}
+
+
+def _resolve_room(record, rooms_by_id, rooms_by_number):
+    number = _field(record, 'room_number')
+    if number:
+        room = rooms_by_number.get(number)
+        if room is None:
+            raise ValueError(f'Номер {number} не найден')
+        return room
+
+    room_id = _field(record, 'room_id')
+    if not room_id:
+        raise ValueError('Не указан номер (room_number или room_id)')
+    try:
+        room = rooms_by_id.get(int(room_id))
+    except ValueError:
+        raise ValueError(f'Некорректный room_id: {room_id}') from None
+    if room is None:
+        raise ValueError(f'Номер с id={room_id} не найден')
+    return room
+
+
+def _parse_date(record, name):
+    value = _field(record, name)
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f'Некорректная дата {name}: {value or "пусто"}') from None
+
+
+def _build_mapping(record, rooms_by_id, rooms_by_number):
+    """Проверка строки и словарь для INSERT (без проверки занятости)"""
+    room = _resolve_room(record, rooms_by_id, rooms_by_number)
+    if not room.is_available:
+        raise ValueError(f'Номер {room.number} недоступен для бронирования')
+
+    guest_name = _field(record, 'guest_name')
+    guest_phone = _field(record, 'guest_phone')
+    if not guest_name or not guest_phone:
+        raise ValueError('Не указаны имя или телефон гостя')
+
+    check_in = _parse_date(record, 'check_in')
+    check_out = _parse_date(record, 'check_out')
+    if check_out <= check_in:
+        raise ValueError('Дата выезда должна быть позже даты заезда')
+
+    status = _field(record, 'status') or BookingStatus.PENDING.code
+    if status not in IMPORT_STATUSES:
+        raise ValueError(f'Недопустимый статус: {status}')
+
+    now = utcnow()
+    return room, {
+        'room_id': room.id,
+        'guest_name': guest_name,
+        'guest_phone': guest_phone,
+        'guest_email': _field(record, 'guest_email'),
+        'check_in': check_in,
+        'check_out': check_out,
+        # та же формула, что в Booking._calculate_total_price
+        'total_price': room.price_per_night * (check_out - check_in).days,
+        'status': status,
+        'special_requests': _field(record, 'special_requests'),
+        'notes': _field(record, 'notes'),
+        'created_at': now,
+        'updated_at': now
+    }
+
+
+def _load_snapshot(room_ids, start, end):
+    """Активные брони номеров room_ids, пересекающие [start, end)"""
+    snapshot = {}
+    if not room_ids:
+        return snapshot
+    rows = db.session.execute(
+        select(Booking.id, Booking.room_id, Booking.check_in,
+               Booking.check_out, Booking.guest_name)
+        .where(Booking.room_id.in_(room_ids), Booking.overlaps_period(start, end))
+    )
+    for row in rows:
+        snapshot.setdefault(row.room_id, RoomIntervals()).add(Interval(*row))
+    return snapshot
+
+
+def _insert_chunk(chunk):
+    """Запись пачки в одной транзакции. Возвращает id броней в порядке строк"""
+    mappings = [mapping for _, _, mapping in chunk]
+    ids = db.session.execute(
+        insert(Booking).returning(Booking.id, sort_by_parameter_order=True),
+        mappings
+    ).scalars().all()
+
+    conn = db.session.connection()
+    active = [(booking_id, mapping) for booking_id, mapping in zip(ids, mappings)
+              if mapping['status'] in ACTIVE_STATUSES]
+    claims = []
+    for booking_id, mapping in active:
+        claims.extend(room_claims.claim_rows(booking_id, mapping['room_id'],
+                                             mapping['check_in'], mapping['check_out']))
+    if claims:
+        conn.execute(RoomNightClaim.__table__.insert(), claims)
+
+    rollups.record_bookings(conn, [
+        (room.room_type, mapping['status'], mapping['check_in'], mapping['check_out'])
+        for _, room, mapping in chunk
+    ])
+    db.session.commit()
+
+    return ids, [
+        Interval(booking_id, mapping['room_id'], mapping['check_in'],
+                 mapping['check_out'], mapping['guest_name'])
+        for booking_id, mapping in active
+    ]
+
+
+def import_bookings(rows, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Импорт бронирований
+
+    Args:
+        rows: пары (номер строки, dict или текст ошибки) - см. parse_rows
+        chunk_size (int): строк в одной транзакции
+        dry_run (bool): только проверить, ничего не записывать
+
+    Returns:
+        ImportReport
+    """
+    report = ImportReport()
+    report.total = len(rows)
+    rooms_by_id, rooms_by_number = _load_rooms()
+
+    checked = []
+    for line, record in rows:
+        if isinstance(record, str):
+            report.error(line, record)
+            continue
+        try:
+            room, mapping = _build_mapping(record, rooms_by_id, rooms_by_number)
+        except ValueError as e:
+            report.error(line, str(e))
+            continue
+        checked.append((line, room, mapping))
+
+    snapshot = _load_snapshot(
+        {room.id for _, room, _ in checked},
+        min(mapping['check_in'] for _, _, mapping in checked),
+        max(mapping['check_out'] for _, _, mapping in checked)
+    ) if checked else {}
+    accepted = []
+    for line, room, mapping in checked:
+        intervals = snapshot.setdefault(room.id, RoomIntervals())
+        if intervals.overlaps(mapping['check_in'], mapping['check_out']):
+            report.error(line, f'Номер {room.number} занят на выбранные даты')
+            continue
+        intervals.add(Interval(None, room.id, mapping['check_in'],
+                               mapping['check_out'], mapping['guest_name']))
+        accepted.append((line, room, mapping))
+
+    report.valid = len(accepted)
+    if dry_run:
+        return report
+
+    chunk_size = max(int(chunk_size), 1)
+    for start in range(0, len(accepted), chunk_size):
+        chunk = accepted[start:start + chunk_size]
+        try:
+            ids, intervals = _insert_chunk(chunk)
+        except IntegrityError as e:
+            db.session.rollback()
+            if not room_claims.is_conflict(e):
+                raise
+            # номер заняли параллельно после снятия снимка
+            for line, _, _ in chunk:
+                report.error(line, 'Пачка отменена: номер занят параллельным бронированием')
+            continue
+        report.booking_ids.extend(ids)
+        occupancy.add_committed(intervals)
+
+    if report.booking_ids:
+        dashboard.invalidate()
+    return report
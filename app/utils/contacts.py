@@ -0,0 +1,36 @@
+"""
+Нормализация контактов гостя
+
+Телефон приводится к цифрам формата E.164 без "+": "+7 999 123-45-67",
+"8 (999) 123-45-67" и "9991234567" дают "79991234567". Почта - к нижнему
+регистру без пробелов по краям. Нормализованные значения хранятся в
+индексированных колонках Guest.phone_normalized / email_normalized и
+используются для точного поиска и поиска дублей.
+"""
+import re
+
+# Код страны для номеров без кода (10 цифр) и российских номеров с 8
+DEFAULT_COUNTRY_CODE = '7'
+
+
+def phone_digits(phone):
+    """Цифры телефона"""
+    return re.sub(r'\D', '', phone or '')
+
+
+def normalize_phone(phone):
+    """Телефон в цифрах E.164 или None"""
+    digits = phone_digits(phone)
+    if not digits:
+        return None
+    if len(digits) == 11 and digits[0] == '8':
+        digits = DEFAULT_COUNTRY_CODE + digits[1:]
+    elif len(digits) == 10:
+        digits = DEFAULT_COUNTRY_CODE + digits
+    return digits
+
+
+def normalize_email(email):
+    """Почта в нижнем регистре или None"""
+    email = (email or '').strip().lower()
+    return email or None
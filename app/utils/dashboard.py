@@ -0,0 +1,137 @@
+"""
+Статистика главной страницы
+
+Все счётчики собираются одним агрегирующим запросом (условные COUNT/SUM
+по номерам и бронированиям), ближайшие заезды - вторым запросом с JOIN.
+Результат кэшируется на DASHBOARD_CACHE_TTL секунд и сбрасывается после
+commit, изменившего номера или бронирования. Одновременные обновления
+страницы ждут один расчёт, а не запускают его параллельно.
+"""
+import threading
+import time
+from collections import namedtuple
+from datetime import date, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select, case
+
+from app import db
+from app.models.booking import Booking, BookingStatus, ACTIVE_STATUSES
+from app.models.room import Room
+from app.utils import session_events
+
+EXTENSION_KEY = 'dashboard_stats'
+
+DashboardStats = namedtuple('DashboardStats', [
+    'total_rooms', 'available_rooms', 'total_bookings', 'active_bookings',
+    'upcoming_checkins'
+])
+
+UpcomingCheckin = namedtuple('UpcomingCheckin', [
+    'id', 'room_id', 'room_number', 'guest_name', 'guest_phone',
+    'check_in', 'nights', 'total_price'
+])
+
+
+class DashboardStatsProvider:
+    """Кэш статистики с ограниченным временем жизни"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = None
+        self._day = None
+        self._expires_at = 0.0
+        # поколение данных: сброс во время расчёта не даст закэшировать устаревшее
+        self._generation = 0
+        self._stats_generation = -1
+        self.hits = 0
+        self.misses = 0
+
+    def invalidate(self):
+        self._generation += 1
+
+    def get(self, ttl):
+        today = date.today()
+        with self._lock:
+            if self._stats_generation == self._generation and self._day == today \
+                    and time.monotonic() < self._expires_at:
+                self.hits += 1
+                return self._stats
+
+            self.misses += 1
+            generation = self._generation
+            self._stats = self.compute(today)
+            self._stats_generation = generation
+            self._day = today
+            self._expires_at = time.monotonic() + ttl
+            return self._stats
+
+    @staticmethod
+    def compute(today):
+        """Расчёт статистики: агрегаты одним запросом + ближайшие заезды"""
+        # каждый счётчик - скалярный подзапрос: у внешнего SELECT нет FROM,
+        # а значит и декартова произведения таблиц
+        total_rooms = select(func.count(Room.id)).scalar_subquery()
+        available_rooms = select(
+            func.coalesce(func.sum(case((Room.is_available == True, 1), else_=0)), 0)  # noqa: E712
+        ).scalar_subquery()
+        total_bookings = select(func.count(Booking.id)).scalar_subquery()
+        active_bookings = select(
+            func.coalesce(func.sum(case(
+                (db.and_(Booking.status.in_(ACTIVE_STATUSES),
+                         Booking.check_out >= today), 1),
+                else_=0
+            )), 0)
+        ).scalar_subquery()
+
+        counters = db.session.execute(select(
+            total_rooms, available_rooms, total_bookings, active_bookings
+        )).one()
+
+        upcoming = db.session.execute(
+            select(Booking.id, Booking.room_id, Room.number, Booking.guest_name,
+                   Booking.guest_phone, Booking.check_in, Booking.check_out,
+                   Booking.total_price)
+            .join(Room, Room.id == Booking.room_id)
+            .where(Booking.status == BookingStatus.CONFIRMED.code,
+                   Booking.check_in >= today,
+                   Booking.check_in <= today + timedelta(days=7))
+            .order_by(Booking.check_in)
+            .limit(5)
+        ).all()
+
+        return DashboardStats(
+            total_rooms=counters[0],
+            available_rooms=counters[1],
+            total_bookings=counters[2],
+            active_bookings=counters[3],
+            upcoming_checkins=tuple(
+                UpcomingCheckin(row.id, row.room_id, row.number, row.guest_name,
+                                row.guest_phone, row.check_in,
+                                (row.check_out - row.check_in).days, row.total_price)
+                for row in upcoming
+            )
+        )
+
+
+def init_app(app):
+    """Регистрация кэша статистики в приложении"""
+    app.config.setdefault('DASHBOARD_CACHE_TTL', 10)
+    app.extensions[EXTENSION_KEY] = DashboardStatsProvider()
+
+
+def get_stats():
+    """Статистика для главной страницы (из кэша, если он ещё действителен)"""
+    provider = current_app.extensions[EXTENSION_KEY]
+    return provider.get(current_app.config['DASHBOARD_CACHE_TTL'])
+
+
+def invalidate():
+    """Сбросить кэш после изменений в обход ORM (массовый импорт)"""
+    provider = current_app.extensions.get(EXTENSION_KEY)
+    if provider is not None:
+        provider.invalidate()
+
+
+# Сброс кэша после изменений номеров и бронирований
+session_events.invalidate_on_commit((Room, Booking), invalidate)
@@ -0,0 +1,114 @@
+"""
+Чтение с реплики для отчётов и списков
+
+Отчёты и списки (отчёт менеджера, календарь, списки броней и счетов)
+только читают, но выполнялись на том же движке, что заселения и платежи.
+Если задан REPLICA_DATABASE_URL (bind 'replica'), представления,
+помеченные @read_replica, выполняют SELECT на реплике. Всё остальное -
+flush, INSERT / UPDATE / DELETE, текстовые запросы и представления без
+декоратора - идёт на основную базу.
+
+Чтение своих записей: после commit с изменениями время записи
+сохраняется в сессии пользователя (cookie), и в течение
+REPLICA_READ_YOUR_WRITES секунд его запросы читают с основной базы -
+администратор, только что создавший бронь, видит её в списке, даже если
+реплика отстаёт.
+
+Без REPLICA_DATABASE_URL декоратор ничего не меняет. Для разработки
+репликой может служить второй файл SQLite, который заполняет команда
+`flask sync-replica`.
+"""
+import time
+from functools import wraps
+
+from flask import current_app, g, has_request_context, session as user_session
+from flask_sqlalchemy.session import Session as BaseSession
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+REPLICA_BIND = 'replica'
+_READ_ONLY_KEY = 'db_read_replica'      # flask.g: запрос читает с реплики
+_LAST_WRITE_KEY = '_db_last_write'      # сессия пользователя: время последнего commit
+_WROTE_KEY = 'db_routing_wrote'         # session.info: транзакция что-то записала
+
+
+class RoutingSession(BaseSession):
+    """Сессия, отправляющая SELECT представлений @read_replica на реплику"""
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None and not self._flushing and getattr(clause, 'is_select', False) \
+                and has_request_context() and g.get(_READ_ONLY_KEY):
+            replica = self._db.engines.get(REPLICA_BIND)
+            if replica is not None:
+                return replica
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+
+def _wrote_recently():
+    last_write = user_session.get(_LAST_WRITE_KEY)
+    window = current_app.config.get('REPLICA_READ_YOUR_WRITES', 10)
+    return last_write is not None and time.time() - last_write < window
+
+
+def read_replica(view):
+    """Декоратор: SELECT представления выполняются на реплике"""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if REPLICA_BIND in current_app.config.get('SQLALCHEMY_BINDS', {}) \
+                and not _wrote_recently():
+            g.setdefault(_READ_ONLY_KEY, True)
+        return view(*args, **kwargs)
+    return wrapper
+
+
+# --- Отметка собственных записей пользователя ---
+
+@event.listens_for(Session, 'after_flush')
+def _mark_flush_write(session, flush_context):
+    if session.new or session.dirty or session.deleted:
+        session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_statement_write(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        orm_execute_state.session.info[_WROTE_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+def _remember_write(session):
+    if session.info.pop(_WROTE_KEY, False) and has_request_context():
+        user_session[_LAST_WRITE_KEY] = time.time()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_write_mark(session):
+    session.info.pop(_WROTE_KEY, None)
+
+
+# --- Реплика для разработки ---
+
+def sync_sqlite_replica():
+    """
+    Скопировать основную базу SQLite в файл реплики (backup API)
+
+    Returns:
+        str: URL реплики
+    """
+    from app import db
+
+    replica = db.engines.get(REPLICA_BIND)
+    if replica is None:
+        raise RuntimeError('REPLICA_DATABASE_URL не задан')
+    if db.engine.dialect.name != 'sqlite' or replica.dialect.name != 'sqlite':
+        raise RuntimeError('Копирование поддерживается только между файлами SQLite')
+
+    db.session.commit()
+    source = db.engine.raw_connection()
+    target = replica.raw_connection()
+    try:
+        source.driver_connection.backup(target.driver_connection)
+    finally:
+        target.close()
+        source.close()
+    return str(replica.url)
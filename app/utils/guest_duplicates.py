@@ -0,0 +1,108 @@
+"""
+Нормализованные контакты гостей: заполнение и поиск дублей
+
+Колонки phone_normalized / email_normalized добавляет в существующую
+таблицу guests миграция v0002 (она же вызывает backfill()); backfill()
+пересчитывает их пачками, например после изменения правил нормализации.
+find_duplicates() группирует гостей с общим нормализованным телефоном
+или почтой за один проход по таблице: каждый ключ запоминает первого
+владельца, следующие владельцы объединяются с ним (система
+непересекающихся множеств), поэтому попарных сравнений нет, а гости,
+связанные цепочкой (A и B - общий телефон, B и C - общая почта),
+попадают в одну группу.
+"""
+from collections import defaultdict
+
+from sqlalchemy import or_, select
+
+from app import db
+from app.models.guests import Guest
+from app.utils.contacts import normalize_phone, normalize_email
+
+def backfill(conn=None, batch_size=5000):
+    """
+    Заполнить нормализованные контакты всех гостей
+
+    Args:
+        conn: соединение миграции (транзакцией управляет она); без него -
+            сессия с commit после каждой пачки
+
+    Returns:
+        int: количество обновлённых строк
+    """
+    executor = conn if conn is not None else db.session
+    table = Guest.__table__
+    updated, last_id = 0, 0
+    while True:
+        rows = executor.execute(
+            select(table.c.id, table.c.phone, table.c.email,
+                   table.c.phone_normalized, table.c.email_normalized)
+            .where(table.c.id > last_id).order_by(table.c.id).limit(batch_size)
+        ).all()
+        if not rows:
+            break
+        last_id = rows[-1].id
+
+        changes = []
+        for row in rows:
+            phone, email = normalize_phone(row.phone), normalize_email(row.email)
+            if (phone, email) != (row.phone_normalized, row.email_normalized):
+                changes.append({'guest_id': row.id, 'new_phone': phone, 'new_email': email})
+        if changes:
+            executor.execute(
+                table.update().where(table.c.id == db.bindparam('guest_id')).values(
+                    phone_normalized=db.bindparam('new_phone'),
+                    email_normalized=db.bindparam('new_email'),
+                    # служебное заполнение - время изменения гостя не трогаем
+                    updated_at=table.c.updated_at
+                ),
+                changes
+            )
+            updated += len(changes)
+        if conn is None:
+            db.session.commit()
+    return updated
+
+
+def find_duplicates():
+    """
+    Группы возможных дублей
+
+    Returns:
+        list: списки id гостей (по возрастанию), группы по первому id
+    """
+    parent = {}
+
+    def find(guest_id):
+        root = guest_id
+        while parent[root] != root:
+            root = parent[root]
+        while parent[guest_id] != root:  # сжатие путей
+            parent[guest_id], guest_id = root, parent[guest_id]
+        return root
+
+    def union(a, b):
+        parent.setdefault(a, a)
+        parent.setdefault(b, b)
+        root_a, root_b = find(a), find(b)
+        if root_a != root_b:
+            parent[max(root_a, root_b)] = min(root_a, root_b)
+
+    owners = {}
+    rows = db.session.execute(
+        select(Guest.id, Guest.phone_normalized, Guest.email_normalized)
+        .where(or_(Guest.phone_normalized.isnot(None), Guest.email_normalized.isnot(None)))
+        .execution_options(yield_per=5000)
+    )
+    for guest_id, phone, email in rows:
+        for key in (('phone', phone), ('email', email)):
+            if key[1] is None:
+                continue
+            owner = owners.setdefault(key, guest_id)
+            if owner != guest_id:
+                union(owner, guest_id)
+
+    groups = defaultdict(list)
+    for guest_id in parent:
+        groups[find(guest_id)].append(guest_id)
+    return sorted(sorted(ids) for ids in groups.values())
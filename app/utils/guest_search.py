@@ -0,0 +1,204 @@
+"""
+Полнотекстовый поиск гостей (SQLite FTS5)
+
+Поиск /guests/?q= выполнял ILIKE '%q%' по пяти колонкам - индексом это
+не обслуживается, и каждое нажатие клавиши в поле поиска читало всю
+таблицу guests. Теперь гости дублируются в виртуальную таблицу
+guests_fts (rowid = guests.id):
+
+- name  - имя и фамилия (поиск по префиксу слов: "ива" -> Иванов);
+- phone - цифры телефона целиком и без кода страны 7/8, поэтому
+          "+7 999 123-45-67", "8999123" и "999 12" находят один номер;
+- email - адрес целиком одним токеном ("ivan@ex" -> ivan@example.com);
+- doc_number - по префиксу токенов.
+
+Результаты сортируются по bm25 (совпадение в имени весит больше).
+Для коротких префиксов (2-3 символа) FTS5 ведёт отдельный индекс
+префиксов, поэтому первые нажатия клавиш не перебирают все токены.
+Таблица обновляется при каждом flush, изменившем гостя (создание,
+редактирование, удаление), и пересобирается командой
+`flask rebuild-guest-index`. На других СУБД или без FTS5 поиск
+остаётся на ILIKE.
+"""
+import re
+
+from flask import current_app, has_app_context
+from sqlalchemy import DDL, event, inspect, text
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.guests import Guest
+from app.utils.contacts import phone_digits, normalize_phone
+
+EXTENSION_KEY = 'guest_search'
+TABLE = 'guests_fts'
+
+_INDEXED_FIELDS = ('first_name', 'last_name', 'phone', 'email', 'doc_number')
+# веса bm25 в порядке колонок: name, phone, email, doc_number
+_WEIGHTS = (10.0, 5.0, 2.0, 2.0)
+_PHONE_QUERY = re.compile(r'^[\d\s()+\-]+$')
+# символы @ . _ входят в токен, как в токенизаторе: email - одно слово
+_TOKEN = re.compile(r'[\w@.]+')
+
+_CREATE = DDL(
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+    "name, phone, email, doc_number, "
+    "tokenize = 'unicode61 remove_diacritics 2 tokenchars ''@._''', prefix = '2 3')"
+)
+_DROP = DDL(f'DROP TABLE IF EXISTS {TABLE}')
+
+event.listen(Guest.__table__, 'after_create', _CREATE.execute_if(dialect='sqlite'))
+event.listen(Guest.__table__, 'before_drop', _DROP.execute_if(dialect='sqlite'))
+
+
+def _fold(value):
+    # unicode61 не приводит ё к е
+    return (value or '').lower().replace('ё', 'е')
+
+
+def phone_variants(digits):
+    """Цифры телефона целиком и без кода страны (7 / 8)"""
+    variants = [digits] if digits else []
+    if len(digits) > 1 and digits[0] in '78':
+        variants.append(digits[1:])
+    return variants
+
+
+def _document(guest):
+    return {
+        'id': guest.id,
+        'name': _fold(f'{guest.first_name} {guest.last_name}'),
+        'phone': ' '.join(phone_variants(normalize_phone(guest.phone) or '')),
+        'email': _fold(guest.email),
+        'doc_number': _fold(guest.doc_number)
+    }
+
+
+def _quote(term):
+    return '"' + term.replace('"', '""') + '"'
+
+
+def build_match(q):
+    """
+    Выражение MATCH для строки поиска или None, если искать нечего
+
+    Каждое слово - префикс в любой колонке (все слова обязательны).
+    Строка из цифр и символов телефона дополнительно ищется по цифрам
+    в колонке phone.
+    """
+    q = _fold(q).strip()
+    terms = [term.strip('.') for term in _TOKEN.findall(q)]
+    terms = [term for term in terms if term]
+    if not terms:
+        return None
+    words = ' AND '.join(_quote(term) + '*' for term in terms)
+
+    digits = phone_digits(q)
+    if digits and _PHONE_QUERY.match(q):
+        phone = ' OR '.join(_quote(v) + '*' for v in phone_variants(digits))
+        return f'(phone : ({phone})) OR ({words})'
+    return words
+
+
+# --- Включение и синхронизация ---
+
+def _table_exists(conn):
+    return conn.dialect.name == 'sqlite' and inspect(conn).has_table(TABLE)
+
+
+def is_enabled(conn=None):
+    """Индекс доступен (SQLite с FTS5 и таблица создана); проверяется один раз"""
+    if not has_app_context():
+        return False
+    state = current_app.extensions.setdefault(EXTENSION_KEY, {})
+    if 'enabled' not in state:
+        state['enabled'] = _table_exists(conn or db.session.connection())
+    return state['enabled']
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_guest_index(session, flush_context):
+    changed, removed = [], []
+    for obj in session.new:
+        if isinstance(obj, Guest):
+            changed.append(obj)
+    for obj in session.dirty:
+        if isinstance(obj, Guest) and any(
+                inspect(obj).attrs[field].history.has_changes() for field in _INDEXED_FIELDS):
+            changed.append(obj)
+    for obj in session.deleted:
+        if isinstance(obj, Guest):
+            removed.append(obj.id)
+
+    if not (changed or removed):
+        return
+    conn = session.connection()
+    if not is_enabled(conn):
+        return
+    ids = [{'id': guest_id} for guest_id in removed + [g.id for g in changed]]
+    conn.execute(text(f'DELETE FROM {TABLE} WHERE rowid = :id'), ids)
+    if changed:
+        conn.execute(text(
+            f'INSERT INTO {TABLE} (rowid, name, phone, email, doc_number) '
+            'VALUES (:id, :name, :phone, :email, :doc_number)'
+        ), [_document(guest) for guest in changed])
+
+
+def rebuild(batch_size=5000):
+    """
+    Создать (если нет) и заново заполнить индекс по таблице guests
+
+    Returns:
+        int: количество проиндексированных гостей
+    """
+    conn = db.session.connection()
+    if conn.dialect.name != 'sqlite':
+        raise RuntimeError('Полнотекстовый индекс гостей поддерживается только в SQLite')
+    conn.execute(_CREATE)
+    conn.execute(text(f'DELETE FROM {TABLE}'))
+
+    insert = text(f'INSERT INTO {TABLE} (rowid, name, phone, email, doc_number) '
+                  'VALUES (:id, :name, :phone, :email, :doc_number)')
+    count, batch = 0, []
+    rows = db.session.execute(
+        db.select(Guest.id, Guest.first_name, Guest.last_name, Guest.phone,
+                  Guest.email, Guest.doc_number).execution_options(yield_per=batch_size)
+    )
+    for row in rows:
+        batch.append(_document(row))
+        if len(batch) >= batch_size:
+            conn.execute(insert, batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        conn.execute(insert, batch)
+        count += len(batch)
+    conn.execute(text(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')"))
+    db.session.commit()
+    current_app.extensions.setdefault(EXTENSION_KEY, {})['enabled'] = True
+    return count
+
+
+# --- Поиск ---
+
+def search_ids(q, limit=200):
+    """id гостей по убыванию релевантности"""
+    match = build_match(q)
+    if match is None:
+        return []
+    rows = db.session.execute(text(
+        f'SELECT rowid FROM {TABLE} WHERE {TABLE} MATCH :match '
+        f'ORDER BY bm25({TABLE}, {", ".join(map(str, _WEIGHTS))}), rowid DESC '
+        'LIMIT :limit'
+    ), {'match': match, 'limit': limit})
+    return [row[0] for row in rows]
+
+
+def search(q, limit=200, options=()):
+    """Гости по строке поиска, самые релевантные первыми (options - загрузка связей)"""
+    ids = search_ids(q, limit)
+    if not ids:
+        return []
+    query = Guest.query.options(*options).filter(Guest.id.in_(ids))
+    guests = {guest.id: guest for guest in query}
+    return [guests[guest_id] for guest_id in ids if guest_id in guests]
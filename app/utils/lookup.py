@@ -0,0 +1,28 @@
+"""
+Справочники перечислений: код -> элемент Enum
+
+Перечисления моделей (RoomType, BookingStatus, BillStatus, PaymentMethod,
+StaffRole) хранят в БД строковый код. Методы get_*_display вызываются
+в шаблонах на каждую строку списка, поэтому вместо перебора Enum при
+каждом вызове словарь код -> элемент строится один раз при импорте
+модели (декоратор @register).
+"""
+
+_registry = {}
+
+
+def register(enum_cls):
+    """Декоратор перечисления с атрибутом code"""
+    _registry[enum_cls] = {member.code: member for member in enum_cls}
+    return enum_cls
+
+
+def by_code(enum_cls, code, default=None):
+    """Элемент перечисления по коду или default"""
+    return _registry[enum_cls].get(code, default)
+
+
+def display_name(enum_cls, code):
+    """Отображаемое название по коду (сам код, если он неизвестен)"""
+    member = _registry[enum_cls].get(code)
+    return member.display_name if member is not None else code
@@ -0,0 +1,158 @@
+"""
+Версионные миграции схемы
+
+db.create_all() создаёт только отсутствующие таблицы и не меняет
+существующие - новый индекс или колонка в рабочей базе без миграции не
+появятся. Миграции лежат в пакете app/migrations модулями
+v<номер>_<описание>.py с функциями upgrade(op) и downgrade(op);
+применённые версии записываются в таблицу schema_migrations.
+
+Операции (op) идемпотентны (IF NOT EXISTS / проверка колонок), поэтому
+миграции безопасно применять и к базе, только что созданной create_all
+по актуальным моделям. Индексы создаются "онлайн" настолько, насколько
+позволяет СУБД: в PostgreSQL - CREATE INDEX CONCURRENTLY вне транзакции
+(таблица остаётся доступной для записи), в SQLite - обычным CREATE INDEX
+(запись ждёт только на время построения) с последующим ANALYZE.
+
+Команды: `flask db-upgrade`, `flask db-downgrade ВЕРСИЯ`, `flask db-status`.
+"""
+import importlib
+import pkgutil
+from collections import namedtuple
+from datetime import datetime
+
+from sqlalchemy import inspect, select, text
+
+from app import db
+
+Migration = namedtuple('Migration', 'version name module')
+
+schema_migrations = db.Table(
+    'schema_migrations',
+    db.Column('version', db.Integer, primary_key=True),
+    db.Column('name', db.String(200), nullable=False),
+    db.Column('applied_at', db.DateTime, nullable=False, default=datetime.utcnow)
+)
+
+
+class Operations:
+    """Операции миграций с учётом диалекта"""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self.dialect = conn.dialect.name
+
+    def execute(self, sql, params=None):
+        return self.conn.execute(text(sql), params or {})
+
+    def create_index(self, name, table, columns, unique=False):
+        unique_sql = 'UNIQUE ' if unique else ''
+        concurrently = 'CONCURRENTLY ' if self.dialect == 'postgresql' else ''
+        self.execute(f'CREATE {unique_sql}INDEX {concurrently}IF NOT EXISTS {name} '
+                     f'ON {table} ({", ".join(columns)})')
+
+    def drop_index(self, name):
+        concurrently = 'CONCURRENTLY ' if self.dialect == 'postgresql' else ''
+        self.execute(f'DROP INDEX {concurrently}IF EXISTS {name}')
+
+    def create_table(self, table):
+        """Создать таблицу модели (Model.__table__) с её индексами, если её нет"""
+        table.create(self.conn, checkfirst=True)
+
+    def _columns(self, table):
+        return {column['name'] for column in inspect(self.conn).get_columns(table)}
+
+    def add_column(self, table, name, sql_type):
+        if name not in self._columns(table):
+            self.execute(f'ALTER TABLE {table} ADD COLUMN {name} {sql_type}')
+
+    def drop_column(self, table, name):
+        """Удалить колонку (SQLite 3.35+; индексы по ней нужно удалить раньше)"""
+        if name in self._columns(table):
+            self.execute(f'ALTER TABLE {table} DROP COLUMN {name}')
+
+    def analyze(self, table):
+        """Обновить статистику планировщика после новых индексов"""
+        self.execute(f'ANALYZE {table}')
+
+
+def discover():
+    """Все миграции пакета app/migrations по возрастанию версии"""
+    import app.migrations as package
+
+    migrations = []
+    for info in pkgutil.iter_modules(package.__path__):
+        prefix, _, name = info.name.partition('_')
+        if not (prefix.startswith('v') and prefix[1:].isdigit()):
+            continue
+        module = importlib.import_module(f'{package.__name__}.{info.name}')
+        migrations.append(Migration(int(prefix[1:]), name, module))
+    migrations.sort(key=lambda m: m.version)
+    versions = [m.version for m in migrations]
+    if len(set(versions)) != len(versions):
+        raise RuntimeError(f'Повторяющиеся номера миграций: {versions}')
+    return migrations
+
+
+def applied_versions():
+    schema_migrations.create(db.engine, checkfirst=True)
+    with db.engine.connect() as conn:
+        return set(conn.execute(select(schema_migrations.c.version)).scalars())
+
+
+def _run(migration, direction):
+    """Одна миграция; в PostgreSQL - в autocommit (CREATE INDEX CONCURRENTLY)"""
+    engine = db.engine
+    if engine.dialect.name == 'postgresql':
+        conn = engine.connect().execution_options(isolation_level='AUTOCOMMIT')
+    else:
+        conn = engine.connect()
+    try:
+        with conn.begin():
+            getattr(migration.module, direction)(Operations(conn))
+            table = schema_migrations
+            if direction == 'upgrade':
+                conn.execute(table.insert().values(
+                    version=migration.version, name=migration.name, applied_at=datetime.utcnow()
+                ))
+            else:
+                conn.execute(table.delete().where(table.c.version == migration.version))
+    finally:
+        conn.close()
+
+
+def upgrade(target=None):
+    """
+    Применить неприменённые миграции (до версии target включительно)
+
+    Returns:
+        list: применённые Migration
+    """
+    db.session.commit()
+    done = applied_versions()
+    pending = [m for m in discover()
+               if m.version not in done and (target is None or m.version <= target)]
+    for migration in pending:
+        _run(migration, 'upgrade')
+    return pending
+
+
+def downgrade(target):
+    """
+    Откатить применённые миграции с версией больше target
+
+    Returns:
+        list: откаченные Migration (от новой к старой)
+    """
+    db.session.commit()
+    done = applied_versions()
+    rollback = [m for m in reversed(discover()) if m.version in done and m.version > target]
+    for migration in rollback:
+        _run(migration, 'downgrade')
+    return rollback
+
+
+def status():
+    """Список (Migration, применена ли)"""
+    done = applied_versions()
+    return [(m, m.version in done) for m in discover()]
@@ -0,0 +1,307 @@
+"""
+Индекс занятости номеров в памяти процесса
+
+Хранит активные (подтверждённые и заселённые) бронирования как интервалы
+[check_in, check_out) отдельно для каждого номера. Проверка пересечения
+выполняется двоичным поиском за O(log n) без обращения к БД.
+
+Индекс обновляется инкрементально после commit сессии, в которой менялись
+бронирования (confirm, cancel, check_in_guest, check_out_guest и т.д.).
+Индекс локален для процесса: изменения одного воркера не видны индексам
+остальных. Поэтому он включается явно (OCCUPANCY_INDEX_ENABLED = True) только
+при одном процессе; расхождения с БД ищет `flask occupancy-check --repair`.
+"""
+import bisect
+import threading
+from collections import namedtuple
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app import db
+from app.utils.session_events import deleted_bookings
+
+EXTENSION_KEY = 'occupancy_index'
+_PENDING_KEY = 'occupancy_changes'
+_DROPPED_ROOMS_KEY = 'occupancy_dropped_rooms'
+
+# Минимальный набор полей брони, нужный поиску и календарю
+Interval = namedtuple('Interval', 'id room_id check_in check_out guest_name')
+
+
+class RoomIntervals:
+    """
+    Интервалы одного номера, отсортированные по дате заезда
+
+    max_ends[i] - максимальная дата выезда среди первых i + 1 интервалов,
+    поэтому пересечение проверяется одним bisect.
+    """
+    __slots__ = ('starts', 'items', 'max_ends')
+
+    def __init__(self):
+        self.starts = []
+        self.items = []
+        self.max_ends = []
+
+    def __len__(self):
+        return len(self.items)
+
+    def add(self, interval):
+        pos = bisect.bisect_right(self.starts, interval.check_in)
+        self.starts.insert(pos, interval.check_in)
+        self.items.insert(pos, interval)
+        self.max_ends.insert(pos, interval.check_out)
+        self._refresh_max(pos)
+
+    def remove(self, interval):
+        lo = bisect.bisect_left(self.starts, interval.check_in)
+        hi = bisect.bisect_right(self.starts, interval.check_in)
+        for pos in range(lo, hi):
+            if self.items[pos].id == interval.id:
+                del self.starts[pos]
+                del self.items[pos]
+                del self.max_ends[pos]
+                self._refresh_max(pos)
+                return True
+        return False
+
+    def _refresh_max(self, pos):
+        current = self.max_ends[pos - 1] if pos > 0 else None
+        for i in range(pos, len(self.items)):
+            end = self.items[i].check_out
+            current = end if current is None or end > current else current
+            self.max_ends[i] = current
+
+    def overlaps(self, check_in, check_out):
+        """Есть ли интервал, пересекающийся с [check_in, check_out)"""
+        idx = bisect.bisect_left(self.starts, check_out)
+        return idx > 0 and self.max_ends[idx - 1] > check_in
+
+    def between(self, start, end):
+        """Интервалы, пересекающиеся с [start, end), в порядке заезда"""
+        idx = bisect.bisect_left(self.starts, end)
+        found = []
+        i = idx - 1
+        while i >= 0 and self.max_ends[i] > start:
+            if self.items[i].check_out > start:
+                found.append(self.items[i])
+            i -= 1
+        found.reverse()
+        return found
+
+
+class OccupancyIndex:
+    """
+    Индекс занятости всех номеров
+
+    Загрузка (первая или --repair) читает БД без блокировки индекса, поэтому
+    изменения, закоммиченные за это время, копятся в _buffer и применяются
+    поверх загруженного снимка - иначе бронь, подтверждённая во время
+    загрузки, в индекс не попала бы. Изменения - итоговые состояния броней,
+    так что повтор уже попавших в снимок безопасен.
+    """
+
+    def __init__(self):
+        self._rooms = {}
+        self._by_id = {}
+        self._lock = threading.RLock()
+        self._load_lock = threading.Lock()
+        self._buffer = None  # список изменений, пока идёт загрузка
+        self.loaded = False
+
+    def __len__(self):
+        return len(self._by_id)
+
+    @staticmethod
+    def fetch_active():
+        """Активные бронирования из БД (отдельное соединение, без незакоммиченных данных)"""
+        from app.models.booking import Booking, ACTIVE_STATUSES
+
+        stmt = select(Booking.id, Booking.room_id, Booking.check_in,
+                      Booking.check_out, Booking.guest_name).where(
+            Booking.status.in_(ACTIVE_STATUSES)
+        )
+        with db.engine.connect() as conn:
+            return [Interval(*row) for row in conn.execute(stmt)]
+
+    def load(self):
+        """Загрузить индекс, если он ещё не загружен (одна загрузка на процесс)"""
+        with self._load_lock:
+            if not self.loaded:
+                self._load()
+
+    def rebuild(self):
+        """Полная перестройка индекса по данным БД"""
+        with self._load_lock:
+            self._load()
+
+    def _load(self):
+        with self._lock:
+            self._buffer = []
+        try:
+            intervals = self.fetch_active()
+        except Exception:
+            with self._lock:
+                self._buffer = None
+            raise
+        with self._lock:
+            self._rooms = {}
+            self._by_id = {}
+            for interval in intervals:
+                self._put(interval)
+            for changes, dropped_rooms in self._buffer:
+                self._apply(changes, dropped_rooms)
+            self._buffer = None
+            self.loaded = True
+
+    def apply(self, changes, dropped_rooms=()):
+        """
+        Применить закоммиченные изменения
+
+        Args:
+            changes: {id брони: Interval или None (бронь больше не активна)}
+            dropped_rooms: id удалённых номеров
+        """
+        with self._lock:
+            if self._buffer is not None:
+                self._buffer.append((dict(changes), tuple(dropped_rooms)))
+            if self.loaded:
+                self._apply(changes, dropped_rooms)
+
+    def _apply(self, changes, dropped_rooms):
+        for room_id in dropped_rooms:
+            self._drop_room(room_id)
+        for booking_id, interval in changes.items():
+            self._discard(booking_id)
+            if interval is not None:
+                self._put(interval)
+
+    def put(self, interval):
+        """Добавить или обновить интервал брони"""
+        with self._lock:
+            self._discard(interval.id)
+            self._put(interval)
+
+    def discard(self, booking_id):
+        """Убрать бронь из индекса (отмена, выселение, удаление)"""
+        with self._lock:
+            self._discard(booking_id)
+
+    def drop_room(self, room_id):
+        """Убрать все интервалы удалённого номера"""
+        with self._lock:
+            self._drop_room(room_id)
+
+    def _drop_room(self, room_id):
+        intervals = self._rooms.pop(room_id, None)
+        for interval in intervals.items if intervals else ():
+            self._by_id.pop(interval.id, None)
+
+    def _put(self, interval):
+        self._rooms.setdefault(interval.room_id, RoomIntervals()).add(interval)
+        self._by_id[interval.id] = interval
+
+    def _discard(self, booking_id):
+        interval = self._by_id.pop(booking_id, None)
+        if interval is not None:
+            self._rooms[interval.room_id].remove(interval)
+
+    def is_free(self, room_id, check_in, check_out):
+        with self._lock:
+            intervals = self._rooms.get(room_id)
+            return intervals is None or not intervals.overlaps(check_in, check_out)
+
+    def intervals(self, room_id, start, end):
+        with self._lock:
+            intervals = self._rooms.get(room_id)
+            return intervals.between(start, end) if intervals else []
+
+    def check_consistency(self):
+        """
+        Сверка индекса с БД
+
+        Returns:
+            dict: missing - есть в БД, нет в индексе;
+                  extra - есть в индексе, нет в БД;
+                  mismatched - отличаются номер или даты
+        """
+        actual = {interval.id: interval for interval in self.fetch_active()}
+        with self._lock:
+            indexed = dict(self._by_id)
+
+        return {
+            'missing': sorted(set(actual) - set(indexed)),
+            'extra': sorted(set(indexed) - set(actual)),
+            'mismatched': sorted(
+                booking_id for booking_id in set(actual) & set(indexed)
+                if actual[booking_id] != indexed[booking_id]
+            )
+        }
+
+
+def init_app(app):
+    """Регистрация индекса в приложении"""
+    app.config.setdefault('OCCUPANCY_INDEX_ENABLED', False)
+    app.extensions[EXTENSION_KEY] = OccupancyIndex()
+
+
+def is_enabled():
+    return (has_app_context()
+            and EXTENSION_KEY in current_app.extensions
+            and current_app.config.get('OCCUPANCY_INDEX_ENABLED', False))
+
+
+def get_index():
+    """Индекс текущего приложения, загружается из БД при первом обращении"""
+    index = current_app.extensions[EXTENSION_KEY]
+    if not index.loaded:
+        index.load()
+    return index
+
+
+def add_committed(intervals):
+    """Добавить в индекс брони, закоммиченные в обход ORM (массовый импорт)"""
+    if not is_enabled():
+        return
+    current_app.extensions[EXTENSION_KEY].apply(
+        {interval.id: interval for interval in intervals})
+
+
+# --- Синхронизация с сессией SQLAlchemy ---
+
+@event.listens_for(Session, 'after_flush')
+def _collect_booking_changes(session, flush_context):
+    from app.models.booking import Booking, ACTIVE_STATUSES
+
+    changes = session.info.setdefault(_PENDING_KEY, {})
+    for obj in session.new | session.dirty:
+        if isinstance(obj, Booking) and obj.id is not None:
+            if obj.status in ACTIVE_STATUSES:
+                changes[obj.id] = Interval(obj.id, obj.room_id, obj.check_in,
+                                           obj.check_out, obj.guest_name)
+            else:
+                changes[obj.id] = None
+    booking_ids, room_ids = deleted_bookings(session)
+    for booking_id in booking_ids:
+        changes[booking_id] = None
+    if room_ids:
+        session.info.setdefault(_DROPPED_ROOMS_KEY, set()).update(room_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_booking_changes(session):
+    changes = session.info.pop(_PENDING_KEY, None)
+    dropped_rooms = session.info.pop(_DROPPED_ROOMS_KEY, None)
+    if not (changes or dropped_rooms) or not has_app_context():
+        return
+    index = current_app.extensions.get(EXTENSION_KEY)
+    if index is not None:
+        # до загрузки изменения не нужны: загрузка прочитает их из БД
+        index.apply(changes or {}, dropped_rooms or ())
+
+
+@event.listens_for(Session, 'after_rollback')
+def _drop_booking_changes(session):
+    session.info.pop(_PENDING_KEY, None)
+    session.info.pop(_DROPPED_ROOMS_KEY, None)
@@ -0,0 +1,81 @@
+"""
+Матрица занятости номеров для календаря
+
+Занятость каждого номера хранится битовой маской (бит на день периода),
+а сами бронирования - отсортированными отрезками дней. Матрица строится
+за один проход по бронированиям: отрезок дней закрашивается сдвигом маски,
+без перебора дней. Процент загрузки считается суммой popcount по маскам,
+поэтому стоимость не растёт как номера × дни × брони и для периода в год.
+"""
+import bisect
+
+
+class OccupancyRow:
+    """
+    Строка матрицы (один номер)
+
+    Поддерживает row.get(day) как прежний словарь {date: booking}.
+    """
+    __slots__ = ('first_day', 'starts', 'spans', 'mask')
+
+    def __init__(self, first_day):
+        self.first_day = first_day
+        self.starts = []
+        self.spans = []
+        self.mask = 0
+
+    def add(self, start, end, booking):
+        # маска нужна для статистики, отрезок - для поиска брони по дню
+        self.mask |= ((1 << (end - start)) - 1) << start
+        pos = bisect.bisect_right(self.starts, start)
+        self.starts.insert(pos, start)
+        self.spans.insert(pos, (start, end, booking))
+
+    def get(self, day, default=None):
+        offset = (day - self.first_day).days
+        pos = bisect.bisect_right(self.starts, offset) - 1
+        while pos >= 0:
+            start, end, booking = self.spans[pos]
+            if end > offset:
+                return booking
+            pos -= 1
+        return default
+
+    def __len__(self):
+        # количество занятых дней
+        return bin(self.mask).count('1')
+
+
+class OccupancyGrid:
+    """Матрица занятости номера × дни периода [first_day, last_day]"""
+
+    def __init__(self, room_ids, first_day, last_day):
+        self.first_day = first_day
+        self.last_day = last_day
+        self.days_count = (last_day - first_day).days + 1
+        self.rows = {room_id: OccupancyRow(first_day) for room_id in room_ids}
+
+    def fill(self, bookings):
+        """
+        Закрасить дни бронирований (один проход по списку)
+
+        Если брони одного номера пересекаются (некорректные данные),
+        в ячейке показывается бронь с более поздним заездом.
+        """
+        for booking in bookings:
+            row = self.rows.get(booking.room_id)
+            if row is None:
+                continue
+            start = max((booking.check_in - self.first_day).days, 0)
+            end = min((booking.check_out - self.first_day).days, self.days_count)
+            if start < end:
+                row.add(start, end, booking)
+        return self
+
+    def occupied_days(self):
+        return sum(len(row) for row in self.rows.values())
+
+    def occupancy_rate(self):
+        """Процент занятых номеро-ночей за период"""
+        total_days = len(self.rows) * self.days_count
+        return (self.occupied_days() / total_days * 100) if total_days > 0 else 0
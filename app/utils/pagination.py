@@ -0,0 +1,99 @@
+"""
+Постраничный вывод по ключу (keyset pagination)
+
+Вместо OFFSET следующая страница выбирается условием
+(col1, col2, ..., id) < (значения последней строки), которое обслуживается
+составным индексом. Стоимость страницы не зависит от её номера и от
+общего количества строк.
+
+Курсор - значения ключа последней строки, упакованные в base64 JSON.
+"""
+import base64
+import json
+from collections import namedtuple
+from datetime import date, datetime
+
+from flask import abort
+from sqlalchemy import tuple_
+
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+KeysetPage = namedtuple('KeysetPage', 'items next_cursor')
+
+
+def encode_cursor(values):
+    """Упаковать значения ключа в строку для URL"""
+    raw = json.dumps([
+        value.isoformat() if isinstance(value, date) else value
+        for value in values
+    ], ensure_ascii=False)
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, columns):
+    """
+    Распаковать курсор в значения ключа с типами колонок
+
+    Raises:
+        ValueError: курсор повреждён или не подходит к ключу
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError('Некорректный курсор') from e
+
+    if not isinstance(values, list) or len(values) != len(columns):
+        raise ValueError('Курсор не соответствует ключу сортировки')
+
+    decoded = []
+    for column, value in zip(columns, values):
+        if isinstance(value, (list, dict)):
+            raise ValueError('Курсор не соответствует ключу сортировки')
+        python_type = column.type.python_type
+        if value is not None and issubclass(python_type, date):
+            # datetime - подкласс date, поэтому проверяем его первым
+            parser = datetime if python_type is datetime else date
+            try:
+                value = parser.fromisoformat(value)
+            except (TypeError, ValueError) as e:
+                raise ValueError('Курсор не соответствует ключу сортировки') from e
+        decoded.append(value)
+    return decoded
+
+
+def keyset_paginate(query, columns, cursor=None, per_page=DEFAULT_PER_PAGE,
+                    descending=False):
+    """
+    Страница запроса, отсортированного по ключу columns
+
+    Args:
+        query: запрос с уже применёнными фильтрами (без order_by)
+        columns: колонки ключа, последняя должна быть уникальной (id)
+        cursor (str): курсор из предыдущей страницы; некорректный - ответ 400
+        per_page (int): размер страницы (ограничен MAX_PER_PAGE)
+        descending (bool): сортировка по убыванию
+
+    Returns:
+        KeysetPage: items и next_cursor (None на последней странице)
+    """
+    per_page = min(max(int(per_page or DEFAULT_PER_PAGE), 1), MAX_PER_PAGE)
+
+    if cursor:
+        try:
+            last = tuple_(*decode_cursor(cursor, columns))
+        except ValueError as e:
+            abort(400, str(e))
+        key = tuple_(*columns)
+        query = query.filter(key < last if descending else key > last)
+
+    order = [column.desc() if descending else column.asc() for column in columns]
+    rows = query.order_by(*order).limit(per_page + 1).all()
+
+    next_cursor = None
+    if len(rows) > per_page:
+        rows = rows[:per_page]
+        last_row = rows[-1]
+        next_cursor = encode_cursor([getattr(last_row, column.key) for column in columns])
+
+    return KeysetPage(rows, next_cursor)
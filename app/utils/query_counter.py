@@ -0,0 +1,80 @@
+"""
+Счётчик SQL-запросов
+
+count_queries() считает запросы, выполненные в блоке кода.
+@query_budget(n) ограничивает число запросов представления (включая
+ленивые загрузки при рендеринге шаблона). Ограничение проверяется, когда
+включён QUERY_BUDGET_ENFORCED (по умолчанию - в режиме TESTING): при
+превышении представление падает с QueryBudgetExceeded, поэтому N+1 в
+списках обнаруживается тестами независимо от количества строк.
+"""
+import contextvars
+from contextlib import contextmanager
+from functools import wraps
+
+from flask import current_app
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+_active_counters = contextvars.ContextVar('active_query_counters', default=())
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Представление выполнило больше запросов, чем разрешено"""
+
+
+class QueryCounter:
+    """Накопитель выполненных запросов"""
+
+    def __init__(self):
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _count_query(conn, cursor, statement, parameters, context, executemany):
+    for counter in _active_counters.get():
+        counter.statements.append(statement)
+
+
+@contextmanager
+def count_queries():
+    """
+    Подсчёт запросов в блоке
+
+    Пример:
+        with count_queries() as counter:
+            client.get('/bookings/')
+        assert counter.count <= 3
+    """
+    counter = QueryCounter()
+    token = _active_counters.set(_active_counters.get() + (counter,))
+    try:
+        yield counter
+    finally:
+        _active_counters.reset(token)
+
+
+def query_budget(max_queries):
+    """Декоратор: представление выполняет не более max_queries запросов"""
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            enforced = current_app.config.get('QUERY_BUDGET_ENFORCED',
+                                              current_app.testing)
+            if not enforced:
+                return view(*args, **kwargs)
+
+            with count_queries() as counter:
+                response = view(*args, **kwargs)
+            if counter.count > max_queries:
+                raise QueryBudgetExceeded(
+                    f'{view.__name__}: {counter.count} запросов при бюджете '
+                    f'{max_queries}:\n' + '\n'.join(counter.statements)
+                )
+            return response
+        return wrapper
+    return decorator
@@ -0,0 +1,86 @@
+"""
+Проверка планов горячих запросов (EXPLAIN QUERY PLAN)
+
+Для запросов из bookings.py и billing.py, ради которых добавлены
+составные индексы (миграция v0001), выполняется EXPLAIN QUERY PLAN
+(в PostgreSQL - EXPLAIN) и проверяется, что план использует ожидаемый
+индекс. Команда `flask explain-queries` печатает планы и завершается с
+кодом 1, если какой-то запрос индекс не использует - например, миграции
+не применены.
+"""
+from collections import namedtuple
+from datetime import date, timedelta
+
+from sqlalchemy import select
+
+from app import db
+
+HotQuery = namedtuple('HotQuery', 'name index build')
+PlanCheck = namedtuple('PlanCheck', 'name index plan uses_index')
+
+
+def _room_availability():
+    # Room.is_available_for_period без индекса занятости в памяти
+    from app.models.booking import Booking
+
+    today = date.today()
+    return select(Booking.id).where(
+        Booking.room_id == 1,
+        Booking.overlaps_period(today, today + timedelta(days=3))
+    ).limit(1)
+
+
+def _bookings_by_status():
+    # bookings.index с фильтром по статусу: страница по (check_in, id)
+    from app.models.booking import Booking
+
+    return select(Booking).where(Booking.status == 'confirmed') \
+        .order_by(Booking.check_in.desc(), Booking.id.desc()).limit(51)
+
+
+def _bills_by_status():
+    # billing.index с фильтром по статусу: страница по (created_at, id)
+    from app.models.billing import Bill
+
+    return select(Bill).where(Bill.status == 'open') \
+        .order_by(Bill.created_at.desc(), Bill.id.desc()).limit(51)
+
+
+def _bill_payments():
+    # billing.detail: bill.payments.order_by(Payment.created_at.desc())
+    from app.models.billing import Payment
+
+    return select(Payment).where(Payment.bill_id == 1).order_by(Payment.created_at.desc())
+
+
+HOT_QUERIES = (
+    HotQuery('доступность номера', 'ix_bookings_room_status_dates', _room_availability),
+    HotQuery('брони по статусу', 'ix_bookings_status_check_in_id', _bookings_by_status),
+    HotQuery('счета по статусу', 'ix_bills_status_created_at_id', _bills_by_status),
+    HotQuery('платежи счёта', 'ix_payments_bill_created_at', _bill_payments),
+)
+
+
+def explain(statement):
+    """Строки плана запроса"""
+    conn = db.session.connection()
+    compiled = statement.compile(dialect=conn.dialect, compile_kwargs={'render_postcompile': True})
+    params = compiled.construct_params()
+    if conn.dialect.name == 'sqlite':
+        rows = conn.exec_driver_sql(
+            'EXPLAIN QUERY PLAN ' + compiled.string,
+            tuple(params[name] for name in compiled.positiontup)
+        )
+        return [row[-1] for row in rows]
+    rows = conn.exec_driver_sql('EXPLAIN ' + compiled.string, params)
+    return [row[0] for row in rows]
+
+
+def check_hot_queries():
+    """Планы горячих запросов и признак использования ожидаемого индекса"""
+    checks = []
+    for query in HOT_QUERIES:
+        plan = explain(query.build())
+        checks.append(PlanCheck(query.name, query.index, plan,
+                                any(query.index in line for line in plan)))
+    return checks
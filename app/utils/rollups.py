@@ -0,0 +1,361 @@
+"""
+Поддержка дневных агрегатов (app/models/rollups.py)
+
+После каждого flush изменения платежей, счетов и бронирований переводятся
+в дельты по дням и применяются UPSERT'ами в той же транзакции. Поэтому
+record_payment, approve_refund, смены статусов счетов и броней обновляют
+агрегаты без отдельного вызова, а откат транзакции откатывает и их.
+Массовые операции в обход ORM агрегаты не обновляют - после них нужна
+команда `flask rebuild-rollups`. В существующей базе агрегаты заполняет
+миграция v0005.
+"""
+from collections import defaultdict
+from datetime import timedelta
+
+from sqlalchemy import event, inspect, select, func, cast
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.rollups import DailyPaymentTotal, DailyBillTotal, DailyRoomNights
+
+# Статусы, при которых номеро-ночи считаются проданными
+SOLD_STATUSES = ('confirmed', 'checked_in', 'checked_out')
+
+
+def _old(obj, attr):
+    """Значение атрибута до flush"""
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def _changed(obj, attrs):
+    state = inspect(obj)
+    return any(state.attrs[attr].history.has_changes() for attr in attrs)
+
+
+def _nights(check_in, check_out):
+    day = check_in
+    while day < check_out:
+        yield day
+        day += timedelta(days=1)
+
+
+class _Deltas:
+    """Дельты агрегатов, накопленные за один flush"""
+
+    def __init__(self):
+        self.payments = defaultdict(lambda: [0, 0.0])
+        self.bills = defaultdict(lambda: [0, 0.0])
+        self.nights = defaultdict(int)
+
+    def __bool__(self):
+        return bool(self.payments or self.bills or self.nights)
+
+    def payment(self, created_at, method, amount, sign):
+        if created_at is None:
+            return
+        entry = self.payments[(created_at.date(), method)]
+        entry[0] += sign
+        entry[1] += sign * (amount or 0)
+
+    def bill(self, created_at, status, total, sign):
+        if created_at is None:
+            return
+        entry = self.bills[(created_at.date(), status)]
+        entry[0] += sign
+        entry[1] += sign * (total or 0)
+
+    def booking(self, room_type, status, check_in, check_out, sign):
+        if status not in SOLD_STATUSES or room_type is None:
+            return
+        for day in _nights(check_in, check_out):
+            self.nights[(day, room_type, status)] += sign
+
+
+def _room_types(session, rooms, room_ids):
+    """Типы номеров до и после flush: (old, new)"""
+    old, new = {}, {}
+    for room in rooms:
+        old[room.id] = _old(room, 'room_type')
+        new[room.id] = room.room_type
+
+    from app.models.room import Room
+
+    missing = set(room_ids) - set(new)
+    if missing:
+        rows = session.connection().execute(
+            select(Room.id, Room.room_type).where(Room.id.in_(missing))
+        )
+        for room_id, room_type in rows:
+            old[room_id] = new[room_id] = room_type
+    return old, new
+
+
+def collect_deltas(session):
+    """Перевести изменения сессии в дельты дневных агрегатов"""
+    from app.models.billing import Bill, Payment
+    from app.models.booking import Booking
+    from app.models.room import Room
+
+    deltas = _Deltas()
+    new, dirty, deleted = session.new, session.dirty, session.deleted
+
+    for obj in new:
+        if isinstance(obj, Payment):
+            deltas.payment(obj.created_at, obj.method, obj.amount, 1)
+        elif isinstance(obj, Bill):
+            deltas.bill(obj.created_at, obj.status, obj.total, 1)
+    for obj in dirty:
+        if isinstance(obj, Payment) and _changed(obj, ('created_at', 'method', 'amount')):
+            deltas.payment(_old(obj, 'created_at'), _old(obj, 'method'), _old(obj, 'amount'), -1)
+            deltas.payment(obj.created_at, obj.method, obj.amount, 1)
+        elif isinstance(obj, Bill) and _changed(obj, ('created_at', 'status', 'total')):
+            deltas.bill(_old(obj, 'created_at'), _old(obj, 'status'), _old(obj, 'total'), -1)
+            deltas.bill(obj.created_at, obj.status, obj.total, 1)
+    for obj in deleted:
+        if isinstance(obj, Payment):
+            deltas.payment(_old(obj, 'created_at'), _old(obj, 'method'), _old(obj, 'amount'), -1)
+        elif isinstance(obj, Bill):
+            deltas.bill(_old(obj, 'created_at'), _old(obj, 'status'), _old(obj, 'total'), -1)
+
+    # Бронирования: ночи раскладываются по типу номера
+    booking_attrs = ('room_id', 'status', 'check_in', 'check_out')
+    added = [b for b in new if isinstance(b, Booking)]
+    changed = [b for b in dirty if isinstance(b, Booking) and _changed(b, booking_attrs)]
+    removed = [b for b in deleted if isinstance(b, Booking)]
+    retyped = [r for r in dirty | deleted
+               if isinstance(r, Room) and _changed(r, ('room_type',))]
+    rooms = [r for r in new | dirty | deleted if isinstance(r, Room)]
+
+    if not (added or changed or removed or retyped):
+        return deltas
+
+    room_ids = {b.room_id for b in added + changed}
+    room_ids |= {_old(b, 'room_id') for b in changed + removed}
+    old_types, new_types = _room_types(session, rooms, room_ids)
+
+    for b in changed + removed:
+        deltas.booking(old_types.get(_old(b, 'room_id')), _old(b, 'status'),
+                       _old(b, 'check_in'), _old(b, 'check_out'), -1)
+    for b in added + changed:
+        deltas.booking(new_types.get(b.room_id), b.status, b.check_in, b.check_out, 1)
+
+    # Смена типа номера переносит ночи его остальных броней
+    flushed_ids = {b.id for b in added + changed + removed}
+    for room in retyped:
+        rows = session.connection().execute(
+            select(Booking.id, Booking.status, Booking.check_in, Booking.check_out)
+            .where(Booking.room_id == room.id, Booking.status.in_(SOLD_STATUSES))
+        )
+        for booking_id, status, check_in, check_out in rows:
+            if booking_id not in flushed_ids:
+                deltas.booking(old_types[room.id], status, check_in, check_out, -1)
+                if room not in deleted:
+                    deltas.booking(new_types[room.id], status, check_in, check_out, 1)
+
+    return deltas
+
+
+def _upsert(conn, table, keys, increments, rows):
+    """
+    Прибавить значения колонок increments к строкам с ключом keys
+    (создать строки, которых ещё нет). Одна команда на все строки.
+    """
+    if not rows:
+        return
+    dialect = conn.dialect.name
+    if dialect in ('sqlite', 'postgresql'):
+        if dialect == 'sqlite':
+            from sqlalchemy.dialects.sqlite import insert
+        else:
+            from sqlalchemy.dialects.postgresql import insert
+        stmt = insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={col: table.c[col] + stmt.excluded[col] for col in increments}
+        )
+        conn.execute(stmt, rows)
+        return
+
+    for row in rows:
+        where = [table.c[col] == row[col] for col in keys]
+        result = conn.execute(table.update().where(*where).values(
+            **{col: table.c[col] + row[col] for col in increments}
+        ))
+        if result.rowcount == 0:
+            conn.execute(table.insert().values(**row))
+
+
+def apply_deltas(conn, deltas):
+    _upsert(conn, DailyPaymentTotal.__table__, ('day', 'method'),
+            ('payments_count', 'amount'), [
+                {'day': day, 'method': method, 'payments_count': count, 'amount': amount}
+                for (day, method), (count, amount) in deltas.payments.items()
+                if count or amount
+            ])
+    _upsert(conn, DailyBillTotal.__table__, ('day', 'status'),
+            ('bills_count', 'total'), [
+                {'day': day, 'status': status, 'bills_count': count, 'total': total}
+                for (day, status), (count, total) in deltas.bills.items()
+                if count or total
+            ])
+    _upsert(conn, DailyRoomNights.__table__, ('day', 'room_type', 'status'),
+            ('room_nights',), [
+                {'day': day, 'room_type': room_type, 'status': status, 'room_nights': count}
+                for (day, room_type, status), count in deltas.nights.items()
+                if count
+            ])
+
+
+def record_bookings(conn, bookings):
+    """
+    Учесть в агрегатах брони, записанные в обход ORM (массовый импорт)
+
+    Args:
+        bookings: кортежи (room_type, status, check_in, check_out)
+    """
+    deltas = _Deltas()
+    for room_type, status, check_in, check_out in bookings:
+        deltas.booking(room_type, status, check_in, check_out, 1)
+    if deltas:
+        apply_deltas(conn, deltas)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_rollups(session, flush_context):
+    deltas = collect_deltas(session)
+    if deltas:
+        apply_deltas(session.connection(), deltas)
+
+
+# --- Полная пересборка ---
+
+def _day(column, dialect):
+    """Дата из DateTime-колонки средствами БД"""
+    if dialect == 'sqlite':
+        return func.date(column)
+    return cast(column, db.Date)
+
+
+def rebuild(conn=None):
+    """
+    Пересобрать все агрегаты по исходным таблицам
+
+    Args:
+        conn: соединение миграции (транзакцией управляет она); без него -
+            сессия с commit в конце
+
+    Returns:
+        dict: количество строк в каждой таблице агрегатов
+    """
+    from app.models.billing import Bill, Payment
+    from app.models.booking import Booking
+    from app.models.room import Room
+
+    executor = conn if conn is not None else db.session
+    dialect = (conn if conn is not None else db.engine).dialect.name
+
+    for model in (DailyPaymentTotal, DailyBillTotal, DailyRoomNights):
+        executor.execute(model.__table__.delete())
+
+    payment_day = _day(Payment.created_at, dialect)
+    executor.execute(DailyPaymentTotal.__table__.insert().from_select(
+        ['day', 'method', 'payments_count', 'amount'],
+        select(payment_day, Payment.method, func.count(Payment.id), func.sum(Payment.amount))
+        .where(Payment.created_at.isnot(None))
+        .group_by(payment_day, Payment.method)
+    ))
+
+    bill_day = _day(Bill.created_at, dialect)
+    executor.execute(DailyBillTotal.__table__.insert().from_select(
+        ['day', 'status', 'bills_count', 'total'],
+        select(bill_day, Bill.status, func.count(Bill.id), func.sum(Bill.total))
+        .where(Bill.created_at.isnot(None))
+        .group_by(bill_day, Bill.status)
+    ))
+
+    # Ночи броней раскладываются по дням в Python потоково,
+    # в памяти только счётчики (день, тип, статус)
+    deltas = _Deltas()
+    rows = executor.execute(
+        select(Room.room_type, Booking.status, Booking.check_in, Booking.check_out)
+        .join(Room, Room.id == Booking.room_id)
+        .where(Booking.status.in_(SOLD_STATUSES))
+        .execution_options(yield_per=1000)
+    )
+    for room_type, status, check_in, check_out in rows:
+        deltas.booking(room_type, status, check_in, check_out, 1)
+    if deltas.nights:
+        executor.execute(DailyRoomNights.__table__.insert(), [
+            {'day': day, 'room_type': room_type, 'status': status, 'room_nights': count}
+            for (day, room_type, status), count in deltas.nights.items()
+        ])
+
+    if conn is None:
+        db.session.commit()
+    return {model.__tablename__: executor.execute(
+                select(func.count()).select_from(model.__table__)).scalar()
+            for model in (DailyPaymentTotal, DailyBillTotal, DailyRoomNights)}
+
+
+# --- Чтение агрегатов ---
+
+def billing_summary(start_date, end_date):
+    """
+    Показатели биллинга за дни [start_date, end_date] в формате отчёта менеджера
+    """
+    from app.models.billing import BillStatus
+
+    bills_by_status = {
+        status: (count or 0, total or 0)
+        for status, count, total in db.session.query(
+            DailyBillTotal.status,
+            func.sum(DailyBillTotal.bills_count),
+            func.sum(DailyBillTotal.total)
+        ).filter(
+            DailyBillTotal.day >= start_date,
+            DailyBillTotal.day <= end_date
+        ).group_by(DailyBillTotal.status)
+    }
+
+    payments_by_method = db.session.query(
+        DailyPaymentTotal.method,
+        func.sum(DailyPaymentTotal.payments_count),
+        func.sum(DailyPaymentTotal.amount)
+    ).filter(
+        DailyPaymentTotal.day >= start_date,
+        DailyPaymentTotal.day <= end_date
+    ).group_by(DailyPaymentTotal.method).all()
+
+    paid_bills, total_revenue = bills_by_status.get(BillStatus.PAID.code, (0, 0))
+
+    return {
+        'total_bills': sum(count for count, _ in bills_by_status.values()),
+        'paid_bills': paid_bills,
+        'pending_bills': bills_by_status.get(BillStatus.OPEN.code, (0, 0))[0],
+        'total_revenue': total_revenue,
+        'total_payments': sum(count or 0 for _, count, _ in payments_by_method),
+        'total_payment_amount': sum(amount or 0 for _, _, amount in payments_by_method),
+        'payment_methods': {method: amount or 0 for method, count, amount
+                            in payments_by_method if count}
+    }
+
+
+def occupied_room_nights(start_date, end_date, statuses):
+    """
+    Сумма номеро-ночей за дни [start_date, end_date] для статусов броней
+
+    Ночи считаются по броням: пересекающиеся брони одного номера учитываются
+    каждая, поэтому для процента загрузки номеров это не подходит (см.
+    OccupancyGrid.occupancy_rate).
+    """
+    return db.session.query(
+        func.coalesce(func.sum(DailyRoomNights.room_nights), 0)
+    ).filter(
+        DailyRoomNights.day >= start_date,
+        DailyRoomNights.day <= end_date,
+        DailyRoomNights.status.in_(statuses)
+    ).scalar()
+
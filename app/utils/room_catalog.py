@@ -0,0 +1,201 @@
+"""
+Кэш каталога номеров (список /rooms/ и этажи для фильтра)
+
+Номера меняются несколько раз в год, а rooms.index на каждый запрос
+выполнял отфильтрованный запрос и SELECT DISTINCT floor. Результаты
+кэшируются по ключу фильтра (тип, этаж, только свободные) и сбрасываются
+после commit, изменившего номера (rooms.create / edit / delete /
+toggle_availability).
+
+В кэше хранятся не ORM-объекты, а словари (их можно сериализовать для
+общего хранилища); в шаблон отдаются RoomCard с теми же полями, что
+у Room.
+
+Хранилище выбирается параметром ROOM_CACHE_BACKEND:
+- 'local' (по умолчанию) - LRU-словарь в памяти процесса
+  (ROOM_CACHE_SIZE записей);
+- 'shared' - общий кэш для нескольких воркеров поверх клиента с
+  интерфейсом Redis (get / set / incr). Клиент берётся из
+  app.config['ROOM_CACHE_CLIENT'] или создаётся по ROOM_CACHE_URL
+  (нужен пакет redis). Для разработки подходит MemoryClient.
+"""
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.models.room import Room, RoomType
+from app.utils import lookup, session_events
+
+EXTENSION_KEY = 'room_catalog'
+
+_ROOM_FIELDS = ('id', 'number', 'room_type', 'floor', 'capacity',
+                'price_per_night', 'description', 'is_available')
+
+
+class RoomCard(namedtuple('RoomCard', _ROOM_FIELDS)):
+    """Номер в списке (данные из кэша, без сессии)"""
+    __slots__ = ()
+
+    def get_type_display(self):
+        return lookup.display_name(RoomType, self.room_type)
+
+
+class LocalBackend:
+    """LRU-кэш в памяти процесса"""
+
+    def __init__(self, maxsize=128):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+        self._version = 0
+
+    def token(self):
+        return self._version
+
+    def get(self, token, key):
+        with self._lock:
+            if token != self._version or key not in self._items:
+                return None
+            self._items.move_to_end(key)
+            return self._items[key]
+
+    def set(self, token, key, value):
+        with self._lock:
+            # кэш сбросили, пока шёл запрос - результат мог устареть
+            if token != self._version:
+                return
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._items.clear()
+
+
+class SharedBackend:
+    """
+    Общий кэш поверх клиента с интерфейсом Redis
+
+    Сброс - увеличение счётчика поколения: ключи старого поколения
+    больше не читаются и удаляются хранилищем по TTL или по его
+    политике вытеснения (например, maxmemory-policy allkeys-lru).
+    """
+
+    def __init__(self, client, prefix='room_catalog:', ttl=24 * 3600):
+        self.client = client
+        self.prefix = prefix
+        self.ttl = ttl
+
+    def token(self):
+        return int(self.client.get(self.prefix + 'generation') or 0)
+
+    def _key(self, token, key):
+        return f'{self.prefix}{token}:{json.dumps(key)}'
+
+    def get(self, token, key):
+        raw = self.client.get(self._key(token, key))
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, token, key, value):
+        self.client.set(self._key(token, key), json.dumps(value), ex=self.ttl)
+
+    def clear(self):
+        self.client.incr(self.prefix + 'generation')
+
+
+class MemoryClient:
+    """Клиент в памяти процесса с подмножеством интерфейса Redis (get / set / incr)"""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def set(self, key, value, ex=None):
+        with self._lock:
+            self._data[key] = value
+
+    def incr(self, key):
+        with self._lock:
+            self._data[key] = int(self._data.get(key) or 0) + 1
+            return self._data[key]
+
+
+def _create_backend(app):
+    kind = app.config.get('ROOM_CACHE_BACKEND', 'local')
+    if kind == 'local':
+        return LocalBackend(app.config.get('ROOM_CACHE_SIZE', 128))
+    if kind != 'shared':
+        raise ValueError(f'Неизвестный ROOM_CACHE_BACKEND: {kind}')
+
+    client = app.config.get('ROOM_CACHE_CLIENT')
+    if client is None:
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError('Для ROOM_CACHE_BACKEND=shared нужен пакет redis '
+                               'или ROOM_CACHE_CLIENT') from e
+        client = redis.Redis.from_url(app.config['ROOM_CACHE_URL'])
+    return SharedBackend(client)
+
+
+def init_app(app):
+    """Регистрация кэша каталога в приложении"""
+    app.extensions[EXTENSION_KEY] = _create_backend(app)
+
+
+def _cached(key, loader):
+    backend = current_app.extensions[EXTENSION_KEY]
+    token = backend.token()
+    value = backend.get(token, key)
+    if value is None:
+        value = loader()
+        backend.set(token, key, value)
+    return value
+
+
+def list_rooms(room_type='', floor=None, available_only=False):
+    """Номера по фильтру, отсортированные по этажу и номеру"""
+    def load():
+        stmt = select(*(getattr(Room, field) for field in _ROOM_FIELDS))
+        if room_type:
+            stmt = stmt.where(Room.room_type == room_type)
+        if floor is not None:
+            stmt = stmt.where(Room.floor == floor)
+        if available_only:
+            stmt = stmt.where(Room.is_available == True)  # noqa: E712
+        rows = db.session.execute(stmt.order_by(Room.floor, Room.number))
+        return [dict(row._mapping) for row in rows]
+
+    key = ('rooms', room_type or '', floor, bool(available_only))
+    return [RoomCard(**row) for row in _cached(key, load)]
+
+
+def floors():
+    """Этажи, на которых есть номера"""
+    def load():
+        return list(db.session.execute(
+            select(Room.floor).distinct().order_by(Room.floor)
+        ).scalars())
+
+    return _cached(('floors',), load)
+
+
+def invalidate():
+    backend = current_app.extensions.get(EXTENSION_KEY)
+    if backend is not None:
+        backend.clear()
+
+
+# Сброс кэша после изменений номеров
+session_events.invalidate_on_commit((Room,), invalidate)
@@ -0,0 +1,125 @@
+"""
+Ночи номеров, занятые активными бронями (RoomNightClaim)
+
+Проверка is_available_for_period и запись брони - два отдельных шага, и
+два администратора, подтверждающие брони одного номера одновременно,
+оба проходят проверку. Поэтому при каждом flush бронь, ставшая активной
+(подтверждена или заселена), получает по строке на каждую ночь, а бронь,
+переставшая быть активной, их освобождает. Первичный ключ (room_id, night)
+не даёт сохранить вторую пересекающуюся активную бронь: её flush падает
+с IntegrityError, и транзакция откатывается целиком.
+
+Брони в статусе pending ночей не занимают - как и при поиске свободных
+номеров. Для броней, созданных до появления таблицы, строки заполняет
+миграция v0004 (или команда `flask rebuild-claims`).
+"""
+from datetime import timedelta
+
+from sqlalchemy import event, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app import db
+from app.models.booking import Booking, RoomNightClaim, ACTIVE_STATUSES
+from app.utils.session_events import deleted_bookings
+
+_CLAIM_ATTRS = ('room_id', 'status', 'check_in', 'check_out')
+
+
+def nights(check_in, check_out):
+    """Ночи периода [check_in, check_out)"""
+    day = check_in
+    while day < check_out:
+        yield day
+        day += timedelta(days=1)
+
+
+def is_conflict(error):
+    """IntegrityError вызван пересечением с другой активной бронью"""
+    return isinstance(error, IntegrityError) and \
+        RoomNightClaim.__tablename__ in str(error.orig)
+
+
+def _is_active(booking):
+    return booking.status in ACTIVE_STATUSES
+
+
+def claim_rows(booking_id, room_id, check_in, check_out):
+    """Строки room_night_claims для активной брони"""
+    if room_id is None or not check_in or not check_out:
+        return []
+    return [{'room_id': room_id, 'night': night, 'booking_id': booking_id}
+            for night in nights(check_in, check_out)]
+
+
+def _claim_rows(booking):
+    return claim_rows(booking.id, booking.room_id, booking.check_in, booking.check_out)
+
+
+@event.listens_for(Session, 'after_flush')
+def _sync_claims(session, flush_context):
+    released, claimed = [], []
+    for obj in session.new:
+        if isinstance(obj, Booking) and _is_active(obj):
+            claimed.extend(_claim_rows(obj))
+    for obj in session.dirty:
+        if not isinstance(obj, Booking):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[attr].history.has_changes() for attr in _CLAIM_ATTRS):
+            released.append(obj.id)
+            if _is_active(obj):
+                claimed.extend(_claim_rows(obj))
+    deleted_ids, dropped_rooms = deleted_bookings(session)
+    released.extend(deleted_ids)
+
+    if not (released or claimed or dropped_rooms):
+        return
+    table = RoomNightClaim.__table__
+    conn = session.connection()
+    if released:
+        conn.execute(table.delete().where(table.c.booking_id.in_(released)))
+    if dropped_rooms:
+        conn.execute(table.delete().where(table.c.room_id.in_(dropped_rooms)))
+    if claimed:
+        # Пересечение с другой активной бронью - IntegrityError из flush
+        conn.execute(table.insert(), claimed)
+
+
+def rebuild(conn=None):
+    """
+    Пересобрать занятые ночи по активным броням
+
+    Args:
+        conn: соединение миграции (транзакцией управляет она); без него -
+            сессия с commit в конце
+
+    Returns:
+        tuple: (количество строк, список id броней, пересекающихся с уже
+        учтёнными - такие брони нужно разобрать вручную)
+    """
+    executor = conn if conn is not None else db.session
+    table = RoomNightClaim.__table__
+    executor.execute(table.delete())
+
+    taken = set()
+    rows, conflicts = [], []
+    bookings = executor.execute(
+        select(Booking.id, Booking.room_id, Booking.check_in, Booking.check_out)
+        .where(Booking.status.in_(ACTIVE_STATUSES))
+        .order_by(Booking.created_at, Booking.id)
+    )
+    for booking_id, room_id, check_in, check_out in bookings:
+        claims = claim_rows(booking_id, room_id, check_in, check_out)
+        keys = [(claim['room_id'], claim['night']) for claim in claims]
+        if any(key in taken for key in keys):
+            conflicts.append(booking_id)
+            continue
+        taken.update(keys)
+        rows.extend(claims)
+
+    if rows:
+        executor.execute(table.insert(), rows)
+    if conn is None:
+        db.session.commit()
+    return len(rows), conflicts
@@ -0,0 +1,113 @@
+"""
+Кэш цен номеров в памяти процесса
+
+Booking._calculate_total_price читал номер из БД на каждую бронь. Цены
+всех номеров загружаются одним запросом (отдельное соединение, только
+закоммиченные данные) и хранятся до commit, изменившего номера
+(rooms.create / rooms.edit / rooms.delete), но не дольше
+ROOM_PRICE_CACHE_TTL секунд: commit в другом воркере этот кэш не
+сбрасывает. Номер, уже загруженный в текущую сессию, берётся из неё -
+с несохранёнными изменениями.
+
+Счётчик версий защищает от гонки: если кэш сбросили, пока шла загрузка,
+загруженные цены не сохраняются.
+"""
+import threading
+import time
+
+from flask import current_app, has_app_context
+from sqlalchemy import select
+from sqlalchemy.orm.util import identity_key
+from sqlalchemy.pool import StaticPool
+
+from app import db
+from app.models.room import Room
+from app.utils import session_events
+
+EXTENSION_KEY = 'room_prices'
+
+
+class RoomPriceCache:
+    """Цены за ночь: room_id -> price_per_night"""
+
+    def __init__(self, ttl=10):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._prices = None
+        self._version = 0
+        self._prices_version = -1
+        self._expires_at = 0.0
+
+    @property
+    def version(self):
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._prices = None
+
+    @staticmethod
+    def fetch():
+        with db.engine.connect() as conn:
+            return dict(conn.execute(select(Room.id, Room.price_per_night)).all())
+
+    def get(self, room_id):
+        """Цена номера или None, если номера нет среди закоммиченных"""
+        if isinstance(db.engine.pool, StaticPool):
+            # одно соединение на всё приложение (SQLite в памяти): отдельное
+            # "соединение" - то же самое, и его возврат в пул откатил бы
+            # транзакцию сессии. Читаем через сессию и не кэшируем
+            return db.session.execute(
+                select(Room.price_per_night).where(Room.id == room_id)
+            ).scalar()
+
+        with self._lock:
+            if self._prices is not None and self._prices_version == self._version \
+                    and time.monotonic() < self._expires_at:
+                return self._prices.get(room_id)
+            version = self._version
+
+        prices = self.fetch()
+        with self._lock:
+            if version == self._version:
+                self._prices = prices
+                self._prices_version = version
+                self._expires_at = time.monotonic() + self.ttl
+        return prices.get(room_id)
+
+
+def init_app(app):
+    """Регистрация кэша цен в приложении"""
+    app.config.setdefault('ROOM_PRICE_CACHE_TTL', 10)
+    app.extensions[EXTENSION_KEY] = RoomPriceCache(app.config['ROOM_PRICE_CACHE_TTL'])
+
+
+def get_price(room_id):
+    """
+    Цена номера за ночь
+
+    Returns:
+        float или None, если номер не найден
+    """
+    room = db.session.identity_map.get(identity_key(Room, room_id))
+    if room is not None:
+        return room.price_per_night
+
+    cache = current_app.extensions.get(EXTENSION_KEY) if has_app_context() else None
+    price = cache.get(room_id) if cache is not None else None
+    if price is None:
+        # номер создан в текущей транзакции или кэш не подключён
+        room = db.session.get(Room, room_id)
+        price = room.price_per_night if room else None
+    return price
+
+
+def invalidate():
+    cache = current_app.extensions.get(EXTENSION_KEY)
+    if cache is not None:
+        cache.invalidate()
+
+
+# Сброс кэша после изменений номеров
+session_events.invalidate_on_commit((Room,), invalidate)
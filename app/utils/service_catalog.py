@@ -0,0 +1,95 @@
+"""
+Кэш прайса услуг (/services/)
+
+Прайс опрашивают планшеты в номерах и POS-терминалы, а меняется он
+редко. Активные услуги сериализуются в JSON один раз и хранятся
+готовыми байтами вместе с ETag (хэш содержимого - одинаков во всех
+воркерах и после перезапуска). Ответ на опрос с тем же If-None-Match -
+304 без тела и без обращения к БД.
+
+Снимок сбрасывается после commit, изменившего услуги (create_service и
+любые другие изменения Service), и живёт не дольше SERVICE_CATALOG_TTL
+секунд: commit в другом воркере этот снимок не сбрасывает. Поэтому за
+балансировщиком воркеры расходятся в прайсе (и в ETag) не дольше TTL;
+неизменившийся прайс после перестройки даёт тот же ETag. Счётчик версий
+защищает от гонки: если снимок сбросили, пока он строился, построенный
+снимок не сохраняется.
+"""
+import hashlib
+import threading
+import time
+from collections import namedtuple
+
+from flask import current_app
+from sqlalchemy import select
+
+from app import db
+from app.models.service import Service
+from app.utils import session_events
+
+EXTENSION_KEY = 'service_catalog'
+
+Snapshot = namedtuple('Snapshot', 'body etag version')
+
+
+class ServiceCatalogCache:
+    """Сериализованный прайс активных услуг"""
+
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._version = 0
+        self._expires_at = 0.0
+
+    @property
+    def version(self):
+        return self._version
+
+    def invalidate(self):
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    @staticmethod
+    def build(version):
+        services = db.session.execute(
+            select(Service).where(Service.is_active == True)  # noqa: E712
+            .order_by(Service.title.asc())
+        ).scalars()
+        body = current_app.json.dumps([s.to_dict() for s in services]).encode('utf-8')
+        return Snapshot(body, hashlib.sha256(body).hexdigest()[:32], version)
+
+    def get(self):
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() < self._expires_at:
+                return self._snapshot
+            version = self._version
+
+        snapshot = self.build(version)
+        with self._lock:
+            if version == self._version:
+                self._snapshot = snapshot
+                self._expires_at = time.monotonic() + self.ttl
+        return snapshot
+
+
+def init_app(app):
+    """Регистрация кэша прайса в приложении"""
+    app.config.setdefault('SERVICE_CATALOG_TTL', 5)
+    app.extensions[EXTENSION_KEY] = ServiceCatalogCache(app.config['SERVICE_CATALOG_TTL'])
+
+
+def snapshot():
+    """Текущий снимок прайса: body (bytes), etag, version"""
+    return current_app.extensions[EXTENSION_KEY].get()
+
+
+def invalidate():
+    cache = current_app.extensions.get(EXTENSION_KEY)
+    if cache is not None:
+        cache.invalidate()
+
+
+# Сброс после изменений услуг
+session_events.invalidate_on_commit((Service,), invalidate)
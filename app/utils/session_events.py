@@ -0,0 +1,60 @@
+"""
+Общие обработчики изменений сессии (flush/commit)
+
+- invalidate_on_commit - сброс кэша после commit, изменившего модели;
+- deleted_bookings - удалённые во flush брони с учётом каскада.
+"""
+from flask import has_app_context
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+
+def invalidate_on_commit(models, callback):
+    """
+    Вызывать callback() после commit, в котором flush менял объекты models
+
+    Отметка ставится в after_flush и снимается при откате, поэтому
+    откаченные изменения кэш не сбрасывают. callback вызывается только
+    в контексте приложения.
+    """
+    models = tuple(models)
+    key = f'invalidate_on_commit:{callback.__module__}.{callback.__qualname__}'
+
+    def mark(session, flush_context):
+        if any(isinstance(obj, models)
+               for obj in session.new | session.dirty | session.deleted):
+            session.info[key] = True
+
+    def invalidate(session):
+        if session.info.pop(key, False) and has_app_context():
+            callback()
+
+    def drop_mark(session):
+        session.info.pop(key, None)
+
+    event.listen(Session, 'after_flush', mark)
+    event.listen(Session, 'after_commit', invalidate)
+    event.listen(Session, 'after_rollback', drop_mark)
+
+
+def deleted_bookings(session):
+    """
+    Брони, удалённые в этом flush
+
+    Брони удаляемого номера удаляются каскадом (Room.bookings, lazy='dynamic')
+    и в session.deleted не попадают, поэтому вместе с id удалённых броней
+    возвращаются id удалённых номеров - их брони обработчик снимает целиком.
+
+    Returns:
+        tuple: (id броней, id номеров)
+    """
+    from app.models.booking import Booking
+    from app.models.room import Room
+
+    booking_ids, room_ids = [], []
+    for obj in session.deleted:
+        if isinstance(obj, Booking) and obj.id is not None:
+            booking_ids.append(obj.id)
+        elif isinstance(obj, Room):
+            room_ids.append(obj.id)
+    return booking_ids, room_ids
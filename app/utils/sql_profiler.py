@@ -0,0 +1,240 @@
+"""
+Профилирование SQL по эндпоинтам и журнал медленных запросов
+
+Обработчики before/after_cursor_execute движка (как в query_counter.py)
+замеряют каждый запрос, выполненный в профилируемом HTTP-запросе, а
+обработчики before/teardown_request Flask собирают итог по эндпоинту:
+число запросов, суммарное время SQL и самые медленные выражения.
+
+- Итог каждого профилируемого запроса пишется в журнал JSON-строкой
+  (событие sql_profile, уровень INFO), каждый запрос дольше
+  SQL_SLOW_QUERY_MS - событием slow_query (WARNING).
+- Накопленная статистика по эндпоинтам отдаётся GET /internal/metrics и
+  сбрасывается DELETE /internal/metrics. Эндпоинт доступен с заголовком
+  X-Metrics-Token, равным METRICS_TOKEN. Без токена он открыт только с
+  локального адреса и только в DEBUG/TESTING: за обратным прокси на том же
+  хосте все внешние запросы приходят с 127.0.0.1.
+
+Профилируется доля SQL_PROFILER_SAMPLE_RATE HTTP-запросов (решение
+принимается в начале запроса); в остальных обработчики движка только
+проверяют contextvar. Счётчики в метриках - по выборке, а не по всему
+трафику.
+"""
+import contextvars
+import heapq
+import hmac
+import json
+import logging
+import random
+import threading
+import time
+
+from flask import abort, current_app, jsonify, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+EXTENSION_KEY = 'sql_profiler'
+METRICS_ENDPOINT = 'internal_metrics'
+_START_KEY = 'sql_profiler_start'       # conn.info: стек времён начала запросов
+_MAX_STATEMENT_LENGTH = 500
+
+logger = logging.getLogger(__name__)
+
+_current = contextvars.ContextVar('sql_profile', default=None)
+
+
+class RequestProfile:
+    """SQL одного HTTP-запроса"""
+
+    def __init__(self, endpoint, slow_ms):
+        self.endpoint = endpoint
+        self.slow_ms = slow_ms
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.sql_ms = 0.0
+        self.statements = []            # (мс, выражение) медленнее slow_ms
+        self.slowest = (0.0, None)
+        self.status = None
+
+    def record(self, statement, elapsed_ms):
+        self.queries += 1
+        self.sql_ms += elapsed_ms
+        if elapsed_ms > self.slowest[0]:
+            self.slowest = (elapsed_ms, statement)
+        if elapsed_ms >= self.slow_ms:
+            self.statements.append((elapsed_ms, statement))
+
+
+class EndpointStats:
+    """Накопленная статистика эндпоинта"""
+
+    def __init__(self):
+        self.requests = 0
+        self.queries = 0
+        self.max_queries = 0
+        self.sql_ms = 0.0
+        self.slowest = []               # мин-куча (мс, выражение)
+
+    def add(self, profile, top):
+        self.requests += 1
+        self.queries += profile.queries
+        self.max_queries = max(self.max_queries, profile.queries)
+        self.sql_ms += profile.sql_ms
+        if profile.slowest[1] is None:
+            return
+        if len(self.slowest) < top:
+            heapq.heappush(self.slowest, profile.slowest)
+        elif profile.slowest[0] > self.slowest[0][0]:
+            heapq.heapreplace(self.slowest, profile.slowest)
+
+    def to_dict(self, endpoint):
+        return {
+            'endpoint': endpoint,
+            'requests': self.requests,
+            'queries': self.queries,
+            'queries_per_request': round(self.queries / self.requests, 2),
+            'max_queries': self.max_queries,
+            'sql_ms': round(self.sql_ms, 3),
+            'sql_ms_per_request': round(self.sql_ms / self.requests, 3),
+            'slowest': [{'ms': round(ms, 3), 'statement': statement}
+                        for ms, statement in sorted(self.slowest, reverse=True)],
+        }
+
+
+class SqlProfiler:
+    """Статистика по эндпоинтам приложения"""
+
+    def __init__(self, sample_rate, slow_ms, top):
+        self.sample_rate = sample_rate
+        self.slow_ms = slow_ms
+        self.top = top
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._since = time.time()
+
+    def add(self, profile):
+        with self._lock:
+            stats = self._stats.get(profile.endpoint)
+            if stats is None:
+                stats = self._stats[profile.endpoint] = EndpointStats()
+            stats.add(profile, self.top)
+
+    def snapshot(self):
+        with self._lock:
+            endpoints = [stats.to_dict(name) for name, stats in self._stats.items()]
+        return {
+            'since': self._since,
+            'sample_rate': self.sample_rate,
+            'slow_query_ms': self.slow_ms,
+            'endpoints': sorted(endpoints, key=lambda item: item['sql_ms'], reverse=True),
+        }
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._since = time.time()
+
+
+def _shorten(statement):
+    statement = ' '.join(statement.split())
+    if len(statement) > _MAX_STATEMENT_LENGTH:
+        return statement[:_MAX_STATEMENT_LENGTH] + '...'
+    return statement
+
+
+# --- Замер запросов (все движки) ---
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_query(conn, cursor, statement, parameters, context, executemany):
+    if _current.get() is not None:
+        conn.info.setdefault(_START_KEY, []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _finish_query(conn, cursor, statement, parameters, context, executemany):
+    profile = _current.get()
+    starts = conn.info.get(_START_KEY)
+    if profile is None or not starts:
+        return
+    elapsed_ms = (time.perf_counter() - starts.pop()) * 1000
+    profile.record(statement, elapsed_ms)
+
+
+# --- Границы HTTP-запроса ---
+
+def _begin_request():
+    profiler = current_app.extensions[EXTENSION_KEY]
+    if request.endpoint == METRICS_ENDPOINT or random.random() >= profiler.sample_rate:
+        _current.set(None)
+        return
+    _current.set(RequestProfile(request.endpoint or request.path, profiler.slow_ms))
+
+
+def _remember_status(response):
+    profile = _current.get()
+    if profile is not None:
+        profile.status = response.status_code
+    return response
+
+
+def _end_request(exc):
+    profile = _current.get()
+    if profile is None:
+        return
+    _current.set(None)
+
+    for elapsed_ms, statement in profile.statements:
+        logger.warning(json.dumps({
+            'event': 'slow_query',
+            'endpoint': profile.endpoint,
+            'ms': round(elapsed_ms, 3),
+            'statement': _shorten(statement),
+        }, ensure_ascii=False))
+    logger.info(json.dumps({
+        'event': 'sql_profile',
+        'endpoint': profile.endpoint,
+        'method': request.method,
+        'status': profile.status if exc is None else 500,
+        'queries': profile.queries,
+        'sql_ms': round(profile.sql_ms, 3),
+        'request_ms': round((time.perf_counter() - profile.started) * 1000, 3),
+    }, ensure_ascii=False))
+
+    if profile.slowest[1] is not None:
+        profile.slowest = (profile.slowest[0], _shorten(profile.slowest[1]))
+    current_app.extensions[EXTENSION_KEY].add(profile)
+
+
+# --- /internal/metrics ---
+
+def _metrics():
+    token = current_app.config.get('METRICS_TOKEN')
+    if token:
+        supplied = request.headers.get('X-Metrics-Token', '')
+        if not hmac.compare_digest(supplied.encode(), token.encode()):
+            abort(403)
+    elif not (current_app.debug or current_app.testing):
+        abort(404)
+    elif request.remote_addr not in ('127.0.0.1', '::1'):
+        abort(403)
+
+    profiler = current_app.extensions[EXTENSION_KEY]
+    if request.method == 'DELETE':
+        profiler.reset()
+        return '', 204
+    return jsonify(profiler.snapshot())
+
+
+def init_app(app):
+    """Подключить профилирование к запросам приложения (SQL_PROFILER_ENABLED)"""
+    if not app.config.get('SQL_PROFILER_ENABLED', True):
+        return
+    app.extensions[EXTENSION_KEY] = SqlProfiler(
+        sample_rate=app.config.get('SQL_PROFILER_SAMPLE_RATE', 1.0),
+        slow_ms=app.config.get('SQL_SLOW_QUERY_MS', 100),
+        top=app.config.get('SQL_PROFILER_TOP', 5),
+    )
+    app.before_request(_begin_request)
+    app.after_request(_remember_status)
+    app.teardown_request(_end_request)
+    app.add_url_rule('/internal/metrics', METRICS_ENDPOINT, _metrics, methods=['GET', 'DELETE'])
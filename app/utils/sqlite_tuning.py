@@ -0,0 +1,61 @@
+"""
+Настройки соединений SQLite (PRAGMA)
+
+PRAGMA journal_mode, synchronous, cache_size и другие действуют на
+соединение, поэтому они выполняются обработчиком события connect движка -
+для каждого нового соединения пула. Набор задаётся параметром
+SQLITE_PRAGMAS (в ProductionConfig):
+
+- journal_mode=WAL - читатели не ждут писателя, писатель не ждёт читателей;
+- synchronous=NORMAL - в режиме WAL fsync только при checkpoint, данные
+  не портятся при сбое процесса (последние коммиты могут потеряться
+  только при сбое питания/ОС);
+- busy_timeout - ждать снятия блокировки вместо мгновенной ошибки
+  "database is locked";
+- cache_size, mmap_size, temp_store - кэш страниц, чтение через mmap и
+  временные таблицы сортировки в памяти.
+
+Для других СУБД параметр не используется.
+"""
+from sqlalchemy import event
+
+from app import db
+
+# Порядок важен: busy_timeout первым, чтобы смена journal_mode ждала блокировку
+_ORDER = ('busy_timeout', 'journal_mode', 'synchronous', 'cache_size', 'mmap_size', 'temp_store')
+
+
+def _statements(pragmas):
+    names = sorted(pragmas, key=lambda name: _ORDER.index(name) if name in _ORDER else len(_ORDER))
+    return [f'PRAGMA {name}={pragmas[name]}' for name in names]
+
+
+def _apply(statements):
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for statement in statements:
+                cursor.execute(statement)
+        finally:
+            cursor.close()
+    return _apply_pragmas
+
+
+def init_app(app):
+    """Подключить SQLITE_PRAGMAS к движкам приложения (основная база и binds)"""
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+    with app.app_context():
+        engines = list(db.engines.values())
+
+    listener = _apply(_statements(pragmas))
+    for engine in engines:
+        if engine.dialect.name == 'sqlite':
+            event.listen(engine, 'connect', listener)
+
+
+def current_pragmas():
+    """Фактические значения настроек на соединении сессии (для проверки)"""
+    conn = db.session.connection()
+    return {name: conn.exec_driver_sql(f'PRAGMA {name}').scalar() for name in _ORDER}
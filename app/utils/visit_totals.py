@@ -0,0 +1,166 @@
+"""
+Текущие итоги визитов (GuestVisit.services_amount / total_amount)
+
+Раньше каждое выполнение заказа услуги пересчитывало SUM() по всем
+выполненным заказам визита. Теперь после каждого flush изменения заказов
+переводятся в дельты по визитам: заказ, ставший выполненным, прибавляет
+свой подытог, переставший быть выполненным (или удалённый) - вычитает,
+изменение количества или цены выполненного заказа - разницу. Дельты
+применяются одним UPDATE в той же транзакции, поэтому откат отменяет и их.
+
+Итог визита всегда равен base_amount + services_amount. Заказы,
+изменённые в обход ORM, итоги не обновляют - расхождения находит
+команда `flask reconcile-visit-totals` (с --fix исправляет).
+"""
+from collections import defaultdict
+from decimal import Decimal
+
+from sqlalchemy import bindparam, event, func, inspect, select
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.util import identity_key
+
+from app import db
+from app.models.guests import GuestVisit
+from app.models.service import ServiceOrder
+
+COMPLETED = 'completed'
+
+_ORDER_ATTRS = ('visit_id', 'status', 'quantity', 'unit_price')
+_TOTAL_ATTRS = ('services_amount', 'total_amount')
+# точность Numeric(12, 2)
+_TOLERANCE = Decimal('0.005')
+
+
+def _amount(status, quantity, unit_price):
+    """Вклад заказа в services_amount визита"""
+    if status != COMPLETED:
+        return Decimal(0)
+    return Decimal(quantity or 0) * Decimal(str(unit_price or 0))
+
+
+def _old(obj, attr):
+    history = inspect(obj).attrs[attr].history
+    if history.deleted:
+        return history.deleted[0]
+    return getattr(obj, attr)
+
+
+def collect_deltas(session):
+    """Изменения services_amount по визитам за flush: visit_id -> Decimal"""
+    deltas = defaultdict(Decimal)
+    for obj in session.new:
+        if isinstance(obj, ServiceOrder):
+            deltas[obj.visit_id] += _amount(obj.status, obj.quantity, obj.unit_price)
+    for obj in session.dirty:
+        if not isinstance(obj, ServiceOrder):
+            continue
+        state = inspect(obj)
+        if any(state.attrs[attr].history.has_changes() for attr in _ORDER_ATTRS):
+            deltas[_old(obj, 'visit_id')] -= _amount(*(_old(obj, a) for a in _ORDER_ATTRS[1:]))
+            deltas[obj.visit_id] += _amount(obj.status, obj.quantity, obj.unit_price)
+    for obj in session.deleted:
+        if isinstance(obj, ServiceOrder):
+            deltas[_old(obj, 'visit_id')] -= _amount(*(_old(obj, a) for a in _ORDER_ATTRS[1:]))
+    return {visit_id: delta for visit_id, delta in deltas.items()
+            if visit_id is not None and delta}
+
+
+def apply_deltas(conn, deltas):
+    table = GuestVisit.__table__
+    delta = bindparam('delta', type_=table.c.services_amount.type)
+    conn.execute(
+        table.update().where(table.c.id == bindparam('visit_id')).values(
+            services_amount=table.c.services_amount + delta,
+            # в SET справа - значения до обновления
+            total_amount=table.c.base_amount + table.c.services_amount + delta
+        ),
+        [{'visit_id': visit_id, 'delta': delta} for visit_id, delta in deltas.items()]
+    )
+
+
+def record_orders(conn, orders):
+    """
+    Учесть в итогах заказы, записанные в обход ORM (пакетное создание)
+
+    Args:
+        orders: кортежи (visit_id, status, quantity, unit_price)
+    """
+    deltas = defaultdict(Decimal)
+    for visit_id, status, quantity, unit_price in orders:
+        deltas[visit_id] += _amount(status, quantity, unit_price)
+    deltas = {visit_id: delta for visit_id, delta in deltas.items() if delta}
+    if deltas:
+        apply_deltas(conn, deltas)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_visit_totals(session, flush_context):
+    deltas = collect_deltas(session)
+    if not deltas:
+        return
+    apply_deltas(session.connection(), deltas)
+    # загруженные визиты перечитают итоги при следующем обращении
+    for visit_id in deltas:
+        visit = session.identity_map.get(identity_key(GuestVisit, visit_id))
+        if visit is not None:
+            session.expire(visit, _TOTAL_ATTRS)
+
+
+# --- Сверка с полным пересчётом ---
+
+def services_amount_expr():
+    """SUM подытогов выполненных заказов (для полного пересчёта)"""
+    return func.coalesce(func.sum(ServiceOrder.quantity * ServiceOrder.unit_price), 0)
+
+
+def reconcile(fix=False):
+    """
+    Сравнить текущие итоги визитов с полным пересчётом
+
+    Args:
+        fix (bool): записать пересчитанные значения
+
+    Returns:
+        list: расхождения - словари visit_id, services_amount, expected_services,
+        total_amount, expected_total
+    """
+    completed = (
+        select(ServiceOrder.visit_id, services_amount_expr().label('amount'))
+        .where(ServiceOrder.status == COMPLETED)
+        .group_by(ServiceOrder.visit_id)
+        .subquery()
+    )
+    rows = db.session.execute(
+        select(GuestVisit.id, GuestVisit.base_amount, GuestVisit.services_amount,
+               GuestVisit.total_amount, func.coalesce(completed.c.amount, 0))
+        .outerjoin(completed, completed.c.visit_id == GuestVisit.id)
+        .order_by(GuestVisit.id)
+        .execution_options(yield_per=5000)
+    )
+
+    drift = []
+    for visit_id, base, services, total, expected in rows:
+        expected = Decimal(str(expected))
+        expected_total = Decimal(str(base or 0)) + expected
+        if abs(Decimal(str(services or 0)) - expected) >= _TOLERANCE or \
+                abs(Decimal(str(total or 0)) - expected_total) >= _TOLERANCE:
+            drift.append({
+                'visit_id': visit_id,
+                'services_amount': services,
+                'expected_services': expected,
+                'total_amount': total,
+                'expected_total': expected_total
+            })
+
+    if fix and drift:
+        table = GuestVisit.__table__
+        db.session.execute(
+            table.update().where(table.c.id == bindparam('row_id')).values(
+                services_amount=bindparam('expected_services', type_=table.c.services_amount.type),
+                total_amount=bindparam('expected_total', type_=table.c.total_amount.type)
+            ),
+            [{'row_id': d['visit_id'], 'expected_services': d['expected_services'],
+              'expected_total': d['expected_total']} for d in drift]
+        )
+        db.session.commit()
+    return drift
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска свободных номеров
+
+Сравнивает старый алгоритм (проверка каждого номера отдельным запросом)
+с одним запросом Room.query_available_for_period на 100, 1 000 и 10 000 номерах.
+
+Запуск: python benchmarks/bench_availability.py
+"""
+import os
+import sys
+import random
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Отдельная БД в памяти, рабочая база не затрагивается
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import create_app, db
+from app.models.room import Room, RoomType
+from app.models.booking import Booking, BookingStatus
+
+ROOM_COUNTS = (100, 1000, 10000)
+BOOKINGS_PER_ROOM = 5
+REPEATS = 3
+
+
+def seed(room_count):
+    """Заполнение БД номерами и бронированиями"""
+    db.drop_all()
+    db.create_all()
+
+    types = [t.code for t in RoomType]
+    prices = {t.code: t.base_price for t in RoomType}
+    db.session.bulk_insert_mappings(Room, [{
+        'id': i,
+        'number': str(i),
+        'room_type': types[i % len(types)],
+        'floor': i // 100 + 1,
+        'capacity': 2 + i % 4,
+        'price_per_night': prices[types[i % len(types)]],
+        'description': '',
+        'is_available': True
+    } for i in range(1, room_count + 1)])
+
+    rnd = random.Random(42)
+    start = date.today()
+    statuses = [BookingStatus.CONFIRMED.code, BookingStatus.CHECKED_IN.code,
+                BookingStatus.CANCELLED.code, BookingStatus.PENDING.code]
+    bookings = []
+    for room_id in range(1, room_count + 1):
+        for _ in range(BOOKINGS_PER_ROOM):
+            check_in = start + timedelta(days=rnd.randint(0, 90))
+            bookings.append({
+                'room_id': room_id,
+                'guest_name': 'Гость',
+                'guest_phone': '+7 900 000-00-00',
+                'check_in': check_in,
+                'check_out': check_in + timedelta(days=rnd.randint(1, 7)),
+                'total_price': 0,
+                'status': rnd.choice(statuses)
+            })
+    db.session.bulk_insert_mappings(Booking, bookings)
+    db.session.commit()
+
+
+def legacy_find(check_in, check_out):
+    """Прежний алгоритм: запрос на каждый номер"""
+    rooms = Room.query.filter_by(is_available=True).all()
+    return [r for r in rooms if r.is_available_for_period(check_in, check_out)]
+
+
+def single_query_find(check_in, check_out):
+    """Новый алгоритм: один запрос с NOT EXISTS"""
+    return Room.query_available_for_period(check_in, check_out).all()
+
+
+def measure(func, check_in, check_out):
+    best = None
+    result = None
+    for _ in range(REPEATS):
+        db.session.expunge_all()
+        started = time.perf_counter()
+        result = func(check_in, check_out)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, [r.id for r in result]
+
+
+def main():
+    app = create_app()
+    # сравниваем именно запросы к БД, индекс занятости в памяти отключаем
+    app.config['OCCUPANCY_INDEX_ENABLED'] = False
+    with app.app_context():
+        check_in = date.today() + timedelta(days=30)
+        check_out = check_in + timedelta(days=3)
+
+        print(f'{"номеров":>8} | {"по номеру, мс":>14} | {"один запрос, мс":>16} | ускорение')
+        for room_count in ROOM_COUNTS:
+            seed(room_count)
+            legacy_time, legacy_ids = measure(legacy_find, check_in, check_out)
+            new_time, new_ids = measure(single_query_find, check_in, check_out)
+
+            if legacy_ids != new_ids:
+                raise SystemExit(f'Результаты различаются на {room_count} номерах!')
+
+            print(f'{room_count:>8} | {legacy_time * 1000:>14.1f} | '
+                  f'{new_time * 1000:>16.1f} | x{legacy_time / new_time:.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Микробенчмарк чтения позиций счёта (фолио на 500 позиций)
+
+Имитирует запрос add_item: добавление позиции, пересчёт итогов, to_dict,
+вывод позиций в шаблоне и в JSON-ответе. Сравнивается кэш позиций
+в экземпляре Bill с чтением позиций из БД при каждом обращении.
+
+Запуск: python benchmarks/bench_bill_items.py
+"""
+import os
+import sys
+import time
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Отдельная БД в памяти, рабочая база не затрагивается
+os.environ['DATABASE_URL'] = 'sqlite://'
+
+from app import create_app, db
+from app.models.billing import Bill, BillItem
+from app.models.staff import Receptionist
+
+ITEMS = 500
+ROUNDS = 200
+
+
+def seed():
+    db.create_all()
+    receptionist = Receptionist('Мария', 'Администраторова', 'bench@hotel-eleon.ru',
+                                '+7 999 000-00-00', date.today())
+    db.session.add(receptionist)
+    db.session.flush()
+
+    bill = Bill('Гость', '+7 900 000-00-00', receptionist.id)
+    db.session.add(bill)
+    db.session.flush()
+    db.session.bulk_insert_mappings(BillItem, [{
+        'bill_id': bill.id,
+        'position': i,
+        'description': f'Мини-бар #{i}',
+        'quantity': 1,
+        'unit_price': 100.0,
+        'total': 100.0
+    } for i in range(ITEMS)])
+    db.session.commit()
+    return bill.id
+
+
+def request_cycle(bill, use_cache):
+    """Чтения позиций, которые делает один запрос add_item"""
+    bill.add_item('Завтрак', 1, 350.0)
+    if not use_cache:
+        bill._reset_items_cache()
+    bill.recalc_totals(tax_percent=10)
+    for _ in range(3):  # to_dict, шаблон, JSON-ответ
+        if not use_cache:
+            bill._reset_items_cache()
+        items = bill.to_dict()['items']
+    db.session.rollback()
+    return items
+
+
+def measure(bill_id, use_cache):
+    started = time.perf_counter()
+    for _ in range(ROUNDS):
+        bill = db.session.get(Bill, bill_id)
+        items = request_cycle(bill, use_cache)
+        assert len(items) == ITEMS + 1
+    return (time.perf_counter() - started) / ROUNDS
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        bill_id = seed()
+        without_cache = measure(bill_id, use_cache=False)
+        with_cache = measure(bill_id, use_cache=True)
+
+        print(f'Позиций в счёте: {ITEMS}, запросов: {ROUNDS}')
+        print(f'без кэша: {without_cache * 1000:.2f} мс на запрос')
+        print(f'с кэшем:  {with_cache * 1000:.2f} мс на запрос '
+              f'(x{without_cache / with_cache:.1f})')
+
+
+if __name__ == '__main__':
+    main()
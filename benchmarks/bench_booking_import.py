@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк импорта 2 000 групповых бронирований
+
+Сравнивает создание броней по одной (проверка доступности, Booking(...)
+с расчётом цены и commit на каждую строку - как в bookings.create)
+с пакетным импортом app.utils.booking_import.
+
+Запуск: python benchmarks/bench_booking_import.py
+"""
+import os
+import sys
+import random
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Отдельная БД в памяти, рабочая база не затрагивается
+os.environ['DATABASE_URL'] = 'sqlite://'
+os.environ['OCCUPANCY_INDEX'] = '0'
+
+from app import create_app, db
+from app.models.room import Room, RoomType
+from app.models.booking import Booking
+from app.utils import booking_import
+
+ROOMS = 300
+ROWS = 2000
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    types = [t.code for t in RoomType]
+    prices = {t.code: t.base_price for t in RoomType}
+    db.session.bulk_insert_mappings(Room, [{
+        'id': i,
+        'number': str(i),
+        'room_type': types[i % len(types)],
+        'floor': 1 + i // 100,
+        'capacity': 2,
+        'price_per_night': prices[types[i % len(types)]],
+        'is_available': True
+    } for i in range(1, ROOMS + 1)])
+    db.session.commit()
+
+
+def make_rows():
+    rng = random.Random(42)
+    rows = []
+    for line in range(2, ROWS + 2):
+        check_in = date.today() + timedelta(days=rng.randrange(180))
+        rows.append((line, {
+            'room_number': str(rng.randint(1, ROOMS)),
+            'guest_name': f'Гость {line}',
+            'guest_phone': '+7 900 000-00-00',
+            'check_in': check_in.isoformat(),
+            'check_out': (check_in + timedelta(days=rng.randint(1, 7))).isoformat(),
+            'status': 'confirmed'
+        }))
+    return rows
+
+
+def import_one_by_one(rows):
+    imported = 0
+    for _, record in rows:
+        room = Room.query.filter_by(number=record['room_number']).first()
+        check_in = date.fromisoformat(record['check_in'])
+        check_out = date.fromisoformat(record['check_out'])
+        if not room.is_available_for_period(check_in, check_out):
+            continue
+        booking = Booking(room_id=room.id, guest_name=record['guest_name'],
+                          guest_phone=record['guest_phone'],
+                          check_in=check_in, check_out=check_out)
+        booking.confirm()
+        db.session.add(booking)
+        db.session.commit()
+        imported += 1
+    return imported
+
+
+def main():
+    app = create_app()
+    rows = make_rows()
+    with app.app_context():
+        seed()
+        started = time.perf_counter()
+        single = import_one_by_one(rows)
+        single_time = time.perf_counter() - started
+
+        seed()
+        started = time.perf_counter()
+        report = booking_import.import_bookings(rows)
+        bulk_time = time.perf_counter() - started
+
+    print(f'Строк: {ROWS}, номеров: {ROOMS}')
+    print(f'по одной: {single} броней за {single_time:.2f} с')
+    print(f'импорт:   {report.imported} броней за {bulk_time:.2f} с '
+          f'(x{single_time / bulk_time:.1f}), отклонено {len(report.errors)}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Нагрузочная проверка параллельного бронирования
+
+Несколько потоков одновременно бронируют случайные номера на случайные
+даты (проверка доступности + запись подтверждённой брони). Сравниваются:
+
+- без защиты: проверка и запись без блокировок, таблица занятых ночей
+  отключена - так работало создание броней раньше;
+- глобальная блокировка: проверка и запись под одним threading.Lock,
+  таблица занятых ночей отключена (защищает только внутри процесса);
+- занятые ночи (room_night_claims): проверка без блокировок, пересечение
+  отсекает первичный ключ таблицы, проигравшая транзакция откатывается.
+
+В конце каждого прогона SQL-запросом считаются пары активных
+пересекающихся броней.
+
+Запуск: python benchmarks/bench_booking_race.py
+"""
+import os
+import sys
+import random
+import tempfile
+import threading
+import time
+from datetime import date, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Отдельная файловая БД: потокам нужны отдельные соединения
+_db_dir = tempfile.mkdtemp(prefix='bench_race_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'race.db')
+os.environ['OCCUPANCY_INDEX'] = '0'
+
+from sqlalchemy import event, func, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import Session, aliased
+
+from app import create_app, db
+from app.models.room import Room, RoomType
+from app.models.booking import Booking, ACTIVE_STATUSES
+from app.utils import room_claims
+
+ROOMS = 20
+THREADS = 8
+ATTEMPTS_PER_THREAD = 150
+HORIZON_DAYS = 60
+RETRIES = 20
+
+
+def seed():
+    db.drop_all()
+    db.create_all()
+    # WAL: читатели не ждут коммита писателя
+    db.session.execute(text('PRAGMA journal_mode=WAL'))
+    types = [t.code for t in RoomType]
+    prices = {t.code: t.base_price for t in RoomType}
+    db.session.bulk_insert_mappings(Room, [{
+        'id': i,
+        'number': str(i),
+        'room_type': types[i % len(types)],
+        'floor': 1 + i // 100,
+        'capacity': 2,
+        'price_per_night': prices[types[i % len(types)]],
+        'is_available': True
+    } for i in range(1, ROOMS + 1)])
+    db.session.commit()
+
+
+def random_request(rng):
+    check_in = date.today() + timedelta(days=rng.randrange(HORIZON_DAYS))
+    return rng.randint(1, ROOMS), check_in, check_in + timedelta(days=rng.randint(1, 5))
+
+
+def try_book(room_id, check_in, check_out):
+    """Путь бронирования: проверка доступности и запись. True - бронь создана"""
+    room = db.session.get(Room, room_id)
+    if not room.is_available_for_period(check_in, check_out):
+        db.session.rollback()
+        return False
+    booking = Booking(room_id=room_id, guest_name='Гость', guest_phone='+7 900 000-00-00',
+                      check_in=check_in, check_out=check_out)
+    booking.confirm()
+    db.session.add(booking)
+    db.session.commit()
+    return True
+
+
+def worker(app, seed_value, lock, stats):
+    rng = random.Random(seed_value)
+    with app.app_context():
+        for _ in range(ATTEMPTS_PER_THREAD):
+            request = random_request(rng)
+            for _ in range(RETRIES):
+                try:
+                    if lock is not None:
+                        with lock:
+                            booked = try_book(*request)
+                    else:
+                        booked = try_book(*request)
+                    stats['booked' if booked else 'busy'] += 1
+                    break
+                except IntegrityError as e:
+                    db.session.rollback()
+                    if not room_claims.is_conflict(e):
+                        raise
+                    stats['conflicts'] += 1
+                    break
+                except OperationalError:
+                    # SQLite: писатель уже держит блокировку - повторяем
+                    db.session.rollback()
+                    stats['retries'] += 1
+                    time.sleep(rng.random() * 0.005)
+        db.session.remove()
+
+
+def double_bookings():
+    """Пары активных броней одного номера с пересекающимися датами"""
+    other = aliased(Booking)
+    return db.session.query(func.count()).select_from(Booking).join(
+        other, (other.room_id == Booking.room_id) & (other.id > Booking.id)
+    ).filter(
+        Booking.status.in_(ACTIVE_STATUSES),
+        other.status.in_(ACTIVE_STATUSES),
+        other.check_in < Booking.check_out,
+        other.check_out > Booking.check_in
+    ).scalar()
+
+
+def run(app, use_claims, use_lock):
+    with app.app_context():
+        seed()
+
+    if not use_claims:
+        event.remove(Session, 'after_flush', room_claims._sync_claims)
+    try:
+        lock = threading.Lock() if use_lock else None
+        stats = {'booked': 0, 'busy': 0, 'conflicts': 0, 'retries': 0}
+        threads = [threading.Thread(target=worker, args=(app, n, lock, stats))
+                   for n in range(THREADS)]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    finally:
+        if not use_claims:
+            event.listen(Session, 'after_flush', room_claims._sync_claims)
+
+    with app.app_context():
+        stats['double'] = double_bookings()
+        db.session.remove()
+    stats['per_sec'] = stats['booked'] / elapsed
+    return stats
+
+
+def report(title, stats):
+    print(f'{title}: {stats["booked"]} броней, {stats["per_sec"]:.0f} броней/с, '
+          f'отказов {stats["busy"]}, конфликтов {stats["conflicts"]}, '
+          f'повторов {stats["retries"]}, двойных броней {stats["double"]}')
+
+
+def main():
+    app = create_app()
+    print(f'Номеров: {ROOMS}, потоков: {THREADS}, попыток на поток: {ATTEMPTS_PER_THREAD}')
+    report('без защиты           ', run(app, use_claims=False, use_lock=False))
+    report('глобальная блокировка', run(app, use_claims=False, use_lock=True))
+    report('занятые ночи         ', run(app, use_claims=True, use_lock=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк поиска гостей на 1 000 000 записей
+
+Сравнивает прежний ILIKE '%q%' по пяти колонкам с полнотекстовым
+индексом guests_fts (app/utils/guest_search.py) на типичных строках
+поиска администратора. Выводит медиану и 95-й перцентиль задержки.
+
+Запуск: python benchmarks/bench_guest_search.py [количество гостей]
+"""
+import os
+import sys
+import random
+import statistics
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Отдельная файловая БД, рабочая база не затрагивается
+_db_dir = tempfile.mkdtemp(prefix='bench_guests_')
+os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(_db_dir, 'guests.db')
+
+from app import create_app, db
+from app.models.guests import Guest
+from app.utils import guest_search
+
+GUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+REPEATS = 10
+BATCH = 50_000
+
+FIRST_NAMES = ['Иван', 'Пётр', 'Анна', 'Мария', 'Сергей', 'Ольга', 'Алексей', 'Елена',
+               'Дмитрий', 'Наталья', 'Андрей', 'Татьяна', 'Михаил', 'Ирина', 'Николай']
+# ~1 000 разных фамилий: около 1 000 однофамильцев на каждую
+SYLLABLES = ['ка', 'ли', 'мо', 'ру', 'се', 'та', 'во', 'ну', 'до', 'ле', 'ми', 'ко',
+             'за', 'бе', 'ра', 'жу']
+LAST_NAMES = [(a + b).capitalize() + suffix
+              for a in SYLLABLES for b in SYLLABLES
+              for suffix in ('ов', 'ев', 'ин', 'ский')]
+
+
+def seed():
+    rng = random.Random(7)
+    now = datetime.utcnow()
+    table = Guest.__table__
+    for start in range(0, GUESTS, BATCH):
+        rows = []
+        for i in range(start, min(start + BATCH, GUESTS)):
+            first = rng.choice(FIRST_NAMES)
+            last = rng.choice(LAST_NAMES)
+            phone = f'9{rng.randrange(10**9):09d}'
+            rows.append({
+                'first_name': first,
+                'last_name': last,
+                'phone': f'+7 {phone[:3]} {phone[3:6]}-{phone[6:8]}-{phone[8:]}',
+                'email': f'guest{i}@example.com',
+                'doc_number': f'{rng.randrange(10**4):04d} {rng.randrange(10**6):06d}',
+                'created_at': now,
+                'updated_at': now
+            })
+        db.session.execute(table.insert(), rows)
+    db.session.commit()
+
+
+def ilike(q):
+    like = f'%{q}%'
+    return Guest.query.with_entities(Guest.id).filter(db.or_(
+        Guest.first_name.ilike(like),
+        Guest.last_name.ilike(like),
+        Guest.phone.ilike(like),
+        Guest.email.ilike(like),
+        Guest.doc_number.ilike(like),
+    )).order_by(Guest.created_at.desc()).limit(200).all()
+
+
+def measure(func, q):
+    timings = []
+    for _ in range(REPEATS):
+        started = time.perf_counter()
+        func(q)
+        timings.append((time.perf_counter() - started) * 1000)
+    timings.sort()
+    return statistics.median(timings), timings[int(len(timings) * 0.95) - 1]
+
+
+def main():
+    app = create_app()
+    with app.app_context():
+        started = time.perf_counter()
+        seed()
+        print(f'Гостей: {GUESTS}, загрузка {time.perf_counter() - started:.1f} с')
+        started = time.perf_counter()
+        guest_search.rebuild()
+        print(f'Построение индекса: {time.perf_counter() - started:.1f} с')
+
+        sample = db.session.get(Guest, GUESTS // 2)
+        digits = guest_search.phone_digits(sample.phone)
+        queries = [
+            ('префикс фамилии', sample.last_name[:3]),
+            ('фамилия целиком', sample.last_name),
+            ('имя и фамилия', f'{sample.first_name} {sample.last_name}'),
+            ('телефон 8XXX', '8' + digits[1:]),
+            ('часть телефона', digits[1:7]),
+            ('email', sample.email),
+        ]
+
+        print(f'{"запрос":<18}{"ILIKE p50/p95, мс":>22}{"FTS5 p50/p95, мс":>22}{"найдено":>10}')
+        for title, q in queries:
+            like_p50, like_p95 = measure(ilike, q)
+            fts_p50, fts_p95 = measure(guest_search.search_ids, q)
+            found = len(guest_search.search_ids(q))
+            print(f'{title:<18}{like_p50:>12.1f} / {like_p95:<8.1f}'
+                  f'{fts_p50:>12.2f} / {fts_p95:<8.2f}{found:>8}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Смешанная нагрузка чтение/запись на файловой SQLite: без настроек и с
+профилем ProductionConfig (WAL, synchronous=NORMAL, кэш, mmap)
+
+Потоки в цикле выполняют типичные запросы приложения: 80% - чтения
+(брони номера за период, карточка гостя, список номеров), 20% - записи
+(новый гость с отдельным commit). Каждый профиль запускается в отдельном
+процессе на своей свежей базе. Выводятся операции в секунду, задержки
+чтения и записи (p50 / p95) и число ошибок "database is locked".
+
+Запуск: python benchmarks/bench_sqlite_tuning.py [секунд на профиль]
+"""
+import os
+import sys
+import json
+import random
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+THREADS = 8
+WRITE_SHARE = 0.2
+ROOMS = 200
+GUESTS = 20_000
+BOOKINGS = 50_000
+PROFILES = (('default', 'без настроек'), ('production', 'ProductionConfig'))
+
+
+def seed(db, Room, Guest, Booking):
+    from app.models.room import RoomType
+
+    rng = random.Random(1)
+    now = datetime.utcnow()
+    types = [t for t in RoomType]
+    db.session.execute(Room.__table__.insert(), [{
+        'id': i, 'number': str(i), 'room_type': types[i % len(types)].code,
+        'floor': 1 + i // 20, 'capacity': 2, 'price_per_night': types[i % len(types)].base_price,
+        'is_available': True, 'created_at': now, 'updated_at': now
+    } for i in range(1, ROOMS + 1)])
+    db.session.execute(Guest.__table__.insert(), [{
+        'first_name': f'Гость{i}', 'last_name': f'Тестов{i}', 'phone': f'+7999{i:07d}',
+        'created_at': now, 'updated_at': now
+    } for i in range(GUESTS)])
+    rows = []
+    for _ in range(BOOKINGS):
+        check_in = date.today() + timedelta(days=rng.randrange(365))
+        rows.append({
+            'room_id': rng.randint(1, ROOMS), 'guest_name': 'Гость', 'guest_phone': '1',
+            'check_in': check_in, 'check_out': check_in + timedelta(days=rng.randint(1, 7)),
+            'total_price': 5000, 'status': 'confirmed', 'created_at': now, 'updated_at': now
+        })
+    db.session.execute(Booking.__table__.insert(), rows)
+    db.session.commit()
+
+
+def run_profile(profile, seconds):
+    """Прогон в текущем процессе; результат - JSON в stdout"""
+    os.environ['DATABASE_URL'] = 'sqlite:///' + os.path.join(
+        tempfile.mkdtemp(prefix=f'bench_sqlite_{profile}_'), 'hotel.db')
+    os.environ['OCCUPANCY_INDEX'] = '0'
+
+    from sqlalchemy.exc import OperationalError
+
+    from app import create_app, db
+    from app.models.booking import Booking
+    from app.models.guests import Guest
+    from app.models.room import Room
+    from app.utils import sqlite_tuning
+
+    app = create_app(profile)
+    with app.app_context():
+        seed(db, Room, Guest, Booking)
+        pragmas = sqlite_tuning.current_pragmas()
+
+    stop = time.perf_counter() + seconds
+    lock = threading.Lock()
+    stats = {'reads': [], 'writes': [], 'locked': 0}
+
+    def worker(seed_value):
+        rng = random.Random(seed_value)
+        reads, writes, locked = [], [], 0
+        with app.app_context():
+            while time.perf_counter() < stop:
+                started = time.perf_counter()
+                try:
+                    if rng.random() < WRITE_SHARE:
+                        db.session.add(Guest(first_name='Новый', last_name=f'Гость{rng.random()}'))
+                        db.session.commit()
+                        writes.append(time.perf_counter() - started)
+                        continue
+                    kind = rng.randrange(3)
+                    if kind == 0:
+                        day = date.today() + timedelta(days=rng.randrange(365))
+                        Booking.query.filter(
+                            Booking.room_id == rng.randint(1, ROOMS),
+                            Booking.overlaps_period(day, day + timedelta(days=3))
+                        ).all()
+                    elif kind == 1:
+                        db.session.get(Guest, rng.randint(1, GUESTS))
+                    else:
+                        Room.query.filter_by(floor=rng.randint(1, ROOMS // 20)).all()
+                    db.session.rollback()  # конец транзакции чтения
+                    reads.append(time.perf_counter() - started)
+                except OperationalError:
+                    db.session.rollback()
+                    locked += 1
+        with lock:
+            stats['reads'].extend(reads)
+            stats['writes'].extend(writes)
+            stats['locked'] += locked
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    def percentiles(values):
+        if not values:
+            return [0, 0]
+        values.sort()
+        return [statistics.median(values) * 1000, values[int(len(values) * 0.95) - 1] * 1000]
+
+    print(json.dumps({
+        'pragmas': pragmas,
+        'ops': (len(stats['reads']) + len(stats['writes'])) / seconds,
+        'writes': len(stats['writes']) / seconds,
+        'read_ms': percentiles(stats['reads']),
+        'write_ms': percentiles(stats['writes']),
+        'locked': stats['locked']
+    }))
+
+
+def main():
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    print(f'Потоков: {THREADS}, записей {WRITE_SHARE:.0%}, {seconds:.0f} с на профиль')
+    print(f'{"профиль":<18}{"опер/с":>9}{"записей/с":>11}'
+          f'{"чтение p50/p95, мс":>22}{"запись p50/p95, мс":>22}{"locked":>8}')
+    for profile, title in PROFILES:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--profile', profile, str(seconds)],
+            check=True, capture_output=True, text=True
+        ).stdout
+        r = json.loads(output.strip().splitlines()[-1])
+        print(f'{title:<18}{r["ops"]:>9.0f}{r["writes"]:>11.0f}'
+              f'{r["read_ms"][0]:>12.2f} / {r["read_ms"][1]:<7.2f}'
+              f'{r["write_ms"][0]:>12.2f} / {r["write_ms"][1]:<7.2f}{r["locked"]:>8}')
+        print(f'{"":<18}{r["pragmas"]}')
+
+
+if __name__ == '__main__':
+    if len(sys.argv) > 2 and sys.argv[1] == '--profile':
+        run_profile(sys.argv[2], float(sys.argv[3]))
+    else:
+        main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Время запуска воркера и бюджет на его регрессию
+
+1. python -X importtime: время всех импортов при загрузке app.py и самые
+   медленные модули проекта (собственное время импорта).
+2. Время до первого обслуженного запроса: новый процесс создаёт
+   приложение (ProductionConfig), поднимает HTTP-сервер и отвечает на
+   GET /; время считается от запуска процесса до получения ответа.
+   Сравниваются запуск с db.create_all (AUTO_CREATE_SCHEMA=1) и без него.
+
+Если медиана запуска без create_all или время импортов превышает
+бюджет, скрипт завершается с кодом 1 - его можно запускать в CI.
+
+Запуск: python benchmarks/bench_startup.py [--runs 5] [--budget-ms 1500]
+        [--import-budget-ms 1000]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Загрузка app.py так же, как при запуске сервера (пакет app
+# перекрывает модуль app.py, поэтому по пути к файлу)
+LOAD_APP = '''
+import importlib.util, sys
+sys.path.insert(0, {root!r})
+spec = importlib.util.spec_from_file_location('app_main', {root!r} + '/app.py')
+main = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(main)
+'''
+
+# Процесс-воркер: приложение, сервер на свободном порту, один запрос
+CHILD = LOAD_APP + '''
+from werkzeug.serving import make_server
+server = make_server('127.0.0.1', 0, main.app)
+print(server.port, flush=True)
+server.handle_request()
+'''
+
+
+def measure_imports(env, top=8):
+    """Суммарное время импортов при загрузке app.py (мс) и самые медленные модули проекта"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', LOAD_APP.format(root=ROOT)],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    total, modules = 0.0, []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        if not name.startswith('  '):
+            total += int(cumulative_us) / 1000  # импорт верхнего уровня
+        name = name.strip()
+        if name == 'app' or name.startswith('app.'):
+            modules.append((int(self_us) / 1000, name))
+    return total, sorted(modules, reverse=True)[:top]
+
+
+def first_request(env):
+    """Время от запуска процесса до ответа на первый запрос (мс)"""
+    started = time.perf_counter()
+    child = subprocess.Popen(
+        [sys.executable, '-c', CHILD.format(root=ROOT)],
+        cwd=ROOT, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    try:
+        port = int(child.stdout.readline())
+        with urllib.request.urlopen(f'http://127.0.0.1:{port}/') as response:
+            response.read()
+            status = response.status
+        elapsed = (time.perf_counter() - started) * 1000
+        child.wait(timeout=10)
+    finally:
+        if child.poll() is None:
+            child.kill()
+    if status != 200:
+        raise RuntimeError(f'GET / вернул {status}')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--budget-ms', type=float, default=1500)
+    parser.add_argument('--import-budget-ms', type=float, default=1000)
+    args = parser.parse_args()
+
+    env = dict(os.environ)
+    env['DATABASE_URL'] = 'sqlite:///' + os.path.join(
+        tempfile.mkdtemp(prefix='bench_startup_'), 'hotel.db')
+    env['OCCUPANCY_INDEX'] = '0'
+    env['FLASK_CONFIG'] = 'production'
+
+    # Схема создаётся один раз, как шагом развёртывания
+    subprocess.run(
+        [sys.executable, '-c', 'from app import create_app, db\n'
+         'app = create_app("production")\n'
+         'with app.app_context(): db.create_all()'],
+        cwd=ROOT, env=env, check=True
+    )
+
+    import_ms, slowest = measure_imports(env)
+    print(f'Импорты при загрузке app.py: {import_ms:.0f} мс (бюджет {args.import_budget_ms:.0f})')
+    for self_ms, name in slowest:
+        print(f'  {self_ms:7.1f} мс  {name}')
+
+    results = {}
+    for flag, title in (('1', 'с db.create_all'), ('0', 'без db.create_all')):
+        env['AUTO_CREATE_SCHEMA'] = flag
+        timings = [first_request(env) for _ in range(args.runs)]
+        results[flag] = statistics.median(timings)
+        print(f'До первого запроса {title:<18} медиана {results[flag]:6.0f} мс, '
+              f'мин {min(timings):6.0f} мс, макс {max(timings):6.0f} мс')
+
+    failed = []
+    if results['0'] > args.budget_ms:
+        failed.append(f'запуск {results["0"]:.0f} мс > {args.budget_ms:.0f} мс')
+    if import_ms > args.import_budget_ms:
+        failed.append(f'импорт {import_ms:.0f} мс > {args.import_budget_ms:.0f} мс')
+    if failed:
+        print('Бюджет превышен: ' + '; '.join(failed))
+        sys.exit(1)
+    print('Бюджет соблюдён')
+
+
+if __name__ == '__main__':
+    main()
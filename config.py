@@ -15,6 +15,18 @@ class Config:
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL') or \
         f'sqlite:///{BASE_DIR / "hotel_eleon.db"}'
     
+    # Реплика для чтения отчётов и списков (app/utils/db_routing.py).
+    # Пользователь, сделавший запись, REPLICA_READ_YOUR_WRITES секунд
+    # читает с основной базы
+    REPLICA_DATABASE_URL = os.environ.get('REPLICA_DATABASE_URL')
+    SQLALCHEMY_BINDS = {'replica': REPLICA_DATABASE_URL} if REPLICA_DATABASE_URL else {}
+    REPLICA_READ_YOUR_WRITES = int(os.environ.get('REPLICA_READ_YOUR_WRITES', 10))
+    
+    # Создавать недостающие таблицы при каждом запуске (db.create_all в
+    # create_app). В продакшене схема создаётся отдельным шагом
+    # `flask create-schema`, и воркеры стартуют без DDL
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', '1') == '1'
+    
     # Отключаем отслеживание изменений (экономит память)
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
@@ -29,6 +41,36 @@ class Config:
     TAX_PERCENT = 10.0  # НДС 10%
     CURRENCY = 'руб.'
     CURRENCY_CODE = 'RUB'
+    
+    # Индекс занятости номеров в памяти процесса (app/utils/occupancy.py).
+    # При запуске нескольких воркеров индекс каждого процесса видит только
+    # свои изменения - в этом случае его нужно отключить
+    OCCUPANCY_INDEX_ENABLED = os.environ.get('OCCUPANCY_INDEX', '1') == '1'
+    
+    # Время жизни кэша статистики главной страницы (секунды)
+    DASHBOARD_CACHE_TTL = int(os.environ.get('DASHBOARD_CACHE_TTL', 10))
+    
+    # Время жизни кэша цен номеров (секунды): после изменения цены в одном
+    # воркере остальные видят новую цену не позже чем через этот срок
+    ROOM_PRICE_CACHE_TTL = int(os.environ.get('ROOM_PRICE_CACHE_TTL', 10))
+    
+    # Время жизни готового прайса услуг /services/ (секунды)
+    SERVICE_CATALOG_TTL = int(os.environ.get('SERVICE_CATALOG_TTL', 5))
+    
+    # Кэш каталога номеров (app/utils/room_catalog.py): 'local' - LRU в памяти
+    # процесса, 'shared' - общий для воркеров (Redis по ROOM_CACHE_URL)
+    ROOM_CACHE_BACKEND = os.environ.get('ROOM_CACHE_BACKEND', 'local')
+    ROOM_CACHE_SIZE = int(os.environ.get('ROOM_CACHE_SIZE', 128))
+    ROOM_CACHE_URL = os.environ.get('ROOM_CACHE_URL', 'redis://localhost:6379/0')
+    
+    # Профилирование SQL по эндпоинтам (app/utils/sql_profiler.py): доля
+    # профилируемых запросов, порог журнала медленных запросов (мс) и токен
+    # для /internal/metrics (без токена - только с локального адреса в
+    # DEBUG/TESTING, в продакшене без токена эндпоинт отвечает 404)
+    SQL_PROFILER_ENABLED = os.environ.get('SQL_PROFILER', '1') == '1'
+    SQL_PROFILER_SAMPLE_RATE = float(os.environ.get('SQL_PROFILER_SAMPLE_RATE', 1.0))
+    SQL_SLOW_QUERY_MS = float(os.environ.get('SQL_SLOW_QUERY_MS', 100))
+    METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
 
 
 class DevelopmentConfig(Config):
@@ -39,11 +81,50 @@ class DevelopmentConfig(Config):
 class ProductionConfig(Config):
     """Конфигурация для продакшена"""
     DEBUG = False
+    AUTO_CREATE_SCHEMA = os.environ.get('AUTO_CREATE_SCHEMA', '0') == '1'
+    # в продакшене обычно несколько воркеров: индекс занятости включается
+    # явно (OCCUPANCY_INDEX=1) только для однопроцессного развёртывания
+    OCCUPANCY_INDEX_ENABLED = os.environ.get('OCCUPANCY_INDEX', '0') == '1'
+    SQL_PROFILER_SAMPLE_RATE = float(os.environ.get('SQL_PROFILER_SAMPLE_RATE', 0.05))
+    
+    # PRAGMA для каждого соединения SQLite (app/utils/sqlite_tuning.py):
+    # WAL - чтение не блокируется записью, busy_timeout - ожидание вместо
+    # "database is locked"
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'busy_timeout': int(os.environ.get('SQLITE_BUSY_TIMEOUT', 5000)),  # мс
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_KB', 64000)),      # < 0 - в КиБ
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'temp_store': 'MEMORY',
+    }
+    
+    # Пул соединений для серверных СУБД (PostgreSQL/MySQL по DATABASE_URL);
+    # pre_ping отбрасывает соединения, закрытые сервером
+    if not Config.SQLALCHEMY_DATABASE_URI.startswith('sqlite'):
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            'pool_size': int(os.environ.get('DB_POOL_SIZE', 10)),
+            'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+            'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+            'pool_recycle': int(os.environ.get('DB_POOL_RECYCLE', 1800)),
+            'pool_pre_ping': True,
+        }
+
+
+class TestingConfig(Config):
+    """Конфигурация для тестов (tests/): база в памяти, бюджеты запросов проверяются"""
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = os.environ.get('TEST_DATABASE_URL', 'sqlite://')
+    REPLICA_DATABASE_URL = None
+    SQLALCHEMY_BINDS = {}
+    OCCUPANCY_INDEX_ENABLED = False
+    QUERY_BUDGET_ENFORCED = True
 
 
 # Словарь конфигураций
 config = {
     'development': DevelopmentConfig,
     'production': ProductionConfig,
+    'testing': TestingConfig,
     'default': DevelopmentConfig
 }
@@ -0,0 +1,53 @@
+"""
+Общие фикстуры тестов: приложение с базой в памяти (TestingConfig)
+
+Запуск: python -m pytest
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app import create_app, db
+from app.models import Room, RoomType, Booking, Receptionist
+
+
+@pytest.fixture
+def app():
+    app = create_app('testing')
+    with app.app_context():
+        yield app
+        db.session.remove()
+        db.drop_all()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def receptionist(app):
+    staff = Receptionist('Мария', 'Администраторова', 'reception@hotel-eleon.ru',
+                         '+7 999 222-33-44', date(2023, 3, 1))
+    db.session.add(staff)
+    db.session.commit()
+    return staff
+
+
+def add_rooms(count):
+    """Номера 101, 102, ... одного этажа"""
+    rooms = [Room(str(101 + i), RoomType.STANDARD.code, 1, 2) for i in range(count)]
+    db.session.add_all(rooms)
+    db.session.commit()
+    return rooms
+
+
+def add_booking(room, status, days_from_now=1, nights=2):
+    """Бронь номера в заданном статусе (без пересечений, если номера разные)"""
+    check_in = date.today() + timedelta(days=days_from_now)
+    booking = Booking(room.id, f'Гость {room.number}', '+7 999 000-00-00',
+                      check_in, check_in + timedelta(days=nights))
+    booking.status = status.code
+    db.session.add(booking)
+    db.session.commit()
+    return booking
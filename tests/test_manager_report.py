@@ -0,0 +1,63 @@
+"""
+Отчёт менеджера (Manager.generate_report): состав ключей и счётчики броней
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app import db
+from app.models import BookingStatus, Manager
+from tests.conftest import add_booking, add_rooms
+
+
+@pytest.fixture
+def manager(app):
+    manager = Manager('Анна', 'Менеджерова', 'manager@hotel-eleon.ru',
+                      '+7 999 111-22-33', date(2023, 1, 15))
+    db.session.add(manager)
+    db.session.commit()
+    return manager
+
+
+def test_report_shape_and_booking_counts(manager, receptionist):
+    rooms = add_rooms(6)
+    statuses = [BookingStatus.PENDING, BookingStatus.CONFIRMED, BookingStatus.CONFIRMED,
+                BookingStatus.CHECKED_IN, BookingStatus.CHECKED_OUT, BookingStatus.CANCELLED]
+    bookings = [add_booking(room, status) for room, status in zip(rooms, statuses)]
+
+    bill = receptionist.create_bill_for_booking(bookings[3])
+    receptionist.record_payment(bill, amount=1000, method='card')
+    db.session.commit()
+
+    today = date.today()
+    report = manager.generate_report(today - timedelta(days=1), today + timedelta(days=1))
+
+    assert set(report) == {'period', 'billing', 'bookings'}
+    assert report['period'] == {
+        'start': (today - timedelta(days=1)).strftime('%Y-%m-%d'),
+        'end': (today + timedelta(days=1)).strftime('%Y-%m-%d'),
+    }
+    assert set(report['billing']) == {
+        'total_bills', 'paid_bills', 'pending_bills', 'total_revenue',
+        'total_payments', 'total_payment_amount', 'payment_methods'
+    }
+    assert report['billing']['total_bills'] == 1
+    assert report['billing']['total_payments'] == 1
+    assert report['billing']['total_payment_amount'] == 1000
+    assert report['billing']['payment_methods'] == {'card': 1000}
+    assert report['bookings'] == {
+        'total': 6,
+        'confirmed': 2,
+        'checked_in': 1,
+        'checked_out': 1,
+    }
+
+
+def test_report_excludes_bookings_outside_period(manager):
+    add_booking(add_rooms(1)[0], BookingStatus.CONFIRMED)
+
+    last_week = date.today() - timedelta(days=7)
+    report = manager.generate_report(last_week - timedelta(days=7), last_week)
+
+    assert report['bookings']['total'] == 0
+    assert report['billing']['total_bills'] == 0
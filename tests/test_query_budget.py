@@ -0,0 +1,48 @@
+"""
+Бюджеты запросов списков (@query_budget): число запросов не растёт
+с количеством строк, то есть в шаблонах нет N+1
+"""
+import pytest
+
+from app import db
+from app.models import BookingStatus
+from app.utils.query_counter import count_queries, query_budget, QueryBudgetExceeded
+from tests.conftest import add_booking, add_rooms
+
+
+@pytest.fixture
+def bookings_with_bills(app, receptionist):
+    rooms = add_rooms(5)
+    bookings = [add_booking(room, BookingStatus.CONFIRMED) for room in rooms]
+    for booking in bookings:
+        bill = receptionist.create_bill_for_booking(booking)
+        receptionist.record_payment(bill, amount=100, method='card')
+    db.session.commit()
+    db.session.expire_all()
+    return bookings
+
+
+def test_bookings_index_within_budget(client, bookings_with_bills):
+    with count_queries() as counter:
+        response = client.get('/bookings/')
+    assert response.status_code == 200
+    assert counter.count <= 2
+
+
+def test_billing_index_within_budget(client, bookings_with_bills):
+    with count_queries() as counter:
+        response = client.get('/billing/')
+    assert response.status_code == 200
+    assert counter.count <= 2
+
+
+def test_budget_exceeded_raises(app):
+    from app.models import Room
+
+    @query_budget(1)
+    def view():
+        Room.query.count()
+        Room.query.count()
+
+    with pytest.raises(QueryBudgetExceeded):
+        view()